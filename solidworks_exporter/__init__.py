@@ -0,0 +1,20 @@
+"""Export engine behind the SolidWorks Drawing Exporter UI.
+
+Importing the package is cheap: it pulls in neither tkinter nor pywin32.
+The window is in solidworks_exporter.ui, the CLI in solidworks_exporter.cli.
+"""
+from .backends import BackendError, CADBackend, SimulatedBackend, SolidWorksBackend
+from .discovery import list_slddrw_files, list_sldprt_files
+from .export import (
+    export_DRW_Solidworks,
+    export_STEP_Solidworks,
+    export_drawing,
+    export_drawing_outputs,
+    export_drawing_to_dwg,
+    export_drawing_to_pdf,
+    export_part_or_assembly_configurations_to_step,
+    open_and_rebuild_drawing,
+    rename_dwg_files,
+)
+from .manifest import ExportManifest
+from .report import make_report
@@ -0,0 +1,522 @@
+"""CAD backends: the application calls the export engine makes, behind one interface.
+
+SolidWorksBackend drives SolidWorks over COM. SimulatedBackend keeps
+everything in memory with configurable latencies, sheet counts,
+configurations and failure rates, so scheduling and batching changes can be
+exercised and benchmarked on machines without a CAD license.
+
+Backends are created by a factory (the class itself or a functools.partial
+of it) inside the thread or process that uses them, so factories must be
+picklable.
+"""
+import os
+import random
+import signal
+import threading
+import time
+
+# swDocumentTypes_e
+DOC_PART = 1
+DOC_ASSEMBLY = 2
+DOC_DRAWING = 3
+
+# swExportDataFileType_e
+EXPORT_PDF = 1
+
+# swExportDataSheetsToExport_e
+EXPORT_CURRENT_SHEET = 2
+
+# HRESULT of calls into an application process that is gone
+RPC_S_SERVER_UNAVAILABLE = 0x800706BA
+
+
+class BackendError(Exception):
+    """A CAD call failed; errors/warnings are the swFileLoadError_e/swFileLoadWarning_e codes, if any."""
+
+    def __init__(self, message, errors=0, warnings=0, hresult=None):
+        super().__init__(message)
+        self.errors = errors
+        self.warnings = warnings
+        self.hresult = hresult
+
+
+class CADBackend:
+    """Interface of the CAD application as seen by the export engine.
+
+    Document handles are opaque: whatever open_doc returns is passed back to
+    the other calls. last_errors and last_warnings hold the codes reported
+    by the last call, 0 if it reported none; last_error_table tells how to
+    read them, "load" (swFileLoadError_e) or "save" (swFileSaveError_e).
+    """
+
+    last_errors = 0
+    last_warnings = 0
+    last_error_table = "load"
+
+    def _reset_codes(self, table="load"):
+        """Forgets the codes of the previous call; every call starts with this."""
+        self.last_errors = self.last_warnings = 0
+        self.last_error_table = table
+
+    def open_doc(self, path, doc_type):
+        """Opens a document silently; raises BackendError if it cannot be opened."""
+        raise NotImplementedError
+
+    def force_rebuild(self, doc):
+        raise NotImplementedError
+
+    def get_sheet_names(self, doc):
+        raise NotImplementedError
+
+    def activate_sheet(self, doc, sheet_name):
+        raise NotImplementedError
+
+    def save_as(self, doc, path, options):
+        """SaveAs3 with the given swSaveAsOptions_e; returns True on success."""
+        raise NotImplementedError
+
+    def get_export_data(self, file_type):
+        """Returns a new export-data object (GetExportFileData) for extension_save_as."""
+        raise NotImplementedError
+
+    def set_export_sheets(self, export_data, mode, sheet_names):
+        raise NotImplementedError
+
+    def extension_save_as(self, doc, path, export_data):
+        """Extension.SaveAs with export data; returns True on success."""
+        raise NotImplementedError
+
+    def get_configuration_names(self, doc):
+        raise NotImplementedError
+
+    def document_dependencies(self, path, traverse=True):
+        """Paths of the files the document references (models of a drawing, components of an assembly).
+
+        With traverse the references of the references are included, at every level.
+        """
+        raise NotImplementedError
+
+    def show_configuration(self, doc, config_name):
+        raise NotImplementedError
+
+    def save_model_as(self, doc, path):
+        """Plain SaveAs, the format following the extension (e.g. STEP); returns True on success."""
+        raise NotImplementedError
+
+    def close_doc(self, doc):
+        raise NotImplementedError
+
+    def is_open(self, path):
+        """True if the document is already open in the application."""
+        return False
+
+    def exit_app(self):
+        """Closes the application if this backend started it."""
+
+    def memory_usage(self):
+        """Working set of the application process in bytes, or None if unknown."""
+        return None
+
+    def process_id(self):
+        """Id of the application process, or None if it has none of its own."""
+        return None
+
+    def kill(self):
+        """Terminates the application at once, making a blocked call fail; safe to call from any thread."""
+        raise NotImplementedError
+
+
+def kill_process(process_id):
+    """Terminates a process by id (TerminateProcess on Windows)."""
+    os.kill(process_id, signal.SIGTERM)
+
+
+class SolidWorksBackend(CADBackend):
+    """SolidWorks over COM (pywin32).
+
+    Connects to the running SolidWorks, or starts a separate instance when
+    new_instance is set (one per worker). COM is initialised for the
+    calling thread.
+    """
+
+    def __init__(self, new_instance=False, visible=True):
+        import pythoncom
+        import win32com.client
+        self._pythoncom = pythoncom
+        self._client = win32com.client
+        pythoncom.CoInitialize()
+        if new_instance:
+            self.sw_app = win32com.client.DispatchEx('SldWorks.Application')
+        else:
+            self.sw_app = win32com.client.Dispatch('SldWorks.Application')
+        self.sw_app.Visible = visible
+        self.new_instance = new_instance
+        # Read now: COM objects cannot be used from the watchdog thread that may need it
+        self._process_id = self.sw_app.GetProcessID()
+
+    def _int_ref(self):
+        return self._client.VARIANT(self._pythoncom.VT_BYREF | self._pythoncom.VT_I4, 0)
+
+    def open_doc(self, path, doc_type):
+        self._reset_codes()
+        errors = self._int_ref()
+        warnings = self._int_ref()
+        doc = self.sw_app.OpenDoc6(path, doc_type, 0, "", errors, warnings)
+        self.last_errors, self.last_warnings = errors.value, warnings.value
+        if doc is None:
+            raise BackendError(f"OpenDoc6 failed for {path} (errors={errors.value}, warnings={warnings.value})",
+                               errors=errors.value, warnings=warnings.value)
+        return doc
+
+    def force_rebuild(self, doc):
+        self._reset_codes()
+        return doc.ForceRebuild3(True)
+
+    def get_sheet_names(self, doc):
+        self._reset_codes()
+        return list(doc.GetSheetNames)
+
+    def activate_sheet(self, doc, sheet_name):
+        self._reset_codes()
+        return doc.ActivateSheet(sheet_name)
+
+    def save_as(self, doc, path, options):
+        self._reset_codes("save")
+        # SaveAs3 returns 0 or the swFileSaveError_e code of the failure
+        self.last_errors = doc.SaveAs3(path, 0, options)
+        return self.last_errors == 0
+
+    def get_export_data(self, file_type):
+        self._reset_codes()
+        export_data = self.sw_app.GetExportFileData(file_type)
+        export_data.ViewPdfAfterSaving = False
+        return export_data
+
+    def set_export_sheets(self, export_data, mode, sheet_names):
+        self._reset_codes()
+        sheets = self._client.VARIANT(self._pythoncom.VT_ARRAY | self._pythoncom.VT_BSTR, list(sheet_names))
+        return export_data.SetSheets(mode, sheets)
+
+    def extension_save_as(self, doc, path, export_data):
+        self._reset_codes("save")
+        errors = self._int_ref()
+        warnings = self._int_ref()
+        success = doc.Extension.SaveAs(path, 0, 0, export_data, errors, warnings)
+        self.last_errors, self.last_warnings = errors.value, warnings.value
+        return bool(success)
+
+    def get_configuration_names(self, doc):
+        self._reset_codes()
+        return list(doc.GetConfigurationNames)
+
+    def show_configuration(self, doc, config_name):
+        self._reset_codes()
+        return doc.ShowConfiguration2(config_name)
+
+    def document_dependencies(self, path, traverse=True):
+        self._reset_codes()
+        # Flat [file name, path, file name, path, ...] array; search the referenced paths
+        dependencies = self.sw_app.GetDocumentDependencies2(path, traverse, True, False)
+        return list(dependencies[1::2]) if dependencies else []
+
+    def save_model_as(self, doc, path):
+        # SaveAs reports no codes
+        self._reset_codes("save")
+        return bool(doc.SaveAs(path))
+
+    def close_doc(self, doc):
+        self._reset_codes()
+        self.sw_app.CloseDoc(doc.GetTitle)
+
+    def is_open(self, path):
+        return self.sw_app.GetOpenDocumentByName(path) is not None
+
+    def exit_app(self):
+        if self.new_instance:
+            self.sw_app.ExitApp()
+
+    def memory_usage(self):
+        # psutil is optional; without it memory-based recycling is off
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process(self._process_id).memory_info().rss
+
+    def process_id(self):
+        return self._process_id
+
+    def kill(self):
+        # Never kill the SolidWorks session the user works in
+        if not self.new_instance:
+            raise BackendError("cannot kill a SolidWorks instance this backend did not start")
+        kill_process(self._process_id)
+
+
+def _one_page_pdf():
+    """A valid PDF of one empty A4 page, for simulated PDF outputs that can be read back (see merge.py)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 842 595] /Resources << >> >>"]
+    data = b"%PDF-1.7\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return data + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+
+# Minimal file contents so simulated outputs look like the real formats
+_FILE_HEADERS = {
+    ".pdf": _one_page_pdf(),
+    ".dwg": b"AC1032",
+    ".step": b"ISO-10303-21;\nEND-ISO-10303-21;\n",
+}
+
+
+# Working set of a freshly started simulated application
+_SIMULATED_BASE_MB = 400
+
+
+class SimulatedDocument:
+    def __init__(self, path, doc_type, sheets, configurations):
+        self.path = path
+        self.doc_type = doc_type
+        self.title = os.path.basename(path)
+        self.sheets = [f"Sheet{i}" for i in range(1, sheets + 1)]
+        self.configurations = list(configurations)
+        self.active_sheet = self.sheets[0] if self.sheets else None
+        self.active_configuration = self.configurations[0] if self.configurations else None
+        # Models loaded into memory for this document
+        self.models = []
+
+
+class SimulatedExportData:
+    def __init__(self, file_type):
+        self.file_type = file_type
+        self.mode = None
+        self.sheets = []
+
+
+class SimulatedBackend(CADBackend):
+    """In-memory CAD application.
+
+    latency: seconds per call, either one number or a dict keyed by method
+    name (open_doc, force_rebuild, activate_sheet, save_as, ...) with an
+    optional "default".
+    sheets: sheets per drawing, an int, a (min, max) range drawn per document
+    or a dict of path -> int.
+    configurations: configuration names, a sequence or a dict of path -> names.
+    dependencies: dict of document path -> directly referenced paths (none by default).
+    failure_rate: probability that a call fails, one number or a dict keyed
+    by method name. open_doc and the other calls raise BackendError, saves
+    return False.
+    failure_errors: the swFileLoadError_e bits simulated failures report
+    (1, swGenericError, by default; 8388608, swApplicationBusy, makes them
+    transient), failure_save_errors the swFileSaveError_e code failed saves
+    report (1, swGenericSaveError, by default; 16, swFileLockError, makes
+    them transient), and failure_hresult the HRESULT raised failures carry.
+    hangs: dict of document path -> name of the call that blocks on that
+    document until the application is killed (e.g. {path: "open_doc"}).
+    truncate: dict of output path -> how many of its saves write an empty
+    file while reporting success, as a full disk or a dropped share does.
+    model_load: seconds to load a model (a path in dependencies) into memory
+    when a document that references it is opened. A model stays loaded
+    while any open document references it, so a drawing opened while its
+    model is open does not pay for it; model_loads counts the loads.
+    memory_growth: MB the simulated process keeps per opened document, and
+    slowdown: fraction by which every latency grows per opened document,
+    both until exit_app, to model an application that bloats over a batch.
+    Sheet ranges are drawn from seed and the document path (relative to
+    root when given, so a batch in a new temporary folder draws the same
+    sheets), failures from a generator seeded with seed, so a batch behaves
+    the same on every run.
+    """
+
+    def __init__(self, latency=0.0, sheets=1, configurations=("Default",), failure_rate=0.0, seed=0,
+                 write_files=True, dependencies=None, memory_growth=0.0, slowdown=0.0, hangs=None,
+                 failure_errors=1, failure_hresult=None, model_load=0.0, truncate=None, root=None,
+                 failure_save_errors=1):
+        self.latency = latency
+        self.sheets = sheets
+        self.configurations = configurations
+        self.dependencies = dependencies or {}
+        self.failure_rate = failure_rate
+        self.failure_errors = failure_errors
+        self.failure_save_errors = failure_save_errors
+        self.failure_hresult = failure_hresult
+        self.seed = seed
+        self.root = root
+        self.write_files = write_files
+        self.memory_growth = memory_growth
+        self.slowdown = slowdown
+        self.hangs = hangs or {}
+        self.truncate = dict(truncate or {})
+        self.model_load = model_load
+        # Only referenced documents are models that cost a load
+        self.model_paths = {model for references in self.dependencies.values() for model in references}
+        # Loaded model path -> open documents referencing it
+        self.loaded = {}
+        self.model_loads = 0
+        self._killed = threading.Event()
+        self.opened = 0
+        self.open_documents = {}
+        self.calls = {}
+        self._random = random.Random(seed)
+
+    def _per_call(self, setting, name):
+        if isinstance(setting, dict):
+            return setting.get(name, setting.get("default", 0.0))
+        return setting
+
+    def _call(self, name, path=None):
+        """Accounts for one call on path's document: waits for its latency and tells whether it fails."""
+        self._reset_codes("save" if name in ("save_as", "extension_save_as", "save_model_as") else "load")
+        if self._killed.is_set():
+            raise BackendError(f"{name}: the application is not running", hresult=RPC_S_SERVER_UNAVAILABLE)
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if path is not None and self.hangs.get(path) == name:
+            self._killed.wait()
+            raise BackendError(f"{name}: the application was killed", hresult=RPC_S_SERVER_UNAVAILABLE)
+        delay = self._per_call(self.latency, name)
+        if delay:
+            time.sleep(delay * (1.0 + self.slowdown * self.opened))
+        rate = self._per_call(self.failure_rate, name)
+        return bool(rate) and self._random.random() < rate
+
+    def _document_random(self, path):
+        if self.root is not None:
+            path = os.path.relpath(path, self.root)
+        return random.Random(f"{self.seed}:{path}")
+
+    def sheet_count(self, path):
+        if isinstance(self.sheets, dict):
+            return self.sheets.get(path, 1)
+        if isinstance(self.sheets, (tuple, list)):
+            return self._document_random(path).randint(*self.sheets)
+        return self.sheets
+
+    def _configurations_for(self, path):
+        if isinstance(self.configurations, dict):
+            return self.configurations.get(path, ("Default",))
+        return self.configurations
+
+    def _fail(self, name, message, path=None):
+        if self._call(name, path):
+            raise BackendError(f"simulated failure in {name}: {message}", errors=self.failure_errors,
+                               hresult=self.failure_hresult)
+
+    def _write(self, path):
+        if self.write_files:
+            with open(path, "wb") as file:
+                if self.truncate.get(path):
+                    self.truncate[path] -= 1
+                    return
+                file.write(_FILE_HEADERS.get(os.path.splitext(path)[1].lower(), b""))
+
+    def open_doc(self, path, doc_type):
+        if self._call("open_doc", path):
+            self.last_errors = self.failure_errors
+            raise BackendError(f"simulated failure opening {path}", errors=self.failure_errors,
+                               hresult=self.failure_hresult)
+        self.opened += 1
+        sheets = self.sheet_count(path) if doc_type == DOC_DRAWING else 0
+        doc = SimulatedDocument(path, doc_type, sheets, self._configurations_for(path))
+        doc.models = self._references(path) + ([path] if path in self.model_paths else [])
+        for model in doc.models:
+            if not self.loaded.get(model):
+                self.model_loads += 1
+                if self.model_load:
+                    time.sleep(self.model_load * (1.0 + self.slowdown * self.opened))
+            self.loaded[model] = self.loaded.get(model, 0) + 1
+        self.open_documents[doc.title] = doc
+        return doc
+
+    def force_rebuild(self, doc):
+        self._fail("force_rebuild", doc.path, doc.path)
+        return True
+
+    def get_sheet_names(self, doc):
+        self._reset_codes()
+        return list(doc.sheets)
+
+    def activate_sheet(self, doc, sheet_name):
+        self._fail("activate_sheet", sheet_name, doc.path)
+        doc.active_sheet = sheet_name
+        return True
+
+    def save_as(self, doc, path, options):
+        if self._call("save_as", doc.path):
+            self.last_errors = self.failure_save_errors
+            return False
+        self._write(path)
+        return True
+
+    def get_export_data(self, file_type):
+        self._call("get_export_data")
+        return SimulatedExportData(file_type)
+
+    def set_export_sheets(self, export_data, mode, sheet_names):
+        self._reset_codes()
+        export_data.mode = mode
+        export_data.sheets = list(sheet_names)
+        return True
+
+    def extension_save_as(self, doc, path, export_data):
+        if self._call("extension_save_as", doc.path):
+            self.last_errors = self.failure_save_errors
+            return False
+        self._write(path)
+        return True
+
+    def get_configuration_names(self, doc):
+        self._reset_codes()
+        return list(doc.configurations)
+
+    def document_dependencies(self, path, traverse=True):
+        self._fail("document_dependencies", path)
+        return self._references(path) if traverse else list(self.dependencies.get(path, []))
+
+    def _references(self, path):
+        """Everything path references, at every level."""
+        found = list(self.dependencies.get(path, []))
+        for reference in found:
+            found += [p for p in self.dependencies.get(reference, []) if p not in found and p != path]
+        return found
+
+    def show_configuration(self, doc, config_name):
+        self._fail("show_configuration", config_name, doc.path)
+        doc.active_configuration = config_name
+        return True
+
+    def save_model_as(self, doc, path):
+        if self._call("save_model_as", doc.path):
+            return False
+        self._write(path)
+        return True
+
+    def close_doc(self, doc):
+        self._call("close_doc", doc.path)
+        if self.open_documents.pop(doc.title, None) is doc:
+            for model in doc.models:
+                self.loaded[model] -= 1
+                if not self.loaded[model]:
+                    del self.loaded[model]
+
+    def is_open(self, path):
+        doc = self.open_documents.get(os.path.basename(path))
+        return doc is not None and doc.path == path
+
+    def exit_app(self):
+        self.open_documents.clear()
+        self.loaded.clear()
+        self.opened = 0
+
+    def kill(self):
+        self._killed.set()
+
+    def memory_usage(self):
+        return int((_SIMULATED_BASE_MB + self.memory_growth * self.opened) * 2 ** 20)
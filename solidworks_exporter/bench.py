@@ -0,0 +1,272 @@
+"""Export benchmark: reproducible batches with a per-stage timing breakdown.
+
+    python -m solidworks_exporter bench --drawings 200 --sheets 1-6 --workers 4 --json bench.json
+
+Synthetic batches run against the simulated backend; --backend solidworks
+with --config job.json times the real application on real drawings. The
+result holds the parameters, wall time, throughput and count/mean/p50/p95
+per stage, and can be written as JSON or CSV. --baseline compares against
+an earlier JSON result and exits with 1 when a metric got worse by more
+than --tolerance.
+
+--models N makes the synthetic drawings show N shared assemblies, which
+cost --model-load seconds to load, to measure locality batching
+(--locality) against the default order.
+"""
+import contextlib
+import csv
+import functools
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from . import events
+from .backends import SimulatedBackend, SolidWorksBackend
+from .export import export_DRW_Solidworks, export_STEP_Solidworks
+from .schedule import CostModel
+
+# Simulated seconds per call, roughly in the proportions seen on real drawings
+DEFAULT_LATENCY = {
+    "open_doc": 0.05,
+    "force_rebuild": 0.08,
+    "activate_sheet": 0.01,
+    "get_export_data": 0.002,
+    "save_as": 0.03,
+    "extension_save_as": 0.03,
+    "show_configuration": 0.01,
+    "save_model_as": 0.04,
+    "close_doc": 0.005,
+}
+
+
+def quiet_backend(backend_factory):
+    """Creates the backend with the export messages of worker processes silenced.
+
+    The parent silences its own output around the run, so the messages do
+    not mix with the benchmark table.
+    """
+    if multiprocessing.parent_process() is not None:
+        sys.stdout = open(os.devnull, "w")
+    return backend_factory()
+
+
+class StageTimings:
+    """Event listener (see events.py) collecting the duration of every finished stage."""
+
+    def __init__(self):
+        self.timings = {}
+
+    def __call__(self, record):
+        if record["event"] == "stage_end":
+            self.timings.setdefault(record["stage"], []).append(record["seconds"])
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def stage_stats(timings):
+    return {
+        stage: {
+            "count": len(values),
+            "total": sum(values),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+        }
+        for stage, values in sorted(timings.items()) if values
+    }
+
+
+def parse_range(text):
+    """'4' -> 4, '1-6' -> (1, 6)."""
+    low, _, high = text.partition("-")
+    return (int(low), int(high)) if high else int(low)
+
+
+def _export(drawing_paths, part_paths, work_dir, individual_sheets, workers, backend_factory, locality=False):
+    reports = {}
+    if drawing_paths:
+        reports["drawings"] = export_DRW_Solidworks(drawing_paths, os.path.join(work_dir, "dwg"),
+                                                    os.path.join(work_dir, "pdf"), True, True,
+                                                    individual_sheets, individual_sheets,
+                                                    workers=workers, backend_factory=backend_factory,
+                                                    costs=CostModel(), locality=locality)
+    if part_paths:
+        reports["parts"] = export_STEP_Solidworks(part_paths, os.path.join(work_dir, "step"), workers=workers,
+                                                  backend_factory=backend_factory, costs=CostModel())
+    return reports
+
+
+def run_benchmark(drawings=50, sheets=(1, 4), configurations=1, parts=0, workers=1, seed=0, time_scale=1.0,
+                  individual_sheets=True, backend="simulated", drawing_paths=None, part_paths=None,
+                  models=0, model_load=0.5, locality=False):
+    """Runs one batch and returns the benchmark result.
+
+    For the simulated backend the batch is drawings synthetic drawings with
+    sheets sheets each (an int or a (min, max) range) and parts synthetic
+    parts with configurations configurations each; with models, every
+    drawing shows one of that many assemblies, drawn from seed, which take
+    model_load seconds to load. For the SolidWorks backend drawing_paths /
+    part_paths must list real documents.
+    """
+    work_dir = tempfile.mkdtemp(prefix="sw_bench_")
+    timings = events.add_listener(StageTimings())
+    try:
+        if backend == "simulated":
+            latency = {name: seconds * time_scale for name, seconds in DEFAULT_LATENCY.items()}
+            drawing_paths = [os.path.join(work_dir, "src", f"drawing{i:05d}.SLDDRW") for i in range(drawings)]
+            dependencies = {}
+            if models:
+                generator = random.Random(seed)
+                model_paths = [os.path.join(work_dir, "src", f"assembly{i:05d}.SLDASM") for i in range(models)]
+                dependencies = {path: [generator.choice(model_paths)] for path in drawing_paths}
+            inner_factory = functools.partial(SimulatedBackend, latency=latency, sheets=sheets,
+                                              configurations=tuple(f"Config{i}" for i in range(1, configurations + 1)),
+                                              seed=seed, root=work_dir, dependencies=dependencies,
+                                              model_load=model_load * time_scale)
+            part_paths = [os.path.join(work_dir, "src", f"part{i:05d}.SLDPRT") for i in range(parts)]
+        else:
+            inner_factory = functools.partial(SolidWorksBackend, new_instance=workers > 1)
+            drawing_paths = list(drawing_paths or [])
+            part_paths = list(part_paths or [])
+        backend_factory = functools.partial(quiet_backend, inner_factory)
+
+        start = time.perf_counter()
+        # The export functions report every file they write; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            reports = _export(drawing_paths, part_paths, work_dir, individual_sheets, workers, backend_factory,
+                              locality)
+        wall_time = time.perf_counter() - start
+    finally:
+        events.remove_listener(timings)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    documents = sum(len(report["results"]) for report in reports.values())
+    return {
+        "params": {
+            "backend": backend, "drawings": len(drawing_paths), "sheets": sheets,
+            "configurations": configurations, "parts": len(part_paths), "workers": workers,
+            "seed": seed, "time_scale": time_scale, "individual_sheets": individual_sheets,
+            "models": models, "model_load": model_load, "locality": locality,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "wall_time": wall_time,
+        "documents": documents,
+        "failed": sum(report["failed"] for report in reports.values()),
+        "throughput": documents / wall_time if wall_time > 0 else 0.0,
+        "stages": stage_stats(timings.timings),
+    }
+
+
+def write_json(result, path):
+    with open(path, "w") as file:
+        json.dump(result, file, indent=4)
+
+
+def write_csv(result, path):
+    """One row per stage plus a 'total' row with the batch figures."""
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["stage", "count", "total", "mean", "p50", "p95"])
+        for stage, stats in result["stages"].items():
+            writer.writerow([stage, stats["count"], f"{stats['total']:.6f}", f"{stats['mean']:.6f}",
+                             f"{stats['p50']:.6f}", f"{stats['p95']:.6f}"])
+        writer.writerow(["total", result["documents"], f"{result['wall_time']:.6f}", "", "", ""])
+
+
+def compare(result, baseline, tolerance=0.10, min_delta=0.001):
+    """Lists the metrics that got worse than baseline by more than tolerance (a fraction).
+
+    Stage percentiles must also be at least min_delta seconds slower, so
+    jitter on sub-millisecond calls is not reported.
+    """
+    regressions = []
+    if result["params"] != baseline["params"]:
+        regressions.append("parameters differ from the baseline, results are not comparable")
+        return regressions
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        regressions.append(f"throughput {result['throughput']:.2f}/s vs {baseline['throughput']:.2f}/s")
+    for stage, stats in result["stages"].items():
+        base = baseline["stages"].get(stage)
+        if not base:
+            continue
+        for metric in ("p50", "p95"):
+            if stats[metric] > base[metric] * (1 + tolerance) and stats[metric] - base[metric] >= min_delta:
+                regressions.append(f"{stage} {metric} {stats[metric] * 1000:.1f} ms vs {base[metric] * 1000:.1f} ms")
+    return regressions
+
+
+def print_result(result):
+    print(f"{result['documents']} documents in {result['wall_time']:.2f} s "
+          f"({result['throughput']:.2f}/s, {result['failed']} failed)")
+    print(f"{'stage':<24}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<24}{stats['count']:>8}{stats['total']:>10.2f}"
+              f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}")
+
+
+def add_arguments(parser):
+    parser.add_argument("--backend", choices=("simulated", "solidworks"), default="simulated")
+    parser.add_argument("--config", help="settings JSON whose drawings and parts are timed (SolidWorks backend)")
+    parser.add_argument("--drawings", type=int, default=50, help="synthetic drawings")
+    parser.add_argument("--sheets", type=parse_range, default=(1, 4), help="sheets per drawing, N or MIN-MAX")
+    parser.add_argument("--configs", type=int, default=1, help="configurations per synthetic part")
+    parser.add_argument("--parts", type=int, default=0, help="synthetic parts exported to STEP")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--models", type=int, default=0, help="shared assemblies the synthetic drawings show")
+    parser.add_argument("--model-load", type=float, default=0.5, help="simulated seconds to load an assembly")
+    parser.add_argument("--locality", action="store_true", help="export drawings sharing an assembly together")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplier for simulated latencies")
+    parser.add_argument("--combined", action="store_true", help="export combined files instead of individual sheets")
+    parser.add_argument("--json", help="write the result to this JSON file")
+    parser.add_argument("--csv", help="write the per-stage table to this CSV file")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown vs the baseline (fraction)")
+
+
+def run(args):
+    drawing_paths = part_paths = None
+    if args.backend == "solidworks":
+        if not args.config:
+            print("--backend solidworks needs --config with the drawings to time", file=sys.stderr)
+            return 2
+        from .settings import drawing_paths as settings_drawings, load_settings_file, part_paths as settings_parts
+        settings = load_settings_file(args.config)
+        drawing_paths, part_paths = settings_drawings(settings), settings_parts(settings)
+
+    result = run_benchmark(drawings=args.drawings, sheets=args.sheets, configurations=args.configs,
+                           parts=args.parts, workers=args.workers, seed=args.seed, time_scale=args.time_scale,
+                           individual_sheets=not args.combined, backend=args.backend,
+                           drawing_paths=drawing_paths, part_paths=part_paths, models=args.models,
+                           model_load=args.model_load, locality=args.locality)
+    print_result(result)
+    if args.json:
+        write_json(result, args.json)
+    if args.csv:
+        write_csv(result, args.csv)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        # JSON turns the sheet range into a list
+        result = json.loads(json.dumps(result))
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+    return 0
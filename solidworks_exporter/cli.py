@@ -0,0 +1,373 @@
+"""Command-line entry point for headless batch exports.
+
+    python -m solidworks_exporter export --config job.json [--workers N] [--incremental] [--force]
+        [--rebuild always|when_needed|never] [--locality] [--affected] [--resume [RUN_ID]] [--events log.jsonl]
+    python -m solidworks_exporter journal --config job.json [--run RUN_ID|last] [--failed]
+    python -m solidworks_exporter scan FOLDER... [--include GLOB] [--exclude GLOB] [--add-to job.json]
+    python -m solidworks_exporter watch --config job.json [--interval S] [--debounce S] [--polling]
+    python -m solidworks_exporter bench [--drawings N] [--workers N] [--json result.json]  (see bench.py)
+
+job.json is a settings file saved from the UI; besides its listed drawings
+and parts, export scans its source_folders. The exit code is 0 when every
+document exported, 1 when any document failed and 2 for usage or
+configuration errors.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from . import events
+from .bench import add_arguments as add_bench_arguments, run as run_bench
+from .events import JsonLinesListener
+from .export import REBUILD_POLICIES, export_DRW_Solidworks, export_STEP_Solidworks
+from .report import print_report
+from .backends import SolidWorksBackend
+from .discovery import default_index_path, scan_documents
+from .journal import Journal, default_journal_path
+from .merge import batch_policy
+from .refgraph import ReferenceGraph, default_graph_path
+from .settings import (
+    drawing_option_sets,
+    drawing_paths,
+    drawing_priorities,
+    load_settings_file,
+    part_configurations,
+    part_paths,
+    save_settings_file,
+    scan_source_folders,
+)
+from .watch import watch
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def update_graph(graph, documents):
+    """graph.update with a SolidWorks connection that is released afterwards; returns the changed paths."""
+    backend = SolidWorksBackend()
+    try:
+        return graph.update(backend, documents)
+    finally:
+        backend.exit_app()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m solidworks_exporter",
+                                     description="Batch export SolidWorks drawings and models without the UI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="export the drawings and parts of a settings file")
+    export.add_argument("--config", required=True, help="settings JSON saved from the UI")
+    export.add_argument("--workers", type=int, help="number of SolidWorks instances (overrides the settings file)")
+    export.add_argument("--incremental", action="store_true", default=None,
+                        help="skip drawings whose outputs are up to date")
+    export.add_argument("--force", action="store_true", help="re-export everything, even if up to date")
+    export.add_argument("--rebuild", choices=REBUILD_POLICIES,
+                        help="when to rebuild drawings before exporting (overrides the settings file)")
+    export.add_argument("--locality", action="store_true", default=None,
+                        help="export drawings that share models together, keeping the models open")
+    export.add_argument("--report", help="write the run report to this JSON file")
+    export.add_argument("--affected", action="store_true",
+                        help="only export the drawings and parts affected by documents changed since the last run")
+    export.add_argument("--graph", help="reference graph file (default: next to the settings file)")
+    export.add_argument("--resume", nargs="?", const="last", metavar="RUN_ID",
+                        help="export only what an earlier run (default: the last one) did not finish")
+    export.add_argument("--journal", help="job journal file (default: next to the settings file)")
+    export.add_argument("--events", help="append per-stage timing events to this JSON-lines file")
+
+    journal = commands.add_parser("journal", help="show past export runs and what failed")
+    journal.add_argument("--config", help="settings JSON whose journal is read")
+    journal.add_argument("--journal", help="journal file (instead of --config)")
+    journal.add_argument("--run", help="show the documents of this run ('last' for the last one)")
+    journal.add_argument("--failed", action="store_true", help="with --run, only the failed and unfinished documents")
+
+    scan = commands.add_parser("scan", help="list the SolidWorks documents under project folders")
+    scan.add_argument("folders", nargs="+", help="project root folders")
+    scan.add_argument("--include", action="append", default=[], help="glob of documents to keep (repeatable)")
+    scan.add_argument("--exclude", action="append", default=[], help="glob of documents or folders to skip (repeatable)")
+    scan.add_argument("--add-to", metavar="CONFIG", help="add the drawings and parts found to this settings file")
+
+    watch = commands.add_parser("watch", help="export drawings and parts of the source folders whenever they are saved")
+    watch.add_argument("--config", required=True, help="settings JSON with source_folders and the export options")
+    watch.add_argument("--interval", type=float, default=2.0, help="seconds between checks (default 2)")
+    watch.add_argument("--debounce", type=float, default=5.0,
+                       help="seconds a document must stay unchanged before it is exported (default 5)")
+    watch.add_argument("--polling", action="store_true", help="poll even if watchdog is installed")
+
+    bench = commands.add_parser("bench", help="time a reproducible export batch, per stage")
+    add_bench_arguments(bench)
+    return parser
+
+
+def run_export(args):
+    try:
+        settings = load_settings_file(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read settings file {args.config}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    scanned_drawings, scanned_parts = scan_source_folders(settings)
+    drawings = list(dict.fromkeys(drawing_paths(settings) + scanned_drawings))
+    parts = list(dict.fromkeys(part_paths(settings) + scanned_parts))
+    if not drawings and not parts:
+        print(f"No drawings or parts to export in {args.config}", file=sys.stderr)
+        return EXIT_USAGE
+    if parts and not settings["step_folder"]:
+        print("Parts are listed but no step_folder is set", file=sys.stderr)
+        return EXIT_USAGE
+
+    workers = args.workers if args.workers is not None else settings["workers"]
+    incremental = args.incremental if args.incremental is not None else settings["incremental"]
+    rebuild = args.rebuild or settings["rebuild"]
+    if rebuild not in REBUILD_POLICIES:
+        print(f"Unknown rebuild policy {rebuild!r} in {args.config}", file=sys.stderr)
+        return EXIT_USAGE
+    locality = args.locality if args.locality is not None else settings["locality"]
+
+    journal = Journal(args.journal or default_journal_path(args.config))
+    resumes = None
+    if args.resume:
+        resumes = journal.last_run_id() if args.resume == "last" else args.resume
+        try:
+            unfinished = journal.unfinished(resumes)
+        except KeyError:
+            print(f"No run {args.resume} in {journal.path}", file=sys.stderr)
+            return EXIT_USAGE
+        if not unfinished:
+            print(f"Run {resumes} has nothing left to export")
+            return EXIT_OK
+        print(f"Resuming run {resumes}: {len(unfinished)} document(s) left")
+        drawings = [path for path in unfinished if path.lower().endswith(".slddrw")]
+        parts = [path for path in unfinished if not path.lower().endswith(".slddrw")]
+
+    listener = events.add_listener(JsonLinesListener(args.events)) if args.events else None
+    graph = ReferenceGraph(args.graph or default_graph_path(args.config)) if args.affected and not resumes else None
+    run = None
+    error = None
+    reports = {}
+    try:
+        if graph:
+            changed = update_graph(graph, drawings + parts)
+            drawings = graph.affected(changed, drawings)
+            parts = graph.affected(changed, parts)
+            print(f"{len(changed)} changed document(s): {len(drawings)} drawing(s) and {len(parts)} STEP export(s) "
+                  f"to regenerate")
+        # Locality batching takes the references the graph already knows instead of asking SolidWorks
+        references = None
+        if locality:
+            graph_path = args.graph or default_graph_path(args.config)
+            known = graph or (ReferenceGraph(graph_path) if os.path.exists(graph_path) else None)
+            references = known.known_references(drawings) if known else None
+        run = journal.start_run(drawings + parts, resumes=resumes,
+                                options={"config": args.config, "workers": workers, "incremental": incremental,
+                                         "force": args.force, "rebuild": rebuild})
+        # One batch per set of drawing options; drawings without options of their own are all one batch
+        for number, (options, batch) in enumerate(drawing_option_sets(settings, drawings), 1):
+            key = "drawings" if number == 1 else f"drawings {number}"
+            reports[key] = export_DRW_Solidworks(batch, settings["dwg_folder"], settings["pdf_folder"],
+                                                 options["flag_export_dwg"], options["flag_export_pdf"],
+                                                 options["export_pdf"], options["export_dwg"],
+                                                 workers=workers, incremental=incremental, force=args.force,
+                                                 rebuild=rebuild, recycle=settings["recycle"],
+                                                 timeouts=settings["timeouts"],
+                                                 retry=settings["retry"],
+                                                 priorities=drawing_priorities(settings),
+                                                 locality=locality, references=references,
+                                                 verify=settings["verify"],
+                                                 merge=batch_policy(settings["merge"], number),
+                                                 progress_callback=run.document_done)
+            print_report("Drawings", reports[key])
+        if parts:
+            reports["parts"] = export_STEP_Solidworks(parts, settings["step_folder"],
+                                                      selected_configs=part_configurations(settings),
+                                                      workers=workers, incremental=incremental, force=args.force,
+                                                      recycle=settings["recycle"], timeouts=settings["timeouts"],
+                                                      retry=settings["retry"], heavy=settings["heavy_assemblies"],
+                                                      verify=settings["verify"], progress_callback=run.document_done)
+            print_report("STEP", reports["parts"])
+    except Exception as e:
+        # Typically SolidWorks (or pywin32) is not available
+        error = str(e)
+        print(f"Export aborted: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        if run:
+            run.finish(list(reports.values()), error)
+            print(f"Journal: run {run.run_id} in {journal.path}")
+        if graph:
+            graph.record_run(drawings + parts, reports.values())
+            graph.save()
+        if listener:
+            events.remove_listener(listener)
+            listener.close()
+
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(reports, file, indent=4)
+
+    return EXIT_FAILED if any(report["failed"] for report in reports.values()) else EXIT_OK
+
+
+def run_journal(args):
+    if not args.journal and not args.config:
+        print("Give --config or --journal", file=sys.stderr)
+        return EXIT_USAGE
+    journal = Journal(args.journal or default_journal_path(args.config))
+    runs = journal.runs()
+    if not runs:
+        print(f"No runs in {journal.path}")
+        return EXIT_OK
+
+    if not args.run:
+        print(f"{'run':<22}{'started':<21}{'documents':>10}{'done':>7}{'failed':>8}{'unfinished':>12}  resumes")
+        for run in runs:
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+            print(f"{run['run_id']:<22}{started:<21}{len(run['documents']):>10}{run['done']:>7}{run['failed']:>8}"
+                  f"{run['unfinished']:>12}  {run['resumes'] or ''}")
+        return EXIT_OK
+
+    run_id = runs[-1]["run_id"] if args.run == "last" else args.run
+    run = next((run for run in runs if run["run_id"] == run_id), None)
+    if run is None:
+        print(f"No run {args.run} in {journal.path}", file=sys.stderr)
+        return EXIT_USAGE
+    records = journal.documents(run_id)
+    for document in run["documents"]:
+        record = records.get(document)
+        status = record["status"] if record else "unfinished"
+        if args.failed and status == "done":
+            continue
+        detail = f"  {record['error']}" if record and record["error"] else ""
+        print(f"{status:<11}{document}{detail}")
+        if record:
+            for output in record["failed"]:
+                print(f"{'':<11}  failed output: {output}")
+    return EXIT_OK
+
+
+def run_scan(args):
+    found = {"drawings": [], "parts": [], "assemblies": []}
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            print(f"Not a folder: {folder}", file=sys.stderr)
+            return EXIT_USAGE
+        for kind, paths in scan_documents(folder, args.include, args.exclude, default_index_path(folder)).items():
+            found[kind] += paths
+    for kind, paths in found.items():
+        for path in paths:
+            print(path)
+    print(f"{len(found['drawings'])} drawings, {len(found['parts'])} parts, {len(found['assemblies'])} assemblies",
+          file=sys.stderr)
+
+    if args.add_to:
+        try:
+            settings = load_settings_file(args.add_to) if os.path.exists(args.add_to) else {}
+        except (OSError, ValueError) as e:
+            print(f"Cannot read settings file {args.add_to}: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        settings.setdefault("drawings", [])
+        settings.setdefault("parts", [])
+        known = set(drawing_paths(settings)) | set(part_paths(settings))
+        for path in found["drawings"]:
+            if path not in known:
+                settings["drawings"].append([os.path.basename(path), path])
+        for path in found["parts"] + found["assemblies"]:
+            if path not in known:
+                settings["parts"].append([os.path.basename(path), path])
+        save_settings_file(args.add_to, settings)
+    return EXIT_OK
+
+
+def run_watch(args):
+    try:
+        settings = load_settings_file(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read settings file {args.config}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not settings["source_folders"]:
+        print(f"No source_folders to watch in {args.config}", file=sys.stderr)
+        return EXIT_USAGE
+    if settings["rebuild"] not in REBUILD_POLICIES:
+        print(f"Unknown rebuild policy {settings['rebuild']!r} in {args.config}", file=sys.stderr)
+        return EXIT_USAGE
+
+    graph_path = default_graph_path(args.config)
+
+    def export_changes(paths):
+        drawings = [path for path in paths if path.lower().endswith(".slddrw")]
+        parts = [path for path in paths if not path.lower().endswith(".slddrw")]
+        # With a reference graph from an earlier export --affected, a saved model also
+        # re-exports the listed drawings and assemblies that use it
+        graph = ReferenceGraph(graph_path) if os.path.exists(graph_path) else None
+        dependents = []
+        if graph:
+            # Also gives new documents a node and re-reads the references of changed ones
+            try:
+                changed = update_graph(graph, paths)
+            except Exception as e:
+                print(f"Cannot update the reference graph: {e}", file=sys.stderr)
+                changed = paths
+            scanned_drawings, scanned_parts = scan_source_folders(settings)
+            dependents = [path for path in graph.affected(changed, drawing_paths(settings) + scanned_drawings
+                                                          + part_paths(settings) + scanned_parts)
+                          if path not in paths]
+            drawings = list(dict.fromkeys(drawings + [path for path in dependents
+                                                      if path.lower().endswith(".slddrw")]))
+            parts = list(dict.fromkeys(parts + [path for path in dependents
+                                                if not path.lower().endswith(".slddrw")]))
+        reports = []
+        try:
+            # Incremental, so a save that did not change the content is skipped; drawings found
+            # through the graph are forced since their own file did not change
+            for options, batch in drawing_option_sets(settings, drawings):
+                reports.append(export_DRW_Solidworks(
+                    batch, settings["dwg_folder"], settings["pdf_folder"],
+                    options["flag_export_dwg"], options["flag_export_pdf"],
+                    options["export_pdf"], options["export_dwg"],
+                    workers=settings["workers"], incremental=True, force_paths=dependents,
+                    rebuild=settings["rebuild"], recycle=settings["recycle"], timeouts=settings["timeouts"],
+                    retry=settings["retry"], priorities=drawing_priorities(settings),
+                    locality=settings["locality"], references=graph.known_references(batch) if graph else None,
+                    # A release of only the drawings just saved would replace the full one
+                    verify=settings["verify"],
+                    merge={**settings["merge"], "release": None} if settings["merge"] else None))
+                print_report("Drawings", reports[-1])
+            if parts and settings["step_folder"]:
+                reports.append(export_STEP_Solidworks(parts, settings["step_folder"],
+                                                      selected_configs=part_configurations(settings),
+                                                      workers=settings["workers"], incremental=True,
+                                                      force_paths=dependents, recycle=settings["recycle"],
+                                                      timeouts=settings["timeouts"], retry=settings["retry"],
+                                                      heavy=settings["heavy_assemblies"], verify=settings["verify"]))
+                print_report("STEP", reports[-1])
+        except Exception as e:
+            print(f"Export aborted: {e}", file=sys.stderr)
+        finally:
+            if graph:
+                graph.record_run(drawings + parts, reports)
+                graph.save()
+
+    try:
+        watch(settings["source_folders"], export_changes, settings["include"], settings["exclude"],
+              interval=args.interval, debounce=args.debounce, native=not args.polling)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "export":
+        return run_export(args)
+    if args.command == "journal":
+        return run_journal(args)
+    if args.command == "scan":
+        return run_scan(args)
+    if args.command == "watch":
+        return run_watch(args)
+    if args.command == "bench":
+        return run_bench(args)
+    return EXIT_USAGE
@@ -0,0 +1,178 @@
+"""Finding SolidWorks documents on disk.
+
+scan_documents walks a project tree once with os.scandir and sorts the
+drawings, parts and assemblies it finds. With an index file it remembers the
+listing of every directory: the next scan only stats the directories and
+re-lists those whose mtime changed (a file was added, removed or renamed),
+which keeps rescans of large vaults fast.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import time
+
+# Extension -> key of the scan_documents result
+DOCUMENT_KINDS = {
+    ".slddrw": "drawings",
+    ".sldprt": "parts",
+    ".sldasm": "assemblies",
+}
+
+INDEX_VERSION = 1
+
+# A directory modified this recently may still change within the same mtime tick; list it again next time
+_SETTLE_SECONDS = 2.0
+
+
+def list_slddrw_files(folder_path):
+    """Lists all SLDDRW files in the given folder."""
+    slddrw_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.slddrw')]
+    return slddrw_files
+
+def list_sldprt_files(folder_path):
+    """Lists all SLDPRT files in the given folder."""
+    sldprt_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.sldprt')]
+    return sldprt_files
+
+
+def default_index_path(root):
+    """Index location for a project root, in the user's home so read-only vaults can be scanned too."""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.expanduser("~"), ".solidworks_exporter", f"index-{digest}.json")
+
+
+def compile_globs(patterns):
+    """One regex for a list of globs, or None when the list is empty."""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(os.path.normcase(pattern)) for pattern in patterns))
+
+
+def match_globs(relative_path, name, pattern):
+    return bool(pattern) and bool(pattern.match(os.path.normcase(relative_path)) or pattern.match(os.path.normcase(name)))
+
+
+def _list_directory(path):
+    """Returns (subdirectory names, {document name: [size, mtime]}) of one directory."""
+    subdirs, files = [], {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif os.path.splitext(entry.name)[1].lower() in DOCUMENT_KINDS and not entry.name.startswith("~$"):
+                    # ~$ files are SolidWorks lock files of open documents
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_size, stat.st_mtime]
+            except OSError:
+                continue
+    return subdirs, files
+
+
+def _load_index(index_path, root):
+    try:
+        with open(index_path, "r") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != INDEX_VERSION or data.get("root") != root:
+        return {}
+    return data.get("directories", {})
+
+
+def _save_index(index_path, root, directories):
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "w") as file:
+        # dumps uses the C encoder, much faster than dump on large indexes
+        file.write(json.dumps({"version": INDEX_VERSION, "root": root, "directories": directories}))
+    os.replace(temp_path, index_path)
+
+
+def scan_documents(root, include=None, exclude=None, index_path=None):
+    """Finds the SolidWorks documents under root; returns {"drawings": [...], "parts": [...], "assemblies": [...]}.
+
+    include and exclude are glob patterns matched against the path relative
+    to root (with forward slashes) and against the bare name. A document is
+    kept if it matches an include pattern (any, when include is empty) and no
+    exclude pattern; excluded directories are not entered at all.
+    index_path, if given, is read and rewritten to speed up the next scan.
+    Paths are returned sorted.
+    """
+    root = os.path.abspath(root)
+    include = compile_globs(include)
+    exclude = compile_globs(exclude)
+    index = _load_index(index_path, root) if index_path else {}
+    changed = False
+
+    found = {kind: [] for kind in DOCUMENT_KINDS.values()}
+    directories = {}
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        path = os.path.join(root, relative_dir.replace("/", os.sep)) if relative_dir else root
+        try:
+            mtime = os.stat(path).st_mtime
+            cached = index.get(relative_dir)
+            if cached and cached["mtime"] == mtime:
+                subdirs, files = cached["dirs"], cached["files"]
+            else:
+                subdirs, files = _list_directory(path)
+                changed = True
+        except OSError as e:
+            print(f"Cannot scan {path}: {e}")
+            continue
+        trusted_mtime = mtime if time.time() - mtime > _SETTLE_SECONDS else None
+        directories[relative_dir] = {"mtime": trusted_mtime, "dirs": subdirs, "files": files}
+
+        for name in subdirs:
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            if not match_globs(relative_path, name, exclude):
+                stack.append(relative_path)
+        for name in files:
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            if include and not match_globs(relative_path, name, include):
+                continue
+            if match_globs(relative_path, name, exclude):
+                continue
+            found[DOCUMENT_KINDS[os.path.splitext(name)[1].lower()]].append(os.path.join(path, name))
+
+    # Directories that disappeared or were excluded also change the index
+    if index_path and (changed or directories.keys() != index.keys()):
+        try:
+            _save_index(index_path, root, directories)
+        except OSError as e:
+            print(f"Cannot save the document index {index_path}: {e}")
+    return {kind: sorted(paths) for kind, paths in found.items()}
+
+
+def iter_documents(root, include=None, exclude=None):
+    """Yields (path, size, mtime) for every document under root, listing each directory afresh.
+
+    Same filtering as scan_documents, without the index: used where in-place
+    modifications matter (e.g. watching for saves).
+    """
+    include = compile_globs(include)
+    exclude = compile_globs(exclude)
+    root = os.path.abspath(root)
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        path = os.path.join(root, relative_dir.replace("/", os.sep)) if relative_dir else root
+        try:
+            subdirs, files = _list_directory(path)
+        except OSError:
+            continue
+        for name in subdirs:
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            if not match_globs(relative_path, name, exclude):
+                stack.append(relative_path)
+        for name, (size, mtime) in files.items():
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            if include and not match_globs(relative_path, name, include):
+                continue
+            if match_globs(relative_path, name, exclude):
+                continue
+            yield os.path.join(path, name), size, mtime
@@ -0,0 +1,144 @@
+"""Instrumentation hooks: structured start/end events for every export stage.
+
+Listeners are plain callables registered with add_listener; each receives one
+dict per event:
+
+    {"event": "stage_start", "stage": "save_pdf", "time": ..., "path": ..., "sheet": ..., ...}
+    {"event": "stage_end", ..., "seconds": 0.21, "ok": True, "errors": 0, "warnings": 0, "error": None}
+
+Once a drawing is open its sheet count is sent as
+
+    {"event": "sheets", "path": ..., "count": 12, "time": ...}
+
+Stages nest (a "document" stage contains "open", "rebuild", "save_pdf", ...)
+and inner stages inherit the path, sheet and config of the enclosing ones.
+errors and warnings are the backend's last swFileLoadError_e /
+swFileLoadWarning_e codes (set by OpenDoc6 and Extension.SaveAs), or those
+carried by the BackendError the stage raised.
+
+With no listener attached stage() returns a shared no-op object, so the
+instrumented export code costs one list check per stage.
+"""
+import json
+import threading
+import time
+
+_listeners = []
+_local = threading.local()
+
+# Fields inner stages take over from the stage they are nested in
+_INHERITED = ("path", "sheet", "config")
+
+
+def add_listener(listener):
+    _listeners.append(listener)
+    return listener
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def has_listeners():
+    return bool(_listeners)
+
+
+def emit(event, **fields):
+    """Sends one event to every listener."""
+    if not _listeners:
+        return
+    fields["event"] = event
+    fields.setdefault("time", time.time())
+    dispatch(fields)
+
+
+def dispatch(record):
+    """Sends an already built event record (e.g. one forwarded from a worker process)."""
+    for listener in list(_listeners):
+        try:
+            listener(record)
+        except Exception as e:
+            print(f"Event listener failed: {e}")
+
+
+class _NoStage:
+    """Stand-in for _Stage when nobody is listening."""
+
+    ok = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    def __init__(self, name, backend, fields):
+        self.name = name
+        self.backend = backend
+        self.fields = fields
+        # Set to False when the call reports failure without raising (e.g. a save returning False)
+        self.ok = True
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if stack:
+            for key in _INHERITED:
+                if key in stack[-1].fields:
+                    self.fields.setdefault(key, stack[-1].fields[key])
+        stack.append(self)
+        self.start = time.perf_counter()
+        emit("stage_start", stage=self.name, **self.fields)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _local.stack.pop()
+        errors = getattr(self.backend, "last_errors", 0)
+        warnings = getattr(self.backend, "last_warnings", 0)
+        if exc is not None:
+            errors = getattr(exc, "errors", errors)
+            warnings = getattr(exc, "warnings", warnings)
+        emit("stage_end", stage=self.name, seconds=seconds, ok=exc is None and bool(self.ok),
+             errors=errors, warnings=warnings, hresult=getattr(exc, "hresult", None),
+             error=str(exc) if exc is not None else None, **self.fields)
+        return False
+
+
+def stage(name, backend=None, **fields):
+    """Context manager timing one stage; emits stage_start and stage_end.
+
+    backend, if given, is read for last_errors/last_warnings when the stage
+    ends. Exceptions are recorded and propagate unchanged.
+    """
+    if not _listeners:
+        return _NO_STAGE
+    return _Stage(name, backend, fields)
+
+
+class JsonLinesListener:
+    """Appends every event to a JSON-lines file; safe to share between threads."""
+
+    def __init__(self, path):
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,777 @@
+"""SolidWorks drawing and model export functions.
+
+All CAD calls go through a backend (see backends.py), so the same functions
+drive SolidWorks over COM or the simulated backend.
+"""
+import fnmatch
+import functools
+import os
+import re
+import time
+
+from . import events
+from .backends import DOC_ASSEMBLY, DOC_DRAWING, DOC_PART, EXPORT_CURRENT_SHEET, EXPORT_PDF, SolidWorksBackend
+from .failures import (
+    classify_call,
+    classify_exception,
+    document_failure,
+    retry_delay,
+    retry_policy,
+    should_retry,
+)
+from .locality import ResidentModels, group_by_models, list_references, single_groups
+from .manifest import ExportManifest, default_manifest_path
+from .merge import PdfMerge, merging_enabled
+from .recycle import RecyclingApplication, recycling_enabled
+from .schedule import CostModel, default_costs_path, schedule
+from .timeouts import Watchdog, mark_timed_out, timeouts_enabled
+from .report import make_report
+from .verify import OutputVerifier
+
+# When drawings are rebuilt (ForceRebuild3) before exporting:
+# always, only when the drawing or a referenced model changed since its last export, or never
+REBUILD_POLICIES = ("always", "when_needed", "never")
+
+# Assemblies at least size_mb large count as heavy; at most max_concurrent of them
+# are exported at once by a STEP pool (0: no cap)
+HEAVY_DEFAULTS = {
+    "size_mb": 100,
+    "max_concurrent": 0,
+}
+
+def open_and_rebuild_drawing(backend, drawing_path, rebuild=True):
+    try:
+        return _open_and_rebuild(backend, drawing_path, rebuild)
+    except Exception as e:
+        print(f"An error occurred while opening and rebuilding the drawing: {e}")
+        return None
+
+
+def _open_and_rebuild(backend, drawing_path, rebuild):
+    # Open the drawing file
+    with events.stage("open", backend, path=drawing_path):
+        drawing = backend.open_doc(drawing_path, DOC_DRAWING)
+
+    # Rebuild/Refresh the drawing
+    if rebuild:
+        try:
+            with events.stage("rebuild", backend, path=drawing_path):
+                backend.force_rebuild(drawing)
+        except Exception:
+            # Do not leave the drawing open: a retry would open a second copy
+            try:
+                backend.close_doc(drawing)
+            except Exception as e:
+                print(f"Could not close the drawing after the failed rebuild: {e}")
+            raise
+
+    return drawing
+
+# SolidWorks Interaction - Export to PDF
+def export_drawing_to_pdf(backend, drawing, pdf_export_path, export_individual_sheets=False):
+    """Exports the drawing to PDF and returns the lists of exported and failed paths."""
+    return export_drawing_outputs(backend, drawing, pdf_export_path=pdf_export_path,
+                                  individual_sheets_pdf=export_individual_sheets)
+
+# SolidWorks Interaction - Export to DWG
+def export_drawing_to_dwg(backend, drawing, dwg_export_path, export_individual_sheets=False):
+    """Exports the drawing to DWG and returns the lists of exported and failed paths."""
+    return export_drawing_outputs(backend, drawing, dwg_export_path=dwg_export_path,
+                                  individual_sheets_dwg=export_individual_sheets)
+
+
+def export_drawing_outputs(backend, drawing, pdf_export_path=None, dwg_export_path=None,
+                           individual_sheets_pdf=False, individual_sheets_dwg=False, failures=None,
+                           sheet_names=None, verifier=None):
+    """Exports an open drawing to PDF and/or DWG in one pass; returns the lists of exported and failed paths.
+
+    A format is skipped when its path is None. Whole-drawing files are saved
+    first; then every sheet is activated once and all per-sheet files are
+    saved from that activation, reusing one PDF export-data object.
+    failures, if given, is a list that receives the failure class (see
+    failures.py) of every failed output. sheet_names saves asking the
+    drawing again when the caller already did. verifier, an OutputVerifier
+    of verify.py, is handed every exported path as soon as it is saved.
+    """
+    exported, failed = [], []
+    if failures is None:
+        failures = []
+
+    # Whole-drawing outputs, no sheet activation needed
+    if pdf_export_path and not individual_sheets_pdf:
+        _save_combined(backend, drawing, "PDF", pdf_export_path, exported, failed, failures, verifier)
+    if dwg_export_path and not individual_sheets_dwg:
+        _save_combined(backend, drawing, "DWG", dwg_export_path, exported, failed, failures, verifier)
+
+    # (format, export path) of the outputs written once per sheet
+    per_sheet = [(file_format, path) for file_format, path, individual in
+                 (("PDF", pdf_export_path, individual_sheets_pdf), ("DWG", dwg_export_path, individual_sheets_dwg))
+                 if path and individual]
+    if not per_sheet:
+        return exported, failed
+
+    try:
+        if sheet_names is None:
+            sheet_names = backend.get_sheet_names(drawing)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        failed += [path for _, path in per_sheet]
+        failures += [classify_exception(e)] * len(per_sheet)
+        return exported, failed
+
+    export_pdf_data = None
+    for index, sheet_name in enumerate(sheet_names, start=1):
+        sheet_paths = [(file_format, _sheet_path(path, index, file_format)) for file_format, path in per_sheet]
+        try:
+            # Activate individual sheet, once for all formats
+            with events.stage("activate_sheet", backend, sheet=sheet_name):
+                backend.activate_sheet(drawing, sheet_name)
+        except Exception as e:
+            print(f"An error occurred while activating sheet {sheet_name}: {e}")
+            failed += [path for _, path in sheet_paths]
+            failures += [classify_exception(e)] * len(sheet_paths)
+            continue
+
+        for file_format, sheet_export_path in sheet_paths:
+            try:
+                if file_format == "PDF":
+                    # Save individual sheet as PDF
+                    with events.stage("export_data", backend, sheet=sheet_name):
+                        if export_pdf_data is None:
+                            export_pdf_data = backend.get_export_data(EXPORT_PDF)
+                        backend.set_export_sheets(export_pdf_data, EXPORT_CURRENT_SHEET, [sheet_name])
+                    with events.stage("save_pdf", backend, sheet=sheet_name, output=sheet_export_path) as stage:
+                        success = stage.ok = backend.extension_save_as(drawing, sheet_export_path, export_pdf_data)
+                else:
+                    # Save individual sheet as DWG using SaveAs3
+                    with events.stage("save_dwg", backend, sheet=sheet_name, output=sheet_export_path) as stage:
+                        success = stage.ok = backend.save_as(drawing, sheet_export_path, 2)  # 2 = Save only the active sheet
+                failure = classify_call(backend)
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                success = False
+                failure = classify_exception(e)
+            if not success:
+                print(f"Failed to save sheet {sheet_name} as {file_format}.")
+                failed.append(sheet_export_path)
+                failures.append(failure)
+            else:
+                print(f"Exported sheet {sheet_name} as {file_format}: {sheet_export_path}")
+                exported.append(sheet_export_path)
+                if verifier:
+                    verifier.submit(sheet_export_path)
+    return exported, failed
+
+
+def _sheet_path(export_path, index, file_format):
+    file_name = os.path.splitext(os.path.basename(export_path))[0]
+    return os.path.join(os.path.dirname(export_path), f"{file_name}_sheet{index}.{file_format.lower()}")
+
+
+def _save_combined(backend, drawing, file_format, export_path, exported, failed, failures, verifier=None):
+    # Save as PDF/DWG (including all sheets if present)
+    try:
+        with events.stage("save_" + file_format.lower(), backend, output=export_path) as stage:
+            success = stage.ok = backend.save_as(drawing, export_path, 1)
+        failure = classify_call(backend)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        success = False
+        failure = classify_exception(e)
+    if not success:
+        print(f"Failed to save the drawing as {file_format}.")
+        failed.append(export_path)
+        failures.append(failure)
+    else:
+        print(f"Exported {file_format}: {export_path}")
+        exported.append(export_path)
+        if verifier:
+            verifier.submit(export_path)
+
+
+def rename_dwg_files(dwg_folder, file_name):
+    try:
+        # List all DWG files in the folder
+        dwg_files = [f for f in os.listdir(dwg_folder) if f.lower().endswith('.dwg')]
+        pattern = re.compile(r"^(\d{2})_" + re.escape(file_name) + r"\.dwg$")
+
+        # Filter files matching the pattern like '00_filename.dwg', '01_filename.dwg', etc.
+        matching_files = [f for f in dwg_files if pattern.match(f)]
+
+        # Rename each file to include the sheet number in a readable format
+        for dwg_file in matching_files:
+            sheet_index = int(pattern.match(dwg_file).group(1)) + 1
+            new_file_name = f"{file_name}_sheet{sheet_index}.dwg"
+            old_file_path = os.path.join(dwg_folder, dwg_file)
+            new_file_path = os.path.join(dwg_folder, new_file_name)
+            os.rename(old_file_path, new_file_path)
+            print(f"Renamed {dwg_file} to {new_file_name}")
+    except Exception as e:
+        print(f"An error occurred while renaming DWG files: {e}")
+
+# New function to open a part or assembly and export it as STEP
+def export_part_or_assembly_configurations_to_step(backend, part_path, export_folder, selected_configs=None,
+                                                   failures=None, timings=None, verifier=None):
+    """Exports each configuration to STEP and returns the lists of exported and failed paths.
+
+    selected_configs lists the configurations to export, as names or glob
+    patterns ("*-FLAT"); all of them by default.
+    failures, if given, receives the failure class of every failed output,
+    and timings the seconds each configuration took, by name. verifier gets
+    every exported path (see export_drawing_outputs).
+    """
+    exported, failed = [], []
+    if failures is None:
+        failures = []
+    if timings is None:
+        timings = {}
+    try:
+        # Open the part or assembly file
+        doc_type = DOC_PART if part_path.upper().endswith('.SLDPRT') else DOC_ASSEMBLY
+        with events.stage("open", backend, path=part_path):
+            model = backend.open_doc(part_path, doc_type)
+
+        # Get the configuration names
+        configs = backend.get_configuration_names(model)
+        for config_name in configs:
+            # If selected_configs is provided, only export those configurations
+            if selected_configs and not _config_selected(config_name, selected_configs):
+                continue
+            config_start = time.perf_counter()
+            # Activate each configuration
+            with events.stage("configuration", backend, path=part_path, config=config_name):
+                backend.show_configuration(model, config_name)
+
+            # Define the export path for each configuration
+            step_export_path = os.path.join(export_folder, f"{os.path.splitext(os.path.basename(part_path))[0]}_{config_name}.step")
+
+            # Save as STEP
+            with events.stage("save_step", backend, path=part_path, config=config_name,
+                              output=step_export_path) as stage:
+                success_step = stage.ok = backend.save_model_as(model, step_export_path)
+            if not success_step:
+                print(f"Failed to save configuration '{config_name}' as STEP: {part_path}")
+                failed.append(step_export_path)
+                failures.append(classify_call(backend))
+            else:
+                print(f"Exported configuration '{config_name}' as STEP: {step_export_path}")
+                exported.append(step_export_path)
+                if verifier:
+                    verifier.submit(step_export_path)
+            timings[config_name] = time.perf_counter() - config_start
+
+        # Close the part or assembly
+        with events.stage("close", backend, path=part_path):
+            backend.close_doc(model)
+    except Exception as e:
+        print(f"An error occurred while exporting part/assembly configurations to STEP: {e}")
+        failed.append(part_path)
+        failures.append(classify_exception(e))
+    return exported, failed
+
+
+def _config_selected(config_name, selected_configs):
+    return any(fnmatch.fnmatchcase(config_name, pattern) for pattern in selected_configs)
+
+
+def export_part(backend, part_path, options):
+    """Exports the configurations of one part or assembly to STEP; returns its result record.
+
+    options holds export_folder_step, selected_configs (part path ->
+    configuration filters) and verify of export_STEP_Solidworks. The result
+    lists the seconds every configuration took under "configurations".
+    """
+    part_start = time.perf_counter()
+    failures = []
+    timings = {}
+    verifier = OutputVerifier() if options.get("verify", True) else None
+    with events.stage("document", backend, path=part_path) as stage:
+        exported, failed = export_part_or_assembly_configurations_to_step(
+            backend, part_path, options["export_folder_step"], options["selected_configs"].get(part_path),
+            failures, timings, verifier)
+        result = {"part": part_path, "outputs": exported, "failed": failed, "configurations": timings}
+        if verifier:
+            with events.stage("verify", backend, path=part_path):
+                verifier.apply(result, failures)
+        ok = stage.ok = bool(result["outputs"]) and not failed
+    result.update({"ok": ok, "error": None if ok else "STEP export failed",
+                   "elapsed": time.perf_counter() - part_start})
+    if not result["ok"]:
+        result["failure"] = document_failure(failures)
+    return result
+
+
+def export_drawing(backend, drawing_path, options):
+    """Opens, rebuilds and exports one drawing; returns its result record.
+
+    options holds the export_DRW_Solidworks arguments (folders, format flags
+    and individual sheet flags) keyed by their parameter names, plus the
+    rebuild policy and, for "when_needed", the skip_rebuild set of drawings
+    known to be unchanged. With options["verify"] (the default) the outputs
+    are checked as they are saved, see verify.py.
+    The whole drawing is reported as a "document" stage (see events.py).
+    """
+    with events.stage("document", backend, path=drawing_path) as stage:
+        result = _export_drawing(backend, drawing_path, options)
+        stage.ok = result["ok"]
+    return result
+
+
+def _export_drawing(backend, drawing_path, options):
+    start = time.perf_counter()
+    result = {"drawing": drawing_path, "ok": False, "outputs": [], "failed": [], "error": None}
+
+    # Ensure export folder exists
+    if options["flag_export_dwg"]:
+        os.makedirs(options["export_folder_dwg"], exist_ok=True)
+    if options["flag_export_pdf"]:
+        os.makedirs(options["export_folder_pdf"], exist_ok=True)
+
+    # Open and rebuild the drawing
+    policy = options.get("rebuild", "always")
+    rebuild = policy == "always" or (policy == "when_needed" and drawing_path not in options.get("skip_rebuild", ()))
+    try:
+        drawing = _open_and_rebuild(backend, drawing_path, rebuild)
+    except Exception as e:
+        print(f"An error occurred while opening and rebuilding the drawing: {e}")
+        result["error"] = f"could not open the drawing: {e}"
+        result["failure"] = classify_exception(e)
+        result["elapsed"] = time.perf_counter() - start
+        return result
+    result["rebuilt"] = rebuild
+    if policy == "when_needed":
+        result["dependencies"] = _dependency_mtimes(backend, drawing_path)
+
+    # Sheet count, for progress weighted by sheets (see the "sheets" event in events.py)
+    try:
+        sheet_names = backend.get_sheet_names(drawing)
+        result["sheets"] = len(sheet_names)
+        # Bookmark titles of the merged PDFs (see merge.py)
+        result["sheet_names"] = list(sheet_names)
+        events.emit("sheets", path=drawing_path, count=len(sheet_names))
+    except Exception as e:
+        print(f"Cannot list the sheets of {drawing_path}: {e}")
+        sheet_names = None
+
+    # Export file paths
+    file_name = os.path.splitext(os.path.basename(drawing_path))[0]
+    pdf_export_path = os.path.join(options["export_folder_pdf"], file_name + '.pdf')
+    dwg_export_path = os.path.join(options["export_folder_dwg"], file_name + '.dwg')
+
+    # Export the drawing to DWG and PDF in a single pass over the sheets, checking the files meanwhile
+    failures = []
+    verifier = OutputVerifier() if options.get("verify", True) else None
+    try:
+        result["outputs"], result["failed"] = export_drawing_outputs(
+            backend, drawing,
+            pdf_export_path=pdf_export_path if options["flag_export_pdf"] else None,
+            dwg_export_path=dwg_export_path if options["flag_export_dwg"] else None,
+            individual_sheets_pdf=options["export_individual_sheets_pdf"],
+            individual_sheets_dwg=options["export_individual_sheets_dwg"], failures=failures,
+            sheet_names=sheet_names, verifier=verifier)
+    finally:
+        # Close the drawing
+        with events.stage("close", backend):
+            backend.close_doc(drawing)
+    if verifier:
+        with events.stage("verify", backend, path=drawing_path):
+            verifier.apply(result, failures)
+
+    result["ok"] = not result["failed"]
+    if result["failed"]:
+        result["error"] = f"{len(result['failed'])} output(s) failed"
+        result["failure"] = document_failure(failures)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def _dependency_mtimes(backend, drawing_path):
+    """Maps every model the drawing references to its mtime; None if the references cannot be listed."""
+    try:
+        with events.stage("dependencies", backend, path=drawing_path):
+            dependencies = backend.document_dependencies(drawing_path)
+        return {path: os.stat(path).st_mtime for path in dependencies}
+    except Exception as e:
+        print(f"Cannot list the references of {drawing_path}: {e}")
+        return None
+
+
+def export_DRW_Solidworks(drawings_list, export_folder_dwg, export_folder_pdf,
+                          flag_export_dwg, flag_export_pdf,
+                          export_individual_sheets_pdf, export_individual_sheets_dwg,
+                          workers=1, backend_factory=None, progress_callback=None, max_retries=1,
+                          cancel_event=None, incremental=False, force=False, manifest_path=None,
+                          rebuild="always", recycle=None, timeouts=None, retry=None, priorities=None,
+                          costs=None, locality=False, references=None, verify=True, merge=None, force_paths=None):
+    """Exports the drawings and returns the run report.
+
+    With workers > 1 the drawings are shared between that many worker
+    processes, each driving its own CAD application from backend_factory
+    (by default SolidWorks; see backends.py).
+    progress_callback is called with each drawing's result as it finishes.
+    Setting cancel_event stops the export after the current drawing.
+
+    In incremental mode drawings whose outputs are up to date according to
+    the export manifest are skipped; force exports them anyway (and still
+    refreshes the manifest), force_paths only the drawings it lists (e.g.
+    those showing a changed model).
+
+    rebuild is one of REBUILD_POLICIES. "when_needed" skips ForceRebuild3
+    for drawings that, like every model they reference, are unchanged since
+    their last export recorded in the manifest.
+
+    recycle is the application recycle policy (see recycle.py): restart
+    every CAD application after so many documents, above a memory
+    threshold or after a hung document. By default nothing is restarted.
+    timeouts maps stage names to the seconds they may take (see
+    timeouts.py); a document with a stage running longer is reported as
+    timed out and its application killed and restarted.
+    retry is the retry policy (see failures.py): failed drawings whose
+    failure class it lists are retried up to max_retries times, with
+    backoff. By default only transient COM failures are retried.
+
+    Drawings are exported in the order of schedule.py: by priority (a dict
+    of path -> number, higher first; 0 by default), then by the cost
+    estimated from earlier runs, longest first when there are several
+    workers. costs is the CostModel to use and update; by default the one
+    in the user's home.
+
+    With locality (see locality.py) drawings referencing the same models
+    are exported together while those models stay open. references maps
+    drawings to the models they reference directly (e.g. from the
+    reference graph); drawings missing from it are asked from a backend.
+
+    With verify every output is checked while the export goes on (see
+    verify.py); a drawing with an empty or truncated file fails as
+    "corrupt", which the default retry policy retries.
+
+    merge is the PDF merge policy (see merge.py): with individual PDF
+    sheets, a background process merges the sheets of every drawing as it
+    is done into one PDF per drawing and, optionally, one release PDF. The
+    report has its summary under "merge".
+    """
+    if rebuild not in REBUILD_POLICIES:
+        raise ValueError(f"Unknown rebuild policy {rebuild!r}, expected one of {', '.join(REBUILD_POLICIES)}")
+    options = {
+        "export_folder_dwg": export_folder_dwg,
+        "export_folder_pdf": export_folder_pdf,
+        "flag_export_dwg": flag_export_dwg,
+        "flag_export_pdf": flag_export_pdf,
+        "export_individual_sheets_pdf": export_individual_sheets_pdf,
+        "export_individual_sheets_dwg": export_individual_sheets_dwg,
+        "rebuild": rebuild,
+        "verify": verify,
+        "recycle": recycle,
+        "timeouts": timeouts,
+        "retry": retry_policy(retry, max_retries),
+    }
+
+    manifest = None
+    if incremental or force or rebuild == "when_needed":
+        output_folders = [folder for folder, enabled in ((export_folder_pdf, flag_export_pdf),
+                                                         (export_folder_dwg, flag_export_dwg)) if enabled]
+        manifest = ExportManifest(manifest_path or default_manifest_path(*output_folders))
+
+    forced = set(force_paths or ())
+    skipped = []
+    to_export = []
+    for drawing_path in drawings_list:
+        if (incremental and not force and drawing_path not in forced
+                and manifest.is_up_to_date(drawing_path, options)):
+            print(f"Up to date, skipped: {drawing_path}")
+            skipped.append({"drawing": drawing_path, "ok": True, "skipped": True,
+                            "outputs": manifest.outputs(drawing_path), "failed": [], "error": None,
+                            "attempts": 0, "elapsed": 0.0})
+        else:
+            to_export.append(drawing_path)
+    pdf_merge = None
+    if merging_enabled(merge):
+        if flag_export_pdf and export_individual_sheets_pdf:
+            pdf_merge = PdfMerge(merge, export_folder_pdf, drawings_list).start()
+        else:
+            print("Merging PDFs needs individual PDF sheets, nothing is merged")
+    for result in skipped:
+        if pdf_merge:
+            pdf_merge.add(result)
+        if progress_callback:
+            progress_callback(result)
+    if rebuild == "when_needed":
+        options["skip_rebuild"] = {path for path in to_export if not manifest.needs_rebuild(path)}
+    if costs is None:
+        costs = CostModel(default_costs_path())
+    to_export = schedule(to_export, costs, priorities, workers)
+    if locality:
+        references = dict(references or {})
+        unknown = [path for path in to_export if path not in references]
+        if unknown:
+            references.update(_list_references(unknown, backend_factory))
+        groups = group_by_models(to_export, references, priorities)
+    else:
+        groups = single_groups(to_export)
+
+    def drawing_done(result):
+        if manifest:
+            if result["ok"]:
+                manifest.record(result["drawing"], options, result["outputs"], result.get("dependencies"))
+            else:
+                manifest.forget(result["drawing"])
+        if pdf_merge:
+            pdf_merge.add(result)
+        if progress_callback:
+            progress_callback(result)
+
+    merged = None
+    try:
+        if not to_export:
+            report = make_report([], 0.0, workers=workers)
+        elif workers > 1:
+            from .pool import export_pool
+            report = export_pool(to_export, options, workers, backend_factory=backend_factory,
+                                 progress_callback=drawing_done, max_retries=max_retries,
+                                 cancel_event=cancel_event, groups=groups)
+        else:
+            report = _export_serial(groups, options, backend_factory, drawing_done, cancel_event)
+    finally:
+        if manifest:
+            manifest.save()
+        if pdf_merge:
+            merged = pdf_merge.close()
+
+    costs.record_results(report["results"])
+    try:
+        costs.save()
+    except OSError as e:
+        print(f"Cannot save the cost model {costs.path}: {e}")
+
+    report = make_report(skipped + report["results"], report["elapsed"], workers=report["workers"],
+                         cancelled=report["cancelled"], rebuild=rebuild, recycles=report["recycles"])
+    report["merge"] = merged
+    return report
+
+
+def _list_references(drawings, backend_factory):
+    """list_references with a backend of its own; {} if none can be started."""
+    try:
+        backend = (backend_factory or SolidWorksBackend)()
+    except Exception as e:
+        print(f"Cannot list the references of the drawings: {e}")
+        return {}
+    try:
+        return list_references(backend, drawings)
+    finally:
+        backend.exit_app()
+
+
+class _SerialApplication:
+    """The CAD application of a serial run, restarted by the recycle policy and watched for timeouts.
+
+    Failed documents are retried according to the retry policy.
+    """
+
+    def __init__(self, backend_factory, recycle, timeouts, retry):
+        self.retry = retry
+        self.own_instance = recycling_enabled(recycle) or timeouts_enabled(timeouts)
+        if backend_factory is None:
+            # The SolidWorks the user works in can be neither restarted nor killed: use an instance of our own
+            if self.own_instance:
+                backend_factory = functools.partial(SolidWorksBackend, new_instance=True)
+            else:
+                backend_factory = SolidWorksBackend
+        self.application = RecyclingApplication(backend_factory, recycle)
+        self.watchdog = None
+        if timeouts_enabled(timeouts):
+            self.watchdog = Watchdog(timeouts, lambda stage, limit: self.application.backend.kill()).start()
+
+    def export(self, path, key, export):
+        """Runs export(backend) for the document path; returns its result, keyed by key ("drawing" or "part")."""
+        def attempt(backend):
+            try:
+                result = export(backend)
+            except Exception as e:
+                print(f"An error occurred while exporting {path}: {e}")
+                result = {key: path, "ok": False, "outputs": [], "failed": [], "error": str(e),
+                          "failure": classify_exception(e)}
+            expired = self.watchdog.take_expired() if self.watchdog else None
+            if expired:
+                mark_timed_out(result, *expired)
+            return result
+
+        retried = []
+        # A run that restarted the application and exported the document again was two attempts
+        attempts = 0
+        while True:
+            result = self.application.run(path, attempt)
+            attempts += 2 if result.get("requeued") else 1
+            if not should_retry(result, len(retried) + 1, self.retry):
+                break
+            retried.append(result["failure"])
+            delay = retry_delay(self.retry, len(retried))
+            print(f"Retrying {path} in {delay:g} s ({result['failure']}): {result['error']}")
+            time.sleep(delay)
+        result["attempts"] = attempts
+        if retried:
+            result["retried"] = retried
+        return result
+
+    def close(self):
+        if self.watchdog:
+            self.watchdog.stop()
+        if self.own_instance:
+            self.application.close()
+
+
+def _export_serial(groups, options, backend_factory, progress_callback, cancel_event):
+    """Exports the (drawings, models) groups of locality.py in order, keeping each group's models open."""
+    # Connect to SolidWorks
+    application = _SerialApplication(backend_factory, options.get("recycle"), options.get("timeouts"),
+                                     options.get("retry") or retry_policy())
+    resident = ResidentModels()
+
+    def export(backend, drawing_path, models):
+        resident.keep(backend, models)
+        return export_drawing(backend, drawing_path, options)
+
+    total = sum(len(group_drawings) for group_drawings, _ in groups)
+    start = time.perf_counter()
+    results = []
+    try:
+        for group_drawings, models in groups:
+            for drawing_path in group_drawings:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                result = application.export(drawing_path, "drawing",
+                                            lambda backend: export(backend, drawing_path, models))
+                results.append(result)
+                progress_callback(result)
+            resident.release(application.application.backend)
+            if cancel_event is not None and cancel_event.is_set() and len(results) < total:
+                print(f"Export cancelled, {total - len(results)} drawing(s) not started")
+                break
+    finally:
+        resident.release(application.application.backend)
+        application.close()
+    return make_report(results, time.perf_counter() - start, cancelled=total - len(results),
+                       recycles=application.application.recycles)
+
+
+def export_STEP_Solidworks(parts_list, export_folder_step, selected_configs=None, backend_factory=None,
+                           progress_callback=None, cancel_event=None, recycle=None, timeouts=None, retry=None,
+                           max_retries=1, workers=1, incremental=False, force=False, manifest_path=None,
+                           heavy=None, costs=None, verify=True, force_paths=None):
+    """Exports parts and assemblies to STEP, one file per configuration; returns the run report.
+
+    selected_configs optionally maps a part path to the configurations to
+    export, as names or glob patterns; parts without an entry export all
+    their configurations. Each result lists the seconds every configuration
+    took under "configurations".
+    With workers > 1 the parts are shared between that many worker
+    processes, as drawings are by export_DRW_Solidworks; heavy caps how
+    many heavy assemblies they export at once (see HEAVY_DEFAULTS), so a
+    few huge assemblies do not run every instance out of memory together.
+    incremental, force, force_paths and manifest_path skip up-to-date parts
+    as for drawings; a part is up to date when its STEP files were exported from
+    its current content with the same folder and configuration filters.
+    recycle, timeouts, retry and max_retries are the application recycle
+    policy, the stage timeouts and the retry policy, and costs the
+    CostModel ordering the parts, and verify checks the STEP files, as for
+    export_DRW_Solidworks.
+    """
+    selected_configs = selected_configs or {}
+    os.makedirs(export_folder_step, exist_ok=True)
+    options = {
+        "export_folder_step": export_folder_step,
+        "selected_configs": selected_configs,
+        "verify": verify,
+        "recycle": recycle,
+        "timeouts": timeouts,
+        "retry": retry_policy(retry, max_retries),
+    }
+
+    def output_options(part_path):
+        return {"export_folder_step": export_folder_step, "configurations": selected_configs.get(part_path)}
+
+    manifest = None
+    if incremental or force:
+        manifest = ExportManifest(manifest_path or default_manifest_path(export_folder_step))
+
+    forced = set(force_paths or ())
+    skipped = []
+    to_export = []
+    for part_path in parts_list:
+        if (incremental and not force and part_path not in forced
+                and manifest.is_up_to_date(part_path, output_options(part_path))):
+            print(f"Up to date, skipped: {part_path}")
+            skipped.append({"part": part_path, "ok": True, "skipped": True, "outputs": manifest.outputs(part_path),
+                            "failed": [], "error": None, "attempts": 0, "elapsed": 0.0})
+        else:
+            to_export.append(part_path)
+    if progress_callback:
+        for result in skipped:
+            progress_callback(result)
+    if costs is None:
+        costs = CostModel(default_costs_path())
+    to_export = schedule(to_export, costs, None, workers)
+
+    def part_done(result):
+        if manifest:
+            if result["ok"]:
+                manifest.record(result["part"], output_options(result["part"]), result["outputs"])
+            else:
+                manifest.forget(result["part"])
+        if progress_callback:
+            progress_callback(result)
+
+    try:
+        if not to_export:
+            report = make_report([], 0.0, workers=workers)
+        elif workers > 1:
+            from .pool import export_pool
+            heavy = {**HEAVY_DEFAULTS, **(heavy or {})}
+            report = export_pool(to_export, options, workers, backend_factory=backend_factory,
+                                 progress_callback=part_done, max_retries=max_retries, cancel_event=cancel_event,
+                                 export=export_part, key="part",
+                                 heavy=[path for path in to_export if _is_heavy(path, heavy["size_mb"])],
+                                 max_heavy=heavy["max_concurrent"])
+        else:
+            report = _export_parts_serial(to_export, options, backend_factory, part_done, cancel_event)
+    finally:
+        if manifest:
+            manifest.save()
+
+    costs.record_results(report["results"])
+    try:
+        costs.save()
+    except OSError as e:
+        print(f"Cannot save the cost model {costs.path}: {e}")
+
+    return make_report(skipped + report["results"], report["elapsed"], workers=report["workers"],
+                       cancelled=report["cancelled"], recycles=report["recycles"])
+
+
+def _is_heavy(path, size_mb):
+    if not path.upper().endswith(".SLDASM"):
+        return False
+    try:
+        return os.path.getsize(path) >= size_mb * 2 ** 20
+    except OSError:
+        return False
+
+
+def _export_parts_serial(parts_list, options, backend_factory, progress_callback, cancel_event):
+    # Connect to SolidWorks
+    application = _SerialApplication(backend_factory, options["recycle"], options["timeouts"], options["retry"])
+
+    start = time.perf_counter()
+    results = []
+    try:
+        for part_path in parts_list:
+            if cancel_event is not None and cancel_event.is_set():
+                print(f"Export cancelled, {len(parts_list) - len(results)} part(s) not started")
+                break
+            result = application.export(part_path, "part", lambda backend: export_part(backend, part_path, options))
+            results.append(result)
+            progress_callback(result)
+    finally:
+        application.close()
+    return make_report(results, time.perf_counter() - start, cancelled=len(parts_list) - len(results),
+                       recycles=application.application.recycles)
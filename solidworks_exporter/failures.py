@@ -0,0 +1,143 @@
+"""Failure classes: telling transient COM trouble from genuine document errors.
+
+Every failed document gets one class, from the exception its stage raised
+(type and COM HRESULT) or from the codes a call reported (swFileLoadError_e
+for opening, swFileSaveError_e for saving):
+
+    busy          the application rejected the call or ran short of resources; retry later
+    disconnected  the application process is gone or unreachable; retry on a new instance
+    corrupt       the call reported success but the file written is empty or cut short (see verify.py)
+    timeout       a stage ran past its timeout (see timeouts.py)
+    missing       the document or a file it needs does not exist
+    model         the CAD application reported an error for the document itself
+    unknown       anything else
+
+The retry policy (a dict of classes, max_retries, backoff and max_backoff)
+retries only the transient classes (busy, disconnected, corrupt) by default, waiting backoff seconds,
+doubling per attempt up to max_backoff.
+"""
+from .backends import RPC_S_SERVER_UNAVAILABLE, BackendError
+
+# HRESULTs of an application too busy to take the call
+RPC_E_CALL_REJECTED = 0x80010001
+RPC_E_SERVERCALL_RETRYLATER = 0x8001010A
+# HRESULTs of an application process that died or dropped the connection
+RPC_S_CALL_FAILED = 0x800706BE
+RPC_E_DISCONNECTED = 0x80010108
+
+# swFileLoadError_e
+SW_FILE_NOT_FOUND_ERROR = 2
+SW_LOW_RESOURCES_ERROR = 262144
+SW_APPLICATION_BUSY = 8388608
+
+# swFileSaveError_e
+SW_GENERIC_SAVE_ERROR = 1
+SW_READ_ONLY_SAVE_ERROR = 2
+SW_FILE_LOCK_ERROR = 16
+
+FAILURE_CLASSES = ("busy", "disconnected", "corrupt", "timeout", "missing", "model", "unknown")
+TRANSIENT_CLASSES = ("busy", "disconnected", "corrupt")
+
+_HRESULT_CLASSES = {
+    RPC_E_CALL_REJECTED: "busy",
+    RPC_E_SERVERCALL_RETRYLATER: "busy",
+    RPC_S_SERVER_UNAVAILABLE: "disconnected",
+    RPC_S_CALL_FAILED: "disconnected",
+    RPC_E_DISCONNECTED: "disconnected",
+}
+
+RETRY_DEFAULTS = {
+    "classes": list(TRANSIENT_CLASSES),
+    "max_retries": 1,
+    "backoff": 1.0,
+    "max_backoff": 30.0,
+}
+
+
+def exception_hresult(exc):
+    """The HRESULT an exception carries (BackendError or pywin32's com_error), as an unsigned int, or None.
+
+    A failed Dispatch call reports DISP_E_EXCEPTION with the application's
+    own HRESULT in the exception info, which is preferred.
+    """
+    excepinfo = getattr(exc, "excepinfo", None)
+    if excepinfo and len(excepinfo) > 5 and excepinfo[5]:
+        return excepinfo[5] & 0xFFFFFFFF
+    hresult = getattr(exc, "hresult", None)
+    return None if hresult is None else hresult & 0xFFFFFFFF
+
+
+def classify_codes(errors=0, hresult=None):
+    """Class of a call that failed with these swFileLoadError_e bits and HRESULT; "model" if neither tells."""
+    if hresult is not None:
+        hresult &= 0xFFFFFFFF
+        if hresult in _HRESULT_CLASSES:
+            return _HRESULT_CLASSES[hresult]
+    if errors & (SW_APPLICATION_BUSY | SW_LOW_RESOURCES_ERROR):
+        return "busy"
+    if errors & SW_FILE_NOT_FOUND_ERROR:
+        return "missing"
+    return "model"
+
+
+def classify_exception(exc):
+    hresult = exception_hresult(exc)
+    if hresult in _HRESULT_CLASSES:
+        return _HRESULT_CLASSES[hresult]
+    if isinstance(exc, FileNotFoundError):
+        return "missing"
+    if isinstance(exc, BackendError):
+        return classify_codes(exc.errors, hresult)
+    return "unknown"
+
+
+def classify_save_codes(errors=0):
+    """Class of a save that failed with this swFileSaveError_e code.
+
+    A file locked by another process may be free on the next attempt; a
+    read-only target or any other save error will not go away by itself.
+    """
+    if errors & SW_FILE_LOCK_ERROR:
+        return "busy"
+    return "model"
+
+
+def classify_call(backend):
+    """Class of a call that returned failure without raising, from the codes the backend last reported."""
+    errors = getattr(backend, "last_errors", 0)
+    if getattr(backend, "last_error_table", "load") == "save":
+        return classify_save_codes(errors)
+    return classify_codes(errors)
+
+
+def document_failure(failures):
+    """One class for a document from the classes of its failed steps.
+
+    It is transient only if every step failed transiently, since retrying
+    cannot fix the others.
+    """
+    if not failures:
+        return "unknown"
+    lasting = [failure for failure in failures if failure not in TRANSIENT_CLASSES]
+    if not lasting:
+        return next(failure for failure in ("disconnected", "busy", "corrupt") if failure in failures)
+    return min(lasting, key=FAILURE_CLASSES.index)
+
+
+def retry_policy(policy=None, max_retries=None):
+    """policy with defaults filled in; max_retries, if given, is used when the policy has none."""
+    defaults = dict(RETRY_DEFAULTS)
+    if max_retries is not None:
+        defaults["max_retries"] = max_retries
+    return {**defaults, **(policy or {})}
+
+
+def should_retry(result, attempts, policy):
+    """True if a failed result of its attempts-th attempt is worth another attempt."""
+    return (not result["ok"] and result.get("failure") in policy["classes"]
+            and attempts <= policy["max_retries"])
+
+
+def retry_delay(policy, retry):
+    """Seconds to wait before the retry-th retry (1 for the first)."""
+    return min(policy["backoff"] * 2 ** (retry - 1), policy["max_backoff"])
@@ -0,0 +1,133 @@
+"""Job journal: an append-only JSON-lines record of every export run.
+
+Each run writes a run_start line (its documents and options), one document
+line per finished document (status, outputs written, outputs that failed,
+error) and a run_end line with the summary. Lines are flushed as they are
+written, so after a crash the journal shows exactly which documents were
+done; a resumed run exports only the rest.
+
+    {"type": "run_start", "run_id": "20240601-221500-3fa2", "time": ..., "documents": [...], "resumes": null, ...}
+    {"type": "document", "run_id": ..., "document": "...", "status": "done", "outputs": [...], "failed": [], ...}
+    {"type": "run_end", "run_id": ..., "exported": 398, "failed": 2, ...}
+"""
+import json
+import os
+import time
+
+from .report import document_path
+
+
+def default_journal_path(settings_path):
+    """job.json -> job.journal.jsonl"""
+    return os.path.splitext(settings_path)[0] + ".journal.jsonl"
+
+
+def new_run_id():
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + os.urandom(2).hex()
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+
+    def _append(self, record):
+        record.setdefault("time", time.time())
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+
+    def records(self):
+        """All records, oldest first; a line cut short by a crash is skipped."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def start_run(self, documents, options=None, resumes=None):
+        """Opens a run over documents; returns the JournalRun to report progress to."""
+        run = JournalRun(self, new_run_id())
+        self._append({"type": "run_start", "run_id": run.run_id, "documents": list(documents),
+                      "options": options or {}, "resumes": resumes})
+        return run
+
+    def runs(self):
+        """Summary per run, oldest first: run_id, started, ended, resumes, documents, done, failed, unfinished."""
+        runs = {}
+        for record in self.records():
+            if record["type"] == "run_start":
+                runs[record["run_id"]] = {"run_id": record["run_id"], "started": record["time"], "ended": None,
+                                          "resumes": record.get("resumes"), "documents": record["documents"],
+                                          "status": {}}
+            elif record["run_id"] in runs:
+                run = runs[record["run_id"]]
+                if record["type"] == "document":
+                    run["status"][record["document"]] = record
+                elif record["type"] == "run_end":
+                    run["ended"] = record["time"]
+        summaries = []
+        for run in runs.values():
+            statuses = [record["status"] for record in run.pop("status").values()]
+            run["done"] = statuses.count("done")
+            run["failed"] = statuses.count("failed")
+            run["unfinished"] = len(run["documents"]) - run["done"] - run["failed"]
+            summaries.append(run)
+        return summaries
+
+    def last_run_id(self):
+        runs = self.runs()
+        return runs[-1]["run_id"] if runs else None
+
+    def documents(self, run_id):
+        """The last document record of every document the run finished, keyed by document."""
+        return {record["document"]: record for record in self.records()
+                if record["type"] == "document" and record["run_id"] == run_id}
+
+    def unfinished(self, run_id):
+        """Documents of run_id not done yet, counting the runs that resumed it (and their resumes)."""
+        records = self.records()
+        starts = {record["run_id"]: record for record in records if record["type"] == "run_start"}
+        if run_id not in starts:
+            raise KeyError(run_id)
+        chain = {run_id}
+        # Runs are appended in order, so one pass finds resumes of resumes
+        for record in records:
+            if record["type"] == "run_start" and record.get("resumes") in chain:
+                chain.add(record["run_id"])
+        done = set()
+        for record in records:
+            if record["type"] == "document" and record["run_id"] in chain:
+                if record["status"] == "done":
+                    done.add(record["document"])
+        return [document for document in starts[run_id]["documents"] if document not in done]
+
+
+class JournalRun:
+    """One run in the journal; document_done fits as an export progress_callback."""
+
+    def __init__(self, journal, run_id):
+        self.journal = journal
+        self.run_id = run_id
+
+    def document_done(self, result):
+        self.journal._append({"type": "document", "run_id": self.run_id, "document": document_path(result),
+                              "status": "done" if result["ok"] else "failed",
+                              "skipped": bool(result.get("skipped")), "outputs": result["outputs"],
+                              "failed": result["failed"], "error": result["error"],
+                              "failure": result.get("failure"),
+                              "attempts": result.get("attempts"), "elapsed": result.get("elapsed")})
+
+    def finish(self, reports, error=None):
+        self.journal._append({"type": "run_end", "run_id": self.run_id,
+                              "exported": sum(report["exported"] for report in reports),
+                              "skipped": sum(report["skipped"] for report in reports),
+                              "failed": sum(report["failed"] for report in reports),
+                              "cancelled": sum(report["cancelled"] for report in reports),
+                              "recycles": sum(len(report.get("recycles", [])) for report in reports),
+                              "error": error})
@@ -0,0 +1,140 @@
+"""Locality batching: exporting drawings of the same models together while those models stay loaded.
+
+Opening a drawing loads every model it shows, and closing it unloads them
+again, so drawings of one heavy assembly exported far apart load that
+assembly once each. With locality on, drawings that reference the same
+top-level models (their direct part and assembly references) are grouped,
+within a priority, and a group is exported in one go by one application:
+ResidentModels opens the group's models first and closes them only after
+the last drawing of the group, so every drawing opens against models
+already in memory.
+
+Groups are kept to MAX_GROUP_DRAWINGS drawings, so a cancelled run or a
+pool waiting on its last group is never held up by a long one.
+"""
+import os
+
+from . import events
+from .backends import DOC_ASSEMBLY, DOC_PART
+
+MAX_GROUP_DRAWINGS = 25
+
+_MODEL_TYPES = {".sldprt": DOC_PART, ".sldasm": DOC_ASSEMBLY}
+
+
+def model_type(path):
+    """DOC_PART or DOC_ASSEMBLY for a model path, None for anything else."""
+    return _MODEL_TYPES.get(os.path.splitext(path)[1].lower())
+
+
+def list_references(backend, drawings):
+    """Maps every drawing to the documents it references directly; drawings whose references cannot be listed map to []."""
+    references = {}
+    for drawing_path in drawings:
+        try:
+            with events.stage("dependencies", backend, path=drawing_path):
+                found = backend.document_dependencies(drawing_path, traverse=False)
+        except Exception as e:
+            print(f"Cannot list the references of {drawing_path}: {e}")
+            found = []
+        references[drawing_path] = list(found)
+    return references
+
+
+def group_by_models(drawings, references, priorities=None):
+    """Groups of drawings sharing models, as (drawings, models) tuples in export order.
+
+    drawings are in export order (see schedule.py) and references maps them
+    to what they reference, of which the parts and assemblies count. A
+    group starts where its first drawing is and keeps the order of its
+    drawings. Drawings of
+    different priorities are never grouped, and drawings without references
+    are groups of their own.
+    """
+    priorities = priorities or {}
+    # Union-find over the drawings, joined by the models they share
+    parent = list(range(len(drawings)))
+
+    def root(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    owners = {}
+    for index, drawing_path in enumerate(drawings):
+        priority = priorities.get(drawing_path, 0)
+        for model in filter(model_type, references.get(drawing_path, ())):
+            key = (os.path.normcase(os.path.abspath(model)), priority)
+            if key in owners:
+                parent[root(index)] = root(owners[key])
+            else:
+                owners[key] = index
+
+    members = {}
+    for index in range(len(drawings)):
+        members.setdefault(root(index), []).append(index)
+    groups = []
+    for indexes in sorted(members.values(), key=lambda indexes: indexes[0]):
+        for start in range(0, len(indexes), MAX_GROUP_DRAWINGS):
+            chunk = [drawings[index] for index in indexes[start:start + MAX_GROUP_DRAWINGS]]
+            models = []
+            for drawing_path in chunk:
+                models += [model for model in filter(model_type, references.get(drawing_path, ()))
+                           if model not in models]
+            groups.append((chunk, models))
+    return groups
+
+
+def single_groups(drawings):
+    """One group per drawing, with no models: exporting without locality."""
+    return [([drawing_path], []) for drawing_path in drawings]
+
+
+class ResidentModels:
+    """The models kept open in an application while a group of drawings is exported.
+
+    Models the user already had open are left alone. After the application
+    was restarted (recycled, or killed on a timeout) the models are opened
+    again in the new one.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.documents = {}
+
+    def keep(self, backend, models):
+        """Opens the models not open yet in backend; called before every drawing of a group."""
+        if backend is not self.backend:
+            # A new application: the documents of the old one are gone with it
+            self.backend = backend
+            self.documents = {}
+        for model in models:
+            if model in self.documents:
+                continue
+            try:
+                if backend.is_open(model):
+                    self.documents[model] = None
+                    continue
+                with events.stage("load_model", backend, path=model):
+                    self.documents[model] = backend.open_doc(model, model_type(model))
+            except Exception as e:
+                # The drawing loads the model itself
+                print(f"Could not keep {model} open: {e}")
+                self.documents[model] = None
+
+    def release(self, backend):
+        """Closes the models opened by keep; called once the group is done, with the current backend."""
+        if backend is not self.backend:
+            # Restarted after the last drawing: nothing of ours is open
+            self.documents = {}
+            return
+        for model, document in self.documents.items():
+            if document is None:
+                continue
+            try:
+                with events.stage("close", self.backend, path=model):
+                    self.backend.close_doc(document)
+            except Exception as e:
+                print(f"Could not close {model}: {e}")
+        self.documents = {}
@@ -0,0 +1,167 @@
+"""Export manifest for incremental runs.
+
+The manifest records, for every exported source file (a drawing, or a part
+or assembly exported to STEP), its size, mtime and content hash, the export
+options used and the files produced. A source whose outputs are still in
+place, newer than the source and produced with the same options does not
+need to be exported again.
+
+When the rebuild policy is "when_needed" the entry also holds the mtimes of
+the models the drawing references, so the next run can tell whether
+ForceRebuild3 is needed without asking SolidWorks.
+"""
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_NAME = ".export_manifest.json"
+MANIFEST_VERSION = 1
+
+# Options that change what is written; anything else (workers, retries...) does not invalidate outputs
+OUTPUT_OPTIONS = (
+    "export_folder_dwg",
+    "export_folder_pdf",
+    "flag_export_dwg",
+    "flag_export_pdf",
+    "export_individual_sheets_pdf",
+    "export_individual_sheets_dwg",
+    "export_folder_step",
+    "configurations",
+)
+
+
+def default_manifest_path(*folders):
+    """Returns the manifest location next to the given output folders (in their common parent)."""
+    folders = [os.path.abspath(f) for f in folders if f]
+    if len(folders) == 1:
+        return os.path.join(folders[0], MANIFEST_NAME)
+    try:
+        common = os.path.commonpath(folders)
+    except ValueError:
+        # Folders on different drives
+        common = folders[0]
+    return os.path.join(common, MANIFEST_NAME)
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 of the file content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _output_options(options):
+    # Drawings and parts each have their own subset
+    return {name: options.get(name) for name in OUTPUT_OPTIONS if name in options}
+
+
+class ExportManifest:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    data = json.load(file)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable export manifest {path}: {e}")
+
+    def is_up_to_date(self, source, options):
+        """True if the outputs recorded for source are current for these options."""
+        entry = self.entries.get(_key(source))
+        if not entry or entry["options"] != _output_options(options):
+            return False
+        if not self._source_unchanged(source, entry) or self._dependencies_changed(entry):
+            return False
+
+        # Outputs must be newer than the content they were exported from
+        for output in entry["outputs"]:
+            try:
+                if os.stat(output).st_mtime < entry["exported_mtime"]:
+                    return False
+            except OSError:
+                return False
+        return bool(entry["outputs"])
+
+    def needs_rebuild(self, source):
+        """True unless source and every model it referenced are unchanged since its last recorded export."""
+        entry = self.entries.get(_key(source))
+        if not entry or entry.get("dependencies") is None:
+            return True
+        return not self._source_unchanged(source, entry) or self._dependencies_changed(entry)
+
+    def _source_unchanged(self, source, entry):
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        if (stat.st_size, stat.st_mtime) != (entry["size"], entry["mtime"]):
+            # Touched since the last export: only the content hash can tell whether it really changed
+            if stat.st_size != entry["size"] or file_hash(source) != entry["sha256"]:
+                return False
+            entry["mtime"] = stat.st_mtime
+            self._dirty = True
+        return True
+
+    def _dependencies_changed(self, entry):
+        for path, mtime in (entry.get("dependencies") or {}).items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def outputs(self, source):
+        entry = self.entries.get(_key(source))
+        return list(entry["outputs"]) if entry else []
+
+    def record(self, source, options, outputs, dependencies=None):
+        """Records a successful export of source.
+
+        dependencies optionally maps each referenced model to its mtime at export time.
+        """
+        try:
+            stat = os.stat(source)
+            sha256 = file_hash(source)
+        except OSError as e:
+            print(f"Cannot record {source} in the export manifest: {e}")
+            return
+        self.entries[_key(source)] = {
+            "source": source,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "exported_mtime": stat.st_mtime,
+            "sha256": sha256,
+            "options": _output_options(options),
+            "outputs": list(outputs),
+            "dependencies": dependencies,
+            "exported_at": time.time(),
+        }
+        self._dirty = True
+
+    def forget(self, source):
+        """Drops source so that it is exported again next time (e.g. after a failure)."""
+        if self.entries.pop(_key(source), None) is not None:
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Write a temporary file and swap it in, so a crash never leaves a truncated manifest
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, file, indent=1)
+        os.replace(temp_path, self.path)
+        self._dirty = False
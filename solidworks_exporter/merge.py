@@ -0,0 +1,389 @@
+"""Merging the per-sheet PDFs of a run into one PDF per drawing and one release PDF.
+
+With individual PDF sheets the export writes <name>_sheetN.pdf files. The
+merge stage puts them together in a background process, fed each drawing as
+soon as it is done, so merging overlaps with the CAD export of the next
+drawings:
+
+    <pdf folder>/merged/<name>.pdf      every sheet of one drawing, a bookmark per sheet
+    <pdf folder>/merged/<release>.pdf   every drawing in list order, a bookmark per
+                                        drawing with one per sheet below it
+
+The merge policy is a dict: drawings (bool, the per-drawing files), release
+(file name of the release PDF, none by default) and folder ("merged").
+Drawings that failed are left out of the release; drawings skipped as up to
+date are in it, from their earlier sheet files.
+
+The PDFs are streamed: every object of a source file is copied to the
+output as soon as it is reached, with its references renumbered, and the
+source is closed before the next one is opened. Only the object offsets,
+the page list and the bookmarks stay in memory, however big the release.
+Reading PDFs needs the optional pypdf package; without it nothing is merged.
+"""
+import importlib.util
+import multiprocessing
+import os
+import queue
+import re
+
+MERGE_DEFAULTS = {
+    "drawings": True,
+    "release": None,
+    "folder": "merged",
+}
+
+# How often close() checks that the merge process is still alive while waiting for its summary (s)
+_POLL_INTERVAL = 0.5
+
+_SHEET_FILE = re.compile(r"_sheet(\d+)\.pdf$", re.IGNORECASE)
+
+
+def merge_policy(policy):
+    """policy with defaults filled in; None and {} mean no merging."""
+    return {**MERGE_DEFAULTS, **(policy or {})}
+
+
+def merging_enabled(policy):
+    return bool(policy) and (merge_policy(policy)["drawings"] or bool(merge_policy(policy)["release"]))
+
+
+def batch_policy(policy, number):
+    """policy for the number-th batch of a run split by drawing options (1 for the first).
+
+    Every batch after the first writes a release PDF of its own, <release>_<number>.pdf.
+    """
+    if number > 1 and policy and policy.get("release"):
+        stem, extension = os.path.splitext(policy["release"])
+        return {**policy, "release": f"{stem}_{number}{extension}"}
+    return policy
+
+
+def sheet_pdfs(result):
+    """(sheet number, path) of the per-sheet PDFs of a drawing's result, in sheet order."""
+    sheets = []
+    for path in result.get("outputs") or []:
+        match = _SHEET_FILE.search(path)
+        if match:
+            sheets.append((int(match.group(1)), path))
+    return sorted(sheets)
+
+
+class _PdfStream:
+    """A PDF written object by object; pages and bookmarks are added from source files."""
+
+    def __init__(self, path):
+        from pypdf.generic import IndirectObject
+
+        self.path = path
+        self.file = open(path + ".tmp", "wb")
+        self.file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        # Offset of every object written, by number; 1 is the page tree and 2 the catalog
+        self.offsets = {}
+        self.next_number = 3
+        self.pages_ref = IndirectObject(1, 0, None)
+        self.pages = []
+        # [title, page number, children] bookmarks
+        self.outline = []
+
+    def _reserve(self):
+        self.next_number += 1
+        return self.next_number - 1
+
+    def _write(self, number, obj):
+        self.offsets[number] = self.file.tell()
+        self.file.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(self.file)
+        self.file.write(b"\nendobj\n")
+
+    def add_pdf(self, source_path):
+        """Appends the pages of source_path; returns the number of the first one and the page count."""
+        first = len(self.pages)
+        try:
+            return self._add_pages(source_path, first)
+        except BaseException:
+            # What was written of the source stays in the file, unreferenced
+            del self.pages[first:]
+            raise
+
+    def _add_pages(self, source_path, first):
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+        with open(source_path, "rb") as source:
+            reader = PdfReader(source)
+            if reader.is_encrypted:
+                raise ValueError("encrypted PDF")
+            numbers = {}
+            waiting = []
+            page_numbers = {page.indirect_reference.idnum for page in reader.pages}
+
+            def renumber(obj):
+                # References point at the copies; referenced objects are queued for writing
+                if isinstance(obj, IndirectObject):
+                    if obj.idnum not in numbers:
+                        numbers[obj.idnum] = self._reserve()
+                        waiting.append(obj)
+                    return IndirectObject(numbers[obj.idnum], 0, None)
+                if isinstance(obj, DictionaryObject):
+                    # dict's own methods, which do not resolve the references as pypdf's do
+                    for key, value in list(dict.items(obj)):
+                        dict.__setitem__(obj, key, renumber(value))
+                elif isinstance(obj, ArrayObject):
+                    for index, value in enumerate(list.__iter__(obj)):
+                        list.__setitem__(obj, index, renumber(value))
+                return obj
+
+            for page in reader.pages:
+                # Inherited attributes were copied onto the page when reading the page tree
+                page_ref = page.indirect_reference
+                if page_ref.idnum not in numbers:
+                    numbers[page_ref.idnum] = self._reserve()
+                # The page joins the output's page tree, not its source's
+                dict.pop(page, "/Parent", None)
+                renumber(page)
+                dict.__setitem__(page, NameObject("/Parent"), self.pages_ref)
+                self._write(numbers[page_ref.idnum], page)
+                self.pages.append(numbers[page_ref.idnum])
+            while waiting:
+                source_ref = waiting.pop()
+                # Pages met as references (e.g. by a link) before their turn are written above
+                if source_ref.idnum not in page_numbers:
+                    self._write(numbers[source_ref.idnum], renumber(source_ref.get_object()))
+        return first, len(self.pages) - first
+
+    def add_section(self, title, sheets):
+        """Appends the (sheet title, pdf path) sheets with a bookmark titled title above theirs.
+
+        Returns the sheet files that could not be read, with the reason.
+        """
+        children, unreadable = [], []
+        for sheet_title, pdf_path in sheets:
+            try:
+                first, count = self.add_pdf(pdf_path)
+            except Exception as e:
+                unreadable.append(f"{pdf_path}: {e}")
+                continue
+            if count:
+                children.append([sheet_title, first, []])
+        if children:
+            self.outline.append([title, children[0][1], children])
+        return unreadable
+
+    def close(self):
+        """Writes the page tree, bookmarks, catalog and cross-reference table, then swaps the file in."""
+        from pypdf.generic import (
+            ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, TextStringObject,
+        )
+
+        def ref(number):
+            return IndirectObject(number, 0, None)
+
+        def destination(page):
+            return ArrayObject([ref(self.pages[page]), NameObject("/Fit")])
+
+        def write_items(items, parent):
+            # Returns the numbers of the first and last item and the count of all items below parent
+            numbers = [self._reserve() for _ in items]
+            count = len(items)
+            for position, (title, page, children) in enumerate(items):
+                item = DictionaryObject({
+                    NameObject("/Title"): TextStringObject(title),
+                    NameObject("/Parent"): ref(parent),
+                    NameObject("/Dest"): destination(page),
+                })
+                if position:
+                    item[NameObject("/Prev")] = ref(numbers[position - 1])
+                if position + 1 < len(numbers):
+                    item[NameObject("/Next")] = ref(numbers[position + 1])
+                if children:
+                    first, last, below = write_items(children, numbers[position])
+                    item.update({NameObject("/First"): ref(first), NameObject("/Last"): ref(last),
+                                 NameObject("/Count"): NumberObject(below)})
+                    count += below
+                self._write(numbers[position], item)
+            return numbers[0], numbers[-1], count
+
+        catalog = DictionaryObject({NameObject("/Type"): NameObject("/Catalog"),
+                                    NameObject("/Pages"): self.pages_ref})
+        if self.outline and self.pages:
+            outlines_number = self._reserve()
+            first, last, count = write_items(self.outline, outlines_number)
+            self._write(outlines_number, DictionaryObject({
+                NameObject("/Type"): NameObject("/Outlines"), NameObject("/First"): ref(first),
+                NameObject("/Last"): ref(last), NameObject("/Count"): NumberObject(count)}))
+            catalog[NameObject("/Outlines")] = ref(outlines_number)
+            catalog[NameObject("/PageMode")] = NameObject("/UseOutlines")
+        self._write(1, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(ref(number) for number in self.pages),
+            NameObject("/Count"): NumberObject(len(self.pages))}))
+        self._write(2, catalog)
+
+        xref = self.file.tell()
+        size = self.next_number
+        self.file.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for number in range(1, size):
+            offset = self.offsets.get(number)
+            # Numbers reserved but never written (pages met as references) are free entries
+            self.file.write(f"{offset:010d} 00000 n \n".encode() if offset is not None
+                            else b"0000000000 65535 f \n")
+        self.file.write(f"trailer\n<< /Size {size} /Root 2 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.path + ".tmp")
+
+
+def merge_pdfs(output_path, sections):
+    """Writes the sections, (title, [(sheet title, pdf path), ...]) pairs, into one PDF; returns its page count.
+
+    With one section the bookmarks are its sheets, else one per section
+    with its sheets below. Sheet files that cannot be read are left out
+    and listed in the ValueError raised at the end, after the rest was
+    written.
+    """
+    stream = _PdfStream(output_path)
+    unreadable = []
+    try:
+        for title, sheets in sections:
+            unreadable += stream.add_section(title, sheets)
+        if len(stream.outline) == 1:
+            stream.outline = stream.outline[0][2]
+        stream.close()
+    except BaseException:
+        stream.abort()
+        raise
+    if unreadable:
+        raise ValueError(f"{len(unreadable)} sheet file(s) left out: " + "; ".join(unreadable))
+    return len(stream.pages)
+
+
+def _drawing_section(drawing_path, sheets, sheet_names):
+    title = os.path.splitext(os.path.basename(drawing_path))[0]
+    names = sheet_names or []
+    return title, [(names[number - 1] if number <= len(names) else f"Sheet {number}", path)
+                   for number, path in sheets]
+
+
+def _up_to_date(output_path, sources):
+    try:
+        built = os.path.getmtime(output_path)
+        return all(os.path.getmtime(path) <= built for path in sources)
+    except OSError:
+        return False
+
+
+def _merge_main(tasks, results, folder, policy, order):
+    """The merge process: merges the drawings from tasks as they come, the release in list order."""
+    summary = {"merged": 0, "pages": 0, "release": None, "release_pages": 0, "errors": []}
+    release = None
+    positions = {path: index for index, path in enumerate(order)}
+    # Position in order -> section (None for a drawing left out) waiting for those before it
+    arrived = {}
+    next_position = 0
+
+    def add_to_release(section):
+        if section:
+            summary["errors"].extend(release.add_section(*section))
+
+    try:
+        if policy["release"]:
+            release_path = os.path.join(folder, policy["release"])
+            try:
+                release = _PdfStream(release_path)
+            except Exception as e:
+                # The per-drawing files are still merged
+                summary["errors"].append(f"{release_path}: {e}")
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            drawing_path, sheets, sheet_names, include = task
+            section = _drawing_section(drawing_path, sheets, sheet_names) if include and sheets else None
+            if section and policy["drawings"]:
+                output_path = os.path.join(folder, section[0] + ".pdf")
+                try:
+                    if not _up_to_date(output_path, [path for _, path in sheets]):
+                        summary["pages"] += merge_pdfs(output_path, [section])
+                        summary["merged"] += 1
+                except Exception as e:
+                    summary["errors"].append(f"{output_path}: {e}")
+            if release is None or drawing_path not in positions:
+                continue
+            # Drawings join the release in list order, as soon as those before them are in
+            arrived[positions[drawing_path]] = section
+            while next_position in arrived:
+                add_to_release(arrived.pop(next_position))
+                next_position += 1
+        if release is not None:
+            # Drawings that never came (a cancelled run) leave gaps
+            for position in sorted(arrived):
+                add_to_release(arrived[position])
+            release.close()
+            summary["release"] = release.path
+            summary["release_pages"] = len(release.pages)
+    except Exception as e:
+        if release is not None:
+            release.abort()
+        summary["errors"].append(str(e))
+    results.put(summary)
+
+
+class PdfMerge:
+    """The background merge process of one export run.
+
+    add() every drawing result as it finishes (skipped ones included),
+    then close() to wait for the merge and get its summary.
+    """
+
+    def __init__(self, policy, pdf_folder, drawings):
+        self.policy = merge_policy(policy)
+        self.folder = os.path.join(pdf_folder, self.policy["folder"])
+        self.drawings = list(drawings)
+        self.process = None
+
+    def start(self):
+        if importlib.util.find_spec("pypdf") is None:
+            print("pypdf is not installed, the sheet PDFs are not merged")
+            return self
+        os.makedirs(self.folder, exist_ok=True)
+        # Like the worker pool, never fork a process holding COM objects
+        context = multiprocessing.get_context("spawn")
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.process = context.Process(target=_merge_main, daemon=True,
+                                       args=(self.tasks, self.results, self.folder, self.policy, self.drawings))
+        self.process.start()
+        return self
+
+    def add(self, result):
+        if self.process is None:
+            return
+        self.tasks.put((result["drawing"], sheet_pdfs(result), result.get("sheet_names"), result["ok"]))
+
+    def close(self):
+        """Waits for the merge to finish; returns its summary, or None when nothing was merged."""
+        if self.process is None:
+            return None
+        self.tasks.put(None)
+        while True:
+            try:
+                summary = self.results.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if not self.process.is_alive():
+                    # Died without a summary, e.g. killed or out of memory
+                    self.tasks.cancel_join_thread()
+                    summary = {"merged": 0, "pages": 0, "release": None, "release_pages": 0,
+                               "errors": [f"the merge process exited with code {self.process.exitcode}"]}
+                    break
+        self.process.join()
+        for error in summary["errors"]:
+            print(f"Could not merge {error}")
+        if summary["merged"]:
+            print(f"Merged {summary['merged']} drawing PDF(s) into {self.folder}")
+        if summary["release"]:
+            print(f"Release PDF, {summary['release_pages']} page(s): {summary['release']}")
+        return summary
@@ -0,0 +1,422 @@
+"""Worker pool: several CAD application instances sharing one document queue.
+
+Each worker is a separate process that starts its own CAD application from
+the backend factory and talks to the parent over a pipe of its own: it
+receives groups of drawings and sends back results, along with the
+instrumentation events of events.py when the parent has listeners attached.
+A worker that is killed or crashes can only break its own pipe, and the
+parent always knows which group it held. Workers restart their application according to the
+recycle policy in the options (see recycle.py) and report every restart.
+With stage timeouts (see timeouts.py) workers report the deadline of the
+stage they are in; the parent kills a worker, and its application, that
+runs past it and reports the drawing as timed out. The parent hands one group of
+drawings to each idle worker (a single drawing, or with locality the drawings
+sharing models, see locality.py, which the worker exports while those
+models stay open), retries failed drawings, replaces workers that die,
+handing their unfinished drawings to another worker, and merges everything
+into a single report. Parts exported to STEP go through
+the same pool, one part per task, with a cap on the heavy assemblies
+exported at once.
+"""
+import collections
+import functools
+import multiprocessing
+import multiprocessing.connection
+import threading
+import time
+
+from . import events
+from .backends import SolidWorksBackend, kill_process
+from .export import export_drawing
+from .failures import classify_exception, retry_delay, retry_policy, should_retry
+from .locality import ResidentModels, single_groups
+from .recycle import RecyclingApplication
+from .timeouts import StageDeadlines, mark_timed_out, timeouts_enabled
+from .report import make_report
+
+# How often the parent checks for dead workers while waiting for results
+_POLL_INTERVAL = 0.5
+
+
+def _worker_main(worker_id, backend_factory, options, connection, forward_events=False, export_document=None,
+                 key="drawing"):
+    export_document = export_document or export_drawing
+    # Events may come from other threads of the worker; a pipe takes one message at a time
+    send_lock = threading.Lock()
+
+    def send(kind, index, payload):
+        with send_lock:
+            connection.send((kind, worker_id, index, payload))
+
+    if forward_events:
+        def forward(record):
+            record["worker"] = worker_id
+            send("event", None, record)
+        events.add_listener(forward)
+
+    if timeouts_enabled(options.get("timeouts")):
+        def deadline_changed(current):
+            # Clocks of different processes are not comparable: send the seconds left
+            deadline = (current[0], current[1], current[2] - time.monotonic()) if current else None
+            send("deadline", None, deadline)
+        events.add_listener(StageDeadlines(options["timeouts"], deadline_changed))
+
+    try:
+        application = RecyclingApplication(backend_factory, options.get("recycle"), worker=worker_id)
+    except Exception as e:
+        send("dead", None, f"could not start the application: {e}")
+        return
+    send("app", None, application.backend.process_id())
+
+    resident = ResidentModels()
+
+    def export(backend, drawing_path, models):
+        resident.keep(backend, models)
+        try:
+            return export_document(backend, drawing_path, options)
+        except Exception as e:
+            return {key: drawing_path, "ok": False, "outputs": [], "failed": [], "error": str(e),
+                    "failure": classify_exception(e)}
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            # The parent is gone
+            break
+        if task is None:
+            break
+        if task == "stop":
+            # Asked after the group was done already
+            continue
+        entries, models = task
+        stopped = False
+        for position, (index, drawing_path) in enumerate(entries):
+            # Between drawings the parent may ask to stop (cancel) or to quit: the rest of the group is not started
+            if connection.poll():
+                stopped = connection.recv() is None
+                send("unstarted", None, [other for other, _ in entries[position:]])
+                break
+            send("start", index, None)
+            recycled = len(application.recycles)
+            result = application.run(drawing_path, lambda backend: export(backend, drawing_path, models))
+            for recycle in application.recycles[recycled:]:
+                send("recycle", index, recycle)
+            if len(application.recycles) > recycled:
+                send("app", None, application.backend.process_id())
+            result["worker"] = worker_id
+            send("done", index, result)
+        resident.release(application.backend)
+        if stopped:
+            break
+
+    try:
+        application.close()
+    except Exception as e:
+        print(f"Worker {worker_id}: could not close the application: {e}")
+
+
+def export_pool(drawings_list, options, workers, backend_factory=None, progress_callback=None, max_retries=1,
+                cancel_event=None, groups=None, export=None, key="drawing", heavy=None, max_heavy=0):
+    """Exports the drawings with a pool of worker processes and returns the merged report.
+
+    backend_factory must be picklable (a backend class or a partial of one);
+    by default every worker starts a separate SolidWorks instance.
+    Drawings that fail are retried, after a backoff, according to the retry
+    policy in options (see failures.py); max_retries applies when the policy
+    does not set it. A crashed worker counts as a "disconnected" failure.
+    groups, the (drawings, models) groups of locality.py, sets the order
+    and the drawings a worker exports in one go instead of drawings_list.
+    export and key export another kind of document: export(backend, path,
+    options) is a picklable function returning the result record, keyed by
+    key (export_drawing and "drawing" by default). At most max_heavy of the
+    heavy paths are handed out at once (0: no cap); other documents go
+    ahead of them meanwhile.
+    Once cancel_event
+    is set no new group is handed out and every worker stops after the
+    drawing it is exporting; the rest of its group counts as cancelled.
+    """
+    if backend_factory is None:
+        backend_factory = functools.partial(SolidWorksBackend, new_instance=True)
+    retry = retry_policy(options.get("retry"), max_retries)
+
+    # COM objects do not survive a fork, so always start fresh interpreters
+    context = multiprocessing.get_context("spawn")
+
+    # Listeners live in this process; workers only send events when someone is listening
+    forward_events = events.has_listeners()
+
+    if groups is None:
+        groups = single_groups(drawings_list)
+    drawings_list = [drawing_path for group_drawings, _ in groups for drawing_path in group_drawings]
+    attempts = [0] * len(drawings_list)
+    final = [None] * len(drawings_list)
+    remaining = len(drawings_list)
+    # ([index, ...], models) groups not handed out yet
+    pending = collections.deque()
+    # (monotonic time, index) of failed drawings waiting for their retry
+    backing_off = []
+    retried = [[] for _ in drawings_list]
+    cancelled = set()
+    # Worker id -> its process and the parent's end of its pipe
+    processes = {}
+    connections = {}
+    # Workers that could not start their application; they are not replaced
+    failed_to_start = set()
+    in_flight = {}
+    # Index -> the group it was handed out in, worker id -> indexes of its group not done yet
+    task_of = {}
+    assigned = {}
+    heavy = set(heavy or ())
+    heavy_running = 0
+    recycles = []
+    # Worker id -> process id of its application, and (stage, limit, deadline) of its timed stage in progress
+    applications = {}
+    deadlines = {}
+    next_worker_id = 0
+
+    def start_worker():
+        nonlocal next_worker_id
+        worker_id = next_worker_id
+        next_worker_id += 1
+        connection, worker_connection = context.Pipe()
+        process = context.Process(target=_worker_main, daemon=True,
+                                  args=(worker_id, backend_factory, options, worker_connection, forward_events,
+                                        export, key))
+        process.start()
+        # Only the worker holds its end now, so the parent sees EOF once the worker is gone
+        worker_connection.close()
+        processes[worker_id] = process
+        connections[worker_id] = connection
+
+    def finish(index, result):
+        nonlocal remaining
+        result["attempts"] = attempts[index]
+        if should_retry(result, attempts[index], retry):
+            retried[index].append(result["failure"])
+            delay = retry_delay(retry, len(retried[index]))
+            print(f"Retrying {drawings_list[index]} in {delay:g} s ({result['failure']}): {result['error']}")
+            backing_off.append((time.monotonic() + delay, index))
+            return
+        if retried[index]:
+            result["retried"] = retried[index]
+        final[index] = result
+        remaining -= 1
+        if progress_callback:
+            progress_callback(result)
+
+    def is_heavy(indexes):
+        return any(drawings_list[index] in heavy for index in indexes)
+
+    def feed():
+        # One group per idle worker at a time, so cancelling and retries take effect quickly
+        nonlocal heavy_running
+        now = time.monotonic()
+        for entry in sorted(backing_off):
+            if entry[0] <= now:
+                backing_off.remove(entry)
+                pending.appendleft(([entry[1]], []))
+        idle = [worker_id for worker_id in processes if worker_id not in assigned]
+        while pending and idle:
+            for position, (indexes, models) in enumerate(pending):
+                if not max_heavy or heavy_running < max_heavy or not is_heavy(indexes):
+                    break
+            else:
+                # Only heavy documents left, and as many running as allowed
+                break
+            del pending[position]
+            if is_heavy(indexes):
+                heavy_running += 1
+            for index in indexes:
+                attempts[index] += 1
+                task_of[index] = (indexes, models)
+            worker_id = idle.pop(0)
+            assigned[worker_id] = list(indexes)
+            try:
+                connections[worker_id].send(([(index, drawings_list[index]) for index in indexes], models))
+            except OSError:
+                # Gone already; the group is taken back with the worker below
+                pass
+
+    def group_finished(index):
+        nonlocal heavy_running
+        if is_heavy(task_of[index][0]):
+            heavy_running -= 1
+
+    def drawing_done(worker_id, index):
+        # The worker is free for the next group once the last drawing of its group is done
+        left = assigned.get(worker_id)
+        if left is None:
+            return
+        if index in left:
+            left.remove(index)
+        if not left:
+            del assigned[worker_id]
+            group_finished(index)
+
+    def take_back(worker_id, index):
+        """Puts the drawings of a lost worker's group, other than index, back in the queue."""
+        left = assigned.pop(worker_id, None)
+        if left is None:
+            return
+        group_finished(left[0])
+        rest = [other for other in left if other != index]
+        if rest:
+            for other in rest:
+                attempts[other] -= 1
+            pending.appendleft((rest, task_of[rest[0]][1]))
+
+    def handle(kind, worker_id, index, payload):
+        nonlocal remaining
+        if kind == "event":
+            events.dispatch(payload)
+        elif kind == "recycle":
+            recycles.append(payload)
+        elif kind == "app":
+            applications[worker_id] = payload
+        elif kind == "deadline":
+            if payload is None:
+                deadlines.pop(worker_id, None)
+            else:
+                stage, limit, seconds_left = payload
+                deadlines[worker_id] = (stage, limit, time.monotonic() + seconds_left)
+        elif kind == "start":
+            in_flight[worker_id] = index
+        elif kind == "done":
+            if payload.get("requeued"):
+                # Exported again on a restarted application: a second attempt
+                attempts[index] += 1
+            in_flight.pop(worker_id, None)
+            deadlines.pop(worker_id, None)
+            drawing_done(worker_id, index)
+            finish(index, payload)
+        elif kind == "unstarted":
+            print(f"Export cancelled, {len(payload)} drawing(s) of worker {worker_id}'s group not started")
+            for other in payload:
+                attempts[other] -= 1
+                cancelled.add(other)
+                remaining -= 1
+                drawing_done(worker_id, other)
+        elif kind == "dead":
+            print(f"Worker {worker_id} stopped: {payload}")
+            failed_to_start.add(worker_id)
+
+    def receive(worker_id):
+        """Handles the messages waiting on a worker's pipe; False once the pipe is closed."""
+        connection = connections[worker_id]
+        try:
+            while connection.poll():
+                handle(*connection.recv())
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def remove_worker(worker_id):
+        process = processes.pop(worker_id)
+        connections.pop(worker_id).close()
+        return process
+
+    start = time.perf_counter()
+    position = 0
+    for group_drawings, models in groups:
+        pending.append((list(range(position, position + len(group_drawings))), models))
+        position += len(group_drawings)
+    for _ in range(min(workers, len(drawings_list))):
+        start_worker()
+
+    stop_sent = False
+    try:
+        while remaining:
+            if cancel_event is not None and cancel_event.is_set() and not stop_sent:
+                # Workers in the middle of a group stop after their current drawing
+                stop_sent = True
+                for worker_id in assigned:
+                    try:
+                        connections[worker_id].send("stop")
+                    except OSError:
+                        pass
+            if cancel_event is not None and cancel_event.is_set() and (pending or backing_off):
+                pending.extend(([index], []) for _, index in backing_off)
+                backing_off.clear()
+                not_started = [index for indexes, _ in pending for index in indexes]
+                print(f"Export cancelled, {len(not_started)} drawing(s) not started")
+                remaining -= len(not_started)
+                cancelled.update(not_started)
+                pending.clear()
+                if not remaining:
+                    break
+            feed()
+            ready = multiprocessing.connection.wait(list(connections.values()), timeout=_POLL_INTERVAL)
+            for worker_id, connection in list(connections.items()):
+                if connection in ready:
+                    receive(worker_id)
+
+            # A worker stuck past its stage deadline is killed with its application; the drawing timed out.
+            # Only its own pipe can be left half written.
+            now = time.monotonic()
+            for worker_id, (stage, limit, deadline) in list(deadlines.items()):
+                if now < deadline:
+                    continue
+                del deadlines[worker_id]
+                if worker_id not in processes:
+                    continue
+                process = remove_worker(worker_id)
+                print(f"Worker {worker_id} did not finish {stage} within {limit:g} s, killing it")
+                process.kill()
+                process.join()
+                if applications.get(worker_id):
+                    try:
+                        kill_process(applications[worker_id])
+                    except OSError as e:
+                        print(f"Could not kill the application of worker {worker_id}: {e}")
+                index = in_flight.pop(worker_id, None)
+                take_back(worker_id, index)
+                if index is not None:
+                    finish(index, mark_timed_out({key: drawings_list[index], "outputs": [], "failed": [],
+                                                  "worker": worker_id}, stage, limit))
+                start_worker()
+
+            # A worker that exits with drawings in hand has crashed: fail the one in progress, hand the
+            # rest of its group to another worker and start a replacement while there is work left
+            for worker_id, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                # Whatever it sent before exiting still counts
+                receive(worker_id)
+                remove_worker(worker_id)
+                process.join()
+                index = in_flight.pop(worker_id, None)
+                deadlines.pop(worker_id, None)
+                take_back(worker_id, index)
+                if index is not None:
+                    finish(index, {key: drawings_list[index], "ok": False, "outputs": [], "failed": [],
+                                   "error": f"worker exited with code {process.exitcode}", "failure": "disconnected",
+                                   "worker": worker_id})
+                if worker_id not in failed_to_start and (pending or backing_off):
+                    start_worker()
+
+            if not processes:
+                # No application could be started: nothing left to export the rest
+                for index, result in enumerate(final):
+                    if result is not None or index in cancelled:
+                        continue
+                    final[index] = {key: drawings_list[index], "ok": False, "outputs": [], "failed": [],
+                                    "error": "no worker available", "failure": "unknown",
+                                    "attempts": attempts[index]}
+                break
+    finally:
+        for connection in connections.values():
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in processes.values():
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        for connection in connections.values():
+            connection.close()
+
+    results_done = [result for result in final if result is not None]
+    return make_report(results_done, time.perf_counter() - start, workers=workers, cancelled=len(cancelled),
+                       recycles=recycles)
@@ -0,0 +1,119 @@
+"""Recycling the CAD application during long batches.
+
+A SolidWorks process grows and slows down after a few hundred open/close
+cycles. RecyclingApplication owns the backend of a serial run or of one
+pool worker and restarts the application (exit_app, then a new backend from
+the factory) according to the recycle policy, a dict of:
+
+    documents     restart after this many documents (0: never)
+    memory_mb     restart once the application's working set exceeds this (0: never)
+    slow_seconds  restart after a document that took longer than this, as the
+                  application is probably hung or thrashing (0: never); if
+                  that document failed it is exported again on the new instance
+
+The application is also restarted after a document timed out (see
+timeouts.py), as it was killed to end the stuck call, and after a document
+failed because the application was gone (see failures.py).
+
+Every restart is recorded as a recycle event (reason, documents handled,
+memory reading) that ends up in the run report, as does the memory reading
+taken after every document when the backend can report it.
+"""
+import time
+
+RECYCLE_DEFAULTS = {
+    "documents": 0,
+    "memory_mb": 0,
+    "slow_seconds": 0,
+}
+
+
+def recycle_policy(policy):
+    """policy with defaults filled in; None and {} mean no recycling."""
+    return {**RECYCLE_DEFAULTS, **(policy or {})}
+
+
+def recycling_enabled(policy):
+    return any(recycle_policy(policy).values())
+
+
+class RecyclingApplication:
+    """The backend of one worker, restarted when the recycle policy says so."""
+
+    def __init__(self, backend_factory, policy=None, worker=None):
+        self.backend_factory = backend_factory
+        self.policy = recycle_policy(policy)
+        self.worker = worker
+        self.recycles = []
+        self.documents = 0
+        self.backend = backend_factory()
+
+    def memory_mb(self):
+        """Working set of the application in MB, or None if the backend cannot tell."""
+        try:
+            usage = self.backend.memory_usage()
+        except Exception as e:
+            print(f"Cannot read the memory usage of the application: {e}")
+            return None
+        return None if usage is None else usage / 2 ** 20
+
+    def recycle(self, reason, memory_mb=None, document=None):
+        """Closes the application and starts a new one; returns the recycle event."""
+        event = {"reason": reason, "documents": self.documents, "memory_mb": memory_mb,
+                 "document": document, "worker": self.worker, "time": time.time()}
+        print(f"Restarting the application after {self.documents} document(s): {reason}")
+        try:
+            self.backend.exit_app()
+        except Exception as e:
+            print(f"Could not close the application: {e}")
+        self.backend = self.backend_factory()
+        self.documents = 0
+        self.recycles.append(event)
+        return event
+
+    def before_document(self):
+        """Restarts the application if it has handled its share of documents or grown too large."""
+        if self.policy["documents"] and self.documents >= self.policy["documents"]:
+            self.recycle("documents", self.memory_mb())
+        elif self.policy["memory_mb"] and self.documents:
+            memory_mb = self.memory_mb()
+            if memory_mb is not None and memory_mb > self.policy["memory_mb"]:
+                self.recycle("memory", memory_mb)
+
+    def after_document(self, result, document):
+        """Counts a finished document and stores the memory reading in its result.
+
+        Returns True if the document hung and failed: the application has
+        been restarted and the document should be exported again. Timed-out
+        documents are not exported again.
+        """
+        self.documents += 1
+        if result.get("timed_out") or result.get("failure") == "disconnected":
+            # Killed to end a stuck call, or gone by itself: start a new one either way
+            self.recycle("timeout" if result.get("timed_out") else "disconnected", document=document)
+            return False
+        memory_mb = self.memory_mb()
+        if memory_mb is not None:
+            result["memory_mb"] = memory_mb
+        slow_seconds = self.policy["slow_seconds"]
+        if slow_seconds and result.get("elapsed", 0.0) > slow_seconds:
+            self.recycle("slow", memory_mb, document)
+            return not result["ok"]
+        return False
+
+    def run(self, document, export):
+        """export(backend) for one document, restarting the application around it as needed.
+
+        A document re-run after a hang is marked with "requeued" in its result.
+        """
+        self.before_document()
+        result = export(self.backend)
+        if self.after_document(result, document):
+            print(f"Exporting {document} again on the new application")
+            result = export(self.backend)
+            result["requeued"] = True
+            self.after_document(result, document)
+        return result
+
+    def close(self):
+        self.backend.exit_app()
@@ -0,0 +1,184 @@
+"""Reference graph: which drawings and STEP exports depend on which models.
+
+The graph holds one node per document (drawing, assembly or part) with its
+direct references as reported by the CAD backend (drawing -> models,
+assembly -> components) and the size, mtime and hash of the file when it
+was last exported. It is stored as JSON next to the settings file.
+
+update() compares every document in the graph with the file on disk; only
+documents whose content changed are asked for their references again.
+affected() then walks the references backwards from the changed documents
+to the export targets (drawings, and parts/assemblies exported to STEP)
+that have to be regenerated.
+"""
+import json
+import os
+
+from .manifest import file_hash
+from .report import document_path
+
+GRAPH_VERSION = 1
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def default_graph_path(settings_path):
+    """job.json -> job.refgraph.json"""
+    return os.path.splitext(settings_path)[0] + ".refgraph.json"
+
+
+class ReferenceGraph:
+    def __init__(self, path=None):
+        self.path = path
+        self.nodes = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    data = json.load(file)
+                if data.get("version") == GRAPH_VERSION:
+                    self.nodes = data.get("nodes", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable reference graph {path}: {e}")
+
+    def references(self, path):
+        node = self.nodes.get(_key(path))
+        return list(node["references"]) if node else []
+
+    def known_references(self, paths):
+        """Maps the paths the graph has a node for to their direct references."""
+        return {path: self.references(path) for path in paths if _key(path) in self.nodes}
+
+    def _changed(self, node):
+        """True if the file differs from the state recorded in node (new, missing or modified)."""
+        try:
+            stat = os.stat(node["path"])
+        except OSError:
+            return True
+        if (stat.st_size, stat.st_mtime) == (node.get("size"), node.get("mtime")):
+            return False
+        if node.get("sha256") is None or stat.st_size != node.get("size"):
+            return True
+        if file_hash(node["path"]) != node["sha256"]:
+            return True
+        # Only touched: remember the new mtime so the file is not hashed again
+        node["mtime"] = stat.st_mtime
+        self._dirty = True
+        return False
+
+    def update(self, backend, documents):
+        """Brings the graph up to date for documents and everything they reference; returns the changed paths.
+
+        A document is changed if it is new to the graph or its content
+        differs from the state recorded at its last export. Changed
+        documents are asked for their references again; the new state is
+        only recorded by mark_exported, so a failed export is retried.
+        """
+        changed = []
+        visited = set()
+        stack = list(documents)
+        while stack:
+            path = stack.pop()
+            key = _key(path)
+            if key in visited:
+                continue
+            visited.add(key)
+            node = self.nodes.get(key)
+            if node is None or self._changed(node):
+                changed.append(path)
+                references = None
+                if os.path.exists(path):
+                    try:
+                        references = backend.document_dependencies(path, traverse=False)
+                    except Exception as e:
+                        print(f"Cannot list the references of {path}: {e}")
+                if node is None:
+                    node = self.nodes[key] = {"path": path, "size": None, "mtime": None, "sha256": None,
+                                              "references": []}
+                if references is not None:
+                    node["references"] = list(references)
+                self._dirty = True
+            stack += node["references"]
+        return changed
+
+    def dependents(self, paths):
+        """paths and every document that references one of them, directly or not (as keys)."""
+        referenced_by = {}
+        for key, node in self.nodes.items():
+            for reference in node["references"]:
+                referenced_by.setdefault(_key(reference), []).append(key)
+        found = set()
+        stack = [_key(path) for path in paths]
+        while stack:
+            key = stack.pop()
+            if key in found:
+                continue
+            found.add(key)
+            stack += referenced_by.get(key, [])
+        return found
+
+    def affected(self, changed, targets):
+        """The targets (in their order) that are changed or depend on a changed document."""
+        dependents = self.dependents(changed)
+        return [target for target in targets if _key(target) in dependents]
+
+    def mark_exported(self, path):
+        """Records the current state of path and of everything it references as exported."""
+        stack = [path]
+        seen = set()
+        while stack:
+            path = stack.pop()
+            key = _key(path)
+            node = self.nodes.get(key)
+            if node is None or key in seen:
+                continue
+            seen.add(key)
+            stack += node["references"]
+            try:
+                stat = os.stat(path)
+                # Models shared by many drawings are hashed once
+                if (stat.st_size, stat.st_mtime) == (node["size"], node["mtime"]) and node["sha256"]:
+                    continue
+                sha256 = file_hash(path)
+            except OSError:
+                continue
+            node.update(size=stat.st_size, mtime=stat.st_mtime, sha256=sha256)
+            self._dirty = True
+
+    def mark_failed(self, path):
+        """Forgets the exported state of path, so the next update reports it as changed."""
+        node = self.nodes.get(_key(path))
+        if node is not None:
+            node.update(size=None, mtime=None, sha256=None)
+            self._dirty = True
+
+    def record_run(self, targets, reports):
+        """Records the outcome of exporting targets from their run reports.
+
+        Targets without a result (cancelled, or the run aborted) count as
+        failed, so they are still affected next time.
+        """
+        done = set()
+        for report in reports:
+            for result in report["results"]:
+                path = document_path(result)
+                done.add(_key(path))
+                if result["ok"]:
+                    self.mark_exported(path)
+                else:
+                    self.mark_failed(path)
+        for target in targets:
+            if _key(target) not in done:
+                self.mark_failed(target)
+
+    def save(self):
+        if not self._dirty or not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"version": GRAPH_VERSION, "nodes": self.nodes}, file, indent=1)
+        os.replace(temp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,122 @@
+"""Run reports: per-document results merged into one summary."""
+import os
+
+
+def make_report(results, elapsed, workers=1, cancelled=0, rebuild=None, recycles=None):
+    """Merges per-document results into the run report.
+
+    rebuild is the drawing rebuild policy of the run, if it has one;
+    recycles lists the application restarts of the run (see recycle.py).
+    failures counts the failed documents per failure class and retries the
+    retried attempts per class (see failures.py). For STEP exports,
+    configurations counts the configurations timed and
+    slowest_configuration is the one that took longest. verified counts the
+    output files checked (see verify.py) and pages the PDF pages found in
+    them.
+    """
+    failures, retries = {}, {}
+    for r in results:
+        if not r["ok"]:
+            failure = r.get("failure") or "unknown"
+            failures[failure] = failures.get(failure, 0) + 1
+        for failure in r.get("retried", []):
+            retries[failure] = retries.get(failure, 0) + 1
+    memory = [r["memory_mb"] for r in results if r.get("memory_mb") is not None]
+    timings = [(seconds, document_path(r), name) for r in results
+               for name, seconds in (r.get("configurations") or {}).items()]
+    slowest = max(timings) if timings else None
+    checks = [info for r in results for info in (r.get("verified") or {}).values()]
+    skipped = sum(1 for r in results if r.get("skipped"))
+    exported = sum(1 for r in results if r["ok"]) - skipped
+    return {
+        "results": results,
+        "exported": exported,
+        "skipped": skipped,
+        "failed": len(results) - exported - skipped,
+        "cancelled": cancelled,
+        "rebuild": rebuild,
+        "rebuilt": sum(1 for r in results if r.get("rebuilt")),
+        "timed_out": sum(1 for r in results if r.get("timed_out")),
+        "failures": failures,
+        "retries": retries,
+        "recycles": list(recycles or []),
+        "peak_memory_mb": max(memory) if memory else None,
+        "configurations": len(timings),
+        "slowest_configuration": {"part": slowest[1], "configuration": slowest[2], "seconds": slowest[0]}
+        if slowest else None,
+        "verified": len(checks),
+        "pages": sum(info.get("pages", 0) for info in checks),
+        "workers": workers,
+        "elapsed": elapsed,
+        "throughput": (len(results) - skipped) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def combine_reports(reports):
+    """One report for consecutive runs of one export, e.g. the batches of drawings with different options."""
+    if len(reports) == 1:
+        return reports[0]
+    report = make_report([r for report in reports for r in report["results"]],
+                         sum(report["elapsed"] for report in reports),
+                         workers=max(report["workers"] for report in reports),
+                         cancelled=sum(report["cancelled"] for report in reports),
+                         rebuild=reports[0]["rebuild"],
+                         recycles=[recycle for report in reports for recycle in report["recycles"]])
+    merges = [report["merge"] for report in reports if report.get("merge")]
+    if merges:
+        releases = [merged["release"] for merged in merges if merged["release"]]
+        report["merge"] = {
+            "merged": sum(merged["merged"] for merged in merges),
+            "pages": sum(merged["pages"] for merged in merges),
+            "release": ", ".join(releases) or None,
+            "release_pages": sum(merged["release_pages"] for merged in merges),
+            "errors": [error for merged in merges for error in merged["errors"]],
+        }
+    return report
+
+
+def document_path(result):
+    """Returns the drawing or part a result is about."""
+    return result.get("drawing") or result.get("part")
+
+
+def _counts(counts):
+    return ", ".join(f"{name}: {count}" for name, count in sorted(counts.items()))
+
+
+def summary_line(report):
+    line = f"{report['exported']} exported, {report['skipped']} skipped, {report['failed']} failed"
+    if report.get("failures"):
+        line += f" ({_counts(report['failures'])})"
+    if report.get("retries"):
+        line += f", {sum(report['retries'].values())} retried ({_counts(report['retries'])})"
+    if report.get("rebuild"):
+        line += f", {report['rebuilt']} rebuilt (rebuild: {report['rebuild']})"
+    if report.get("recycles"):
+        reasons = {}
+        for recycle in report["recycles"]:
+            reasons[recycle["reason"]] = reasons.get(recycle["reason"], 0) + 1
+        line += f", {len(report['recycles'])} application restart(s) ({_counts(reasons)})"
+    if report.get("slowest_configuration"):
+        slowest = report["slowest_configuration"]
+        line += (f", {report['configurations']} configuration(s), slowest {os.path.basename(slowest['part'])} "
+                 f"{slowest['configuration']} ({slowest['seconds']:.1f} s)")
+    if report.get("verified"):
+        line += f", {report['verified']} output(s) verified"
+        if report.get("pages"):
+            line += f" ({report['pages']} PDF pages)"
+    if report.get("merge"):
+        merged = report["merge"]
+        line += f", {merged['merged']} drawing PDF(s) merged"
+        if merged["release"]:
+            line += f", release of {merged['release_pages']} page(s)"
+    if report.get("peak_memory_mb") is not None:
+        line += f", peak memory {report['peak_memory_mb']:.0f} MB"
+    return line
+
+
+def print_report(title, report):
+    print(f"{title}: {summary_line(report)} in {report['elapsed']:.1f} s")
+    for result in report["results"]:
+        if not result["ok"]:
+            print(f"  FAILED {document_path(result)} [{result.get('failure') or 'unknown'}]: {result['error']}")
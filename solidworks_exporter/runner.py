@@ -0,0 +1,82 @@
+"""Runs an export in a background thread and reports progress through a queue.
+
+The thread never touches the GUI: it posts (event, payload) tuples that the
+GUI thread drains on its own schedule (e.g. with Tk's root.after):
+
+    ("stage", record)         a stage started (a stage_start record of events.py)
+    ("sheets", record)        a drawing was opened and has record["count"] sheets
+    ("drawing_done", result)  a drawing finished, successfully or not
+    ("finished", report)      the run is over, report is the run report (of all batches)
+    ("error", message)        the run aborted with an exception
+"""
+import queue
+import threading
+
+from . import events
+from .export import export_DRW_Solidworks
+from .report import combine_reports
+
+
+class BackgroundExport:
+    """export_DRW_Solidworks runs on a daemon thread.
+
+    The positional and keyword arguments are those of export_DRW_Solidworks;
+    progress_callback and cancel_event are supplied by this class. batches,
+    if given, lists (args, kwargs) of further runs, e.g. drawings with
+    other export options: each is run after the previous one with
+    kwargs overriding the keyword arguments, and "finished" reports them
+    all as one run.
+    """
+
+    def __init__(self, *args, batches=None, **kwargs):
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self._runs = [(args, kwargs)] + [(batch_args, {**kwargs, **batch_kwargs})
+                                         for batch_args, batch_kwargs in batches or []]
+        self._thread = threading.Thread(target=self._run, name="solidworks-export", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Asks the export to stop after the current drawing."""
+        self.cancel_event.set()
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def poll(self):
+        """Returns the events posted since the last call, without blocking."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _on_event(self, record):
+        if record["event"] == "stage_start":
+            self.events.put(("stage", record))
+        elif record["event"] == "sheets":
+            self.events.put(("sheets", record))
+
+    def _run(self):
+        events.add_listener(self._on_event)
+        try:
+            reports = []
+            for args, kwargs in self._runs:
+                if reports and self.cancel_event.is_set():
+                    # Drawings of the batches not started count as cancelled
+                    reports[-1]["cancelled"] += len(args[0])
+                    continue
+                reports.append(export_DRW_Solidworks(
+                    *args, progress_callback=lambda result: self.events.put(("drawing_done", result)),
+                    cancel_event=self.cancel_event, **kwargs))
+            report = combine_reports(reports)
+        except Exception as e:
+            self.events.put(("error", str(e)))
+        else:
+            self.events.put(("finished", report))
+        finally:
+            events.remove_listener(self._on_event)
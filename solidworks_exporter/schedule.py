@@ -0,0 +1,202 @@
+"""Export order: user priority first, then the estimated cost of each document.
+
+The cost model remembers how long every document took to export in earlier
+runs (an exponentially weighted average, so it follows documents that grow)
+and stores it in the user's home, shared by the UI and the CLI. Documents
+it has not seen yet are estimated from their file size at the median
+seconds per MB of the known ones.
+
+Within a priority, a run with several workers starts the longest documents
+first (LPT), which keeps the makespan short: no heavy drawing is left to
+run alone at the end. A serial run starts the shortest first, so most
+drawings are done early. The same estimates give the remaining time shown
+while an export runs, and the sheet counts it remembers weigh the progress
+bar until the drawings are opened.
+"""
+import json
+import os
+import time
+
+COSTS_VERSION = 1
+
+# Seconds assumed for a document when nothing is known about any document
+DEFAULT_COST = 10.0
+
+# Weight of the newest timing in the average
+_SMOOTHING = 0.5
+
+
+def default_costs_path():
+    return os.path.join(os.path.expanduser("~"), ".solidworks_exporter", "costs.json")
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+class CostModel:
+    """Per-document export seconds learned from earlier runs; path None keeps it in memory only."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.documents = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    data = json.load(file)
+                if data.get("version") == COSTS_VERSION:
+                    self.documents = data.get("documents", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable cost model {path}: {e}")
+        self._rate = None
+
+    def _seconds_per_mb(self):
+        if self._rate is None:
+            rates = sorted(entry["seconds"] / (entry["size"] / 2 ** 20)
+                           for entry in self.documents.values() if entry.get("size"))
+            self._rate = rates[len(rates) // 2] if rates else 0.0
+        return self._rate
+
+    def estimate(self, path):
+        """Estimated export seconds of path."""
+        entry = self.documents.get(_key(path))
+        if entry:
+            return entry["seconds"]
+        size = _size(path)
+        rate = self._seconds_per_mb()
+        if size and rate:
+            return rate * size / 2 ** 20
+        return DEFAULT_COST
+
+    def sheets(self, path):
+        """Sheet count of path in its last export, or None."""
+        entry = self.documents.get(_key(path))
+        return entry.get("sheets") if entry else None
+
+    def record(self, path, seconds, sheets=None):
+        """Adds a measured export time of path (and its sheet count, for drawings)."""
+        key = _key(path)
+        entry = self.documents.get(key)
+        if entry:
+            entry["seconds"] += _SMOOTHING * (seconds - entry["seconds"])
+            entry["runs"] += 1
+        else:
+            entry = self.documents[key] = {"seconds": seconds, "runs": 1}
+        entry["size"] = _size(path)
+        entry["time"] = time.time()
+        if sheets is not None:
+            entry["sheets"] = sheets
+        self._rate = None
+        self._dirty = True
+
+    def record_results(self, results):
+        """Records the elapsed time of every document exported in a run."""
+        for result in results:
+            if result["ok"] and not result.get("skipped") and result.get("elapsed"):
+                self.record(result.get("drawing") or result.get("part"), result["elapsed"], result.get("sheets"))
+
+    def save(self):
+        if not self._dirty or not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            file.write(json.dumps({"version": COSTS_VERSION, "documents": self.documents}))
+        os.replace(temp_path, self.path)
+        self._dirty = False
+
+
+def schedule(paths, costs, priorities=None, workers=1):
+    """paths in export order: higher priority first, then longest first with workers > 1, shortest first otherwise.
+
+    priorities maps a path to its priority (0 when missing); equal
+    documents keep their order.
+    """
+    priorities = priorities or {}
+    estimates = {path: costs.estimate(path) for path in paths}
+    direction = -1 if workers > 1 else 1
+    return sorted(paths, key=lambda path: (-priorities.get(path, 0), direction * estimates[path]))
+
+
+class RemainingTime:
+    """Estimated time left of a running export, from the cost model.
+
+    The estimates of the documents not finished yet are scaled by how the
+    finished ones compared with their estimates, and shared across the
+    workers.
+    """
+
+    def __init__(self, costs, paths, workers=1):
+        self.estimates = {path: costs.estimate(path) for path in paths}
+        self.workers = max(1, workers)
+        self._estimated_done = 0.0
+        self._actual_done = 0.0
+
+    def done(self, path, elapsed=None):
+        estimate = self.estimates.pop(path, None)
+        if estimate is not None and elapsed:
+            self._estimated_done += estimate
+            self._actual_done += elapsed
+
+    def seconds(self):
+        scale = self._actual_done / self._estimated_done if self._estimated_done else 1.0
+        return sum(self.estimates.values()) * scale / min(self.workers, max(1, len(self.estimates)))
+
+
+class SheetProgress:
+    """Progress of a running drawing export counted in sheets, so a 40-sheet drawing weighs 40 one-sheet ones.
+
+    Sheet counts are those of the drawings once opened; until then the
+    count of their last export from the cost model, or the mean of the
+    known counts. Sheets count as done as the next one is activated, and
+    all of a drawing's sheets once it is finished.
+    """
+
+    def __init__(self, costs, paths):
+        self.sheets = {path: costs.sheets(path) for path in paths}
+        self._activated = {}
+        self._finished = set()
+
+    def opened(self, path, count):
+        self.sheets[path] = max(1, count)
+
+    def sheet_started(self, path):
+        self._activated[path] = self._activated.get(path, 0) + 1
+
+    def finished(self, path):
+        self._finished.add(path)
+
+    def _counts(self):
+        known = [count for count in self.sheets.values() if count]
+        estimate = sum(known) / len(known) if known else 1
+        return {path: count or estimate for path, count in self.sheets.items()}
+
+    def total(self):
+        return sum(self._counts().values())
+
+    def done(self):
+        done = 0
+        for path, count in self._counts().items():
+            if path in self._finished:
+                done += count
+            elif path in self._activated:
+                done += min(self._activated[path] - 1, count)
+        return done
+
+
+def format_duration(seconds):
+    """'45 s', '12 min', '2 h 05 min'."""
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} h {minutes % 60:02d} min"
@@ -0,0 +1,279 @@
+"""Project files written by the UI's Save Settings and read by the UI and the CLI.
+
+A project file is JSON lines: a header line with the format name, its
+version and the project-wide settings, then one line per drawing or part
+with its own options:
+
+    {"format": "solidworks-exporter-project", "version": 2, "settings": {"dwg_folder": ..., ...}}
+    {"type": "drawing", "name": "A-100.SLDDRW", "path": ..., "priority": 2, "formats": ["pdf"], "sheets": {"pdf": "combined"}}
+    {"type": "part", "name": "bracket.SLDPRT", "path": ..., "configurations": ["Default", "*-FLAT"]}
+
+Item options left out take the project's settings. Items are read one line
+at a time, so a project of 100,000 drawings never holds the file or a
+parse tree of it in memory, and a bad line is reported with its number.
+Version 1 files, the single JSON object the UI saved before, are migrated
+on load and written back as version 2 on the next save. Saving writes a
+temporary file and swaps it in, so a crash never leaves a truncated project.
+
+In memory a project is the settings dict of version 1, whatever the file
+version: drawings and parts are rows, see DEFAULT_SETTINGS.
+"""
+import json
+import os
+
+PROJECT_FORMAT = "solidworks-exporter-project"
+PROJECT_VERSION = 2
+
+# Keys of a settings file and their defaults
+DEFAULT_SETTINGS = {
+    "dwg_folder": "",
+    "pdf_folder": "",
+    "step_folder": "",
+    "export_dwg": False,  # individual DWG sheets
+    "export_pdf": False,  # individual PDF sheets
+    "flag_export_dwg": True,
+    "flag_export_pdf": True,
+    "workers": 1,
+    "incremental": False,
+    "rebuild": "always",  # see export.REBUILD_POLICIES
+    "recycle": {},  # application restarts: documents, memory_mb, slow_seconds (see recycle.py)
+    "timeouts": {},  # seconds per stage: open, rebuild, save, document, ... (see timeouts.py)
+    "retry": {},  # retry policy: classes, max_retries, backoff, max_backoff (see failures.py)
+    "locality": False,  # export drawings sharing models together (see locality.py)
+    "heavy_assemblies": {},  # STEP pool cap: size_mb, max_concurrent (see export.HEAVY_DEFAULTS)
+    "verify": True,  # check every output file while exporting (see verify.py)
+    "merge": {},  # merging individual PDF sheets: drawings, release, folder (see merge.py)
+    # [file name, file path], [file name, file path, priority] or [file name, file path, priority, options]
+    # rows; options may hold "formats" (["pdf", "dwg"]) and "sheets" ({"pdf": "individual", "dwg": "combined"})
+    "drawings": [],
+    "parts": [],  # [file name, file path] or [file name, file path, [configuration names or globs]] rows
+    "source_folders": [],  # project roots scanned for more drawings and parts (see discovery.py)
+    "include": [],  # glob patterns for the scan
+    "exclude": [],
+}
+
+# Type of every project-wide setting, checked on load
+SETTINGS_SCHEMA = {
+    "dwg_folder": str,
+    "pdf_folder": str,
+    "step_folder": str,
+    "export_dwg": bool,
+    "export_pdf": bool,
+    "flag_export_dwg": bool,
+    "flag_export_pdf": bool,
+    "workers": int,
+    "incremental": bool,
+    "rebuild": str,
+    "recycle": dict,
+    "timeouts": dict,
+    "retry": dict,
+    "locality": bool,
+    "heavy_assemblies": dict,
+    "verify": bool,
+    "merge": dict,
+    "source_folders": list,
+    "include": list,
+    "exclude": list,
+}
+
+# Fields of the item lines: name -> (type, required)
+ITEM_SCHEMA = {
+    "drawing": {"name": (str, False), "path": (str, True), "priority": (int, False), "formats": (list, False),
+                "sheets": (dict, False)},
+    "part": {"name": (str, False), "path": (str, True), "configurations": (list, False)},
+}
+
+DRAWING_FORMATS = ("pdf", "dwg")
+SHEET_MODES = ("individual", "combined")
+
+
+def _check_type(value, expected, where):
+    # bool is an int subclass, but true is no worker count or priority
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ValueError(f"{where} must be {expected.__name__}, not {type(value).__name__}")
+
+
+def validate_settings(settings, where="settings"):
+    """Raises ValueError if a project-wide setting has the wrong type; unknown keys are kept as they are."""
+    if not isinstance(settings, dict):
+        raise ValueError(f"{where} must be an object")
+    for key, expected in SETTINGS_SCHEMA.items():
+        if key in settings:
+            _check_type(settings[key], expected, f"{where}: {key}")
+
+
+def validate_item(item, where="item"):
+    """Raises ValueError unless item is a valid drawing or part line."""
+    if not isinstance(item, dict) or item.get("type") not in ITEM_SCHEMA:
+        raise ValueError(f"{where} must be an object with a type of {' or '.join(ITEM_SCHEMA)}")
+    for field, (expected, required) in ITEM_SCHEMA[item["type"]].items():
+        if field in item:
+            _check_type(item[field], expected, f"{where}: {field}")
+        elif required:
+            raise ValueError(f"{where}: {field} is missing")
+    for file_format in item.get("formats", ()):
+        if file_format not in DRAWING_FORMATS:
+            raise ValueError(f"{where}: unknown format {file_format!r}")
+    for file_format, mode in item.get("sheets", {}).items():
+        if file_format not in DRAWING_FORMATS or mode not in SHEET_MODES:
+            raise ValueError(f"{where}: sheets must map pdf/dwg to {' or '.join(SHEET_MODES)}")
+    if not all(isinstance(name, str) for name in item.get("configurations", ())):
+        raise ValueError(f"{where}: configurations must be names")
+
+
+def _row(item):
+    """The settings row of an item line."""
+    name = item.get("name") or os.path.basename(item["path"])
+    if item["type"] == "part":
+        return [name, item["path"], item["configurations"]] if item.get("configurations") else [name, item["path"]]
+    options = {key: item[key] for key in ("formats", "sheets") if key in item}
+    row = [name, item["path"], item.get("priority", 0)]
+    return row + [options] if options else row
+
+
+def _item(kind, row):
+    """The item line of a settings row (of a version 1 file or of the settings in memory)."""
+    item = {"type": kind, "name": row[0], "path": row[1]}
+    if kind == "part":
+        if len(row) > 2 and row[2]:
+            item["configurations"] = list(row[2])
+        return item
+    if len(row) > 2 and row[2] not in (None, ""):
+        item["priority"] = int(row[2])
+    if len(row) > 3 and row[3]:
+        item.update(row[3])
+    return item
+
+
+def iter_project(file_path):
+    """Yields ("settings", dict) and then ("drawing" | "part", row) for every item of a project file.
+
+    A version 1 file is migrated on the fly. Raises ValueError for a file
+    that is not a project, a newer version, or an invalid line.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        first = file.readline()
+        try:
+            header = json.loads(first)
+        except ValueError:
+            header = None
+        if not (isinstance(header, dict) and header.get("format") == PROJECT_FORMAT):
+            # Version 1: one JSON object, usually indented over many lines
+            file.seek(0)
+            yield from _migrate_v1(json.load(file), file_path)
+            return
+        if not isinstance(header.get("version"), int) or header["version"] > PROJECT_VERSION:
+            raise ValueError(f"{file_path} is a project of version {header.get('version')}, "
+                             f"this version reads up to {PROJECT_VERSION}")
+        settings = header.get("settings", {})
+        validate_settings(settings, f"{file_path}:1")
+        yield "settings", settings
+        for number, line in enumerate(file, 2):
+            if not line.strip():
+                continue
+            where = f"{file_path}:{number}"
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{where}: {e}") from None
+            validate_item(item, where)
+            yield item["type"], _row(item)
+
+
+def _migrate_v1(settings, file_path):
+    if not isinstance(settings, dict):
+        raise ValueError(f"{file_path} is not a settings file")
+    settings = dict(settings)
+    rows = {"drawing": settings.pop("drawings", []), "part": settings.pop("parts", [])}
+    validate_settings(settings, file_path)
+    yield "settings", settings
+    for kind, kind_rows in rows.items():
+        for number, row in enumerate(kind_rows):
+            where = f"{file_path}: {kind}s[{number}]"
+            if not isinstance(row, list) or len(row) < 2:
+                raise ValueError(f"{where} must be a [file name, file path, ...] row")
+            try:
+                item = _item(kind, row)
+            except (TypeError, ValueError):
+                raise ValueError(f"{where} has an invalid priority or configurations") from None
+            validate_item(item, where)
+            yield kind, _row(item)
+
+
+def load_settings_file(file_path):
+    """Reads a project file of any version, filling in defaults for missing keys."""
+    settings = {}
+    drawings, parts = [], []
+    for kind, value in iter_project(file_path):
+        if kind == "settings":
+            settings = value
+        elif kind == "drawing":
+            drawings.append(value)
+        else:
+            parts.append(value)
+    return {**DEFAULT_SETTINGS, **settings, "drawings": drawings, "parts": parts}
+
+
+def save_settings_file(file_path, settings):
+    """Writes settings as a version 2 project file, atomically."""
+    header = {key: value for key, value in settings.items() if key not in ("drawings", "parts")}
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(json.dumps({"format": PROJECT_FORMAT, "version": PROJECT_VERSION, "settings": header}) + "\n")
+        for kind, key in (("drawing", "drawings"), ("part", "parts")):
+            for row in settings.get(key, []):
+                file.write(json.dumps(_item(kind, row)) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+
+
+def drawing_paths(settings):
+    return [row[1] for row in settings["drawings"]]
+
+
+def drawing_priorities(settings):
+    """Maps each drawing path to its priority, for drawings that have one."""
+    return {row[1]: int(row[2]) for row in settings["drawings"] if len(row) > 2 and row[2] not in (None, "")}
+
+
+def part_paths(settings):
+    return [row[1] for row in settings["parts"]]
+
+
+def scan_source_folders(settings):
+    """Scans the settings' source folders; returns the (drawings, parts and assemblies) found, without duplicates."""
+    from .discovery import default_index_path, scan_documents
+    drawings, parts = [], []
+    for folder in settings["source_folders"]:
+        found = scan_documents(folder, settings["include"], settings["exclude"], default_index_path(folder))
+        drawings += found["drawings"]
+        parts += found["parts"] + found["assemblies"]
+    return list(dict.fromkeys(drawings)), list(dict.fromkeys(parts))
+
+
+def part_configurations(settings):
+    """Maps each part path to its selected configurations, for parts that restrict them."""
+    return {row[1]: list(row[2]) for row in settings["parts"] if len(row) > 2 and row[2]}
+
+
+def drawing_option_sets(settings, drawings):
+    """Splits drawings into runs of the same export options, as (options, drawings) tuples.
+
+    options holds the export_DRW_Solidworks flags flag_export_pdf,
+    flag_export_dwg, export_pdf and export_dwg: the project's, overridden
+    by the formats and sheets of the drawing's row. Drawings without a row
+    (found in the source folders) take the project's.
+    """
+    row_options = {row[1]: row[3] for row in settings["drawings"] if len(row) > 3 and row[3]}
+    sets = {}
+    for drawing_path in drawings:
+        options = {key: settings[key] for key in ("flag_export_pdf", "flag_export_dwg", "export_pdf", "export_dwg")}
+        own = row_options.get(drawing_path, {})
+        if "formats" in own:
+            options["flag_export_pdf"] = "pdf" in own["formats"]
+            options["flag_export_dwg"] = "dwg" in own["formats"]
+        for file_format, mode in own.get("sheets", {}).items():
+            options[f"export_{file_format}"] = mode == "individual"
+        sets.setdefault(tuple(sorted(options.items())), []).append(drawing_path)
+    return [(dict(options), paths) for options, paths in sets.items()]
@@ -0,0 +1,266 @@
+"""Drawing and part tables for lists of many thousands of rows.
+
+RowModel holds the rows in memory: inserts and deletes are batched, rows
+are unique by path, and a filter narrows the visible rows by a text found
+in any column (name, path, status...). VirtualTable shows a model in a
+ttk.Treeview that only ever holds one screenful of items: scrolling puts
+other rows' values into the same items, so loading, scrolling and
+deleting cost the same for 20 rows as for 20,000.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+# Modifier bits of a Tk event's state
+_SHIFT = 0x0001
+_CONTROL = 0x0004
+
+
+class RowModel:
+    """Rows of a table, each a list of column values, unique by the value in key_column."""
+
+    def __init__(self, columns, key_column=1):
+        self.columns = tuple(columns)
+        self.key_column = key_column
+        self.rows = []
+        # Key -> row index
+        self._keys = {}
+        self._filter = ""
+        # Indexes of the rows passing the filter, in order
+        self.visible = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, name):
+        return self.columns.index(name)
+
+    def extend(self, rows):
+        """Appends the rows whose key is not in the table yet; returns how many were added."""
+        added = 0
+        for row in rows:
+            row = list(row)
+            if row[self.key_column] in self._keys:
+                continue
+            self._keys[row[self.key_column]] = len(self.rows)
+            self.rows.append(row)
+            if self._matches(row):
+                self.visible.append(len(self.rows) - 1)
+            added += 1
+        return added
+
+    def delete(self, indexes):
+        """Removes the rows at indexes in one pass."""
+        doomed = set(indexes)
+        if not doomed:
+            return
+        self.rows = [row for index, row in enumerate(self.rows) if index not in doomed]
+        self._keys = {row[self.key_column]: index for index, row in enumerate(self.rows)}
+        self.refilter()
+
+    def clear(self):
+        self.rows = []
+        self._keys = {}
+        self.visible = []
+
+    def set(self, indexes, column, value, refilter=True):
+        """Sets one column of the rows at indexes.
+
+        With refilter the filter is applied again at once; batches of updates
+        pass False and call refilter() when done.
+        """
+        position = self.column(column)
+        for index in indexes:
+            self.rows[index][position] = value
+        if refilter and self._filter:
+            self.refilter()
+
+    def keys(self):
+        return [row[self.key_column] for row in self.rows]
+
+    def index_of(self, key):
+        """Row index of key, or None."""
+        return self._keys.get(key)
+
+    def filtering(self):
+        return bool(self._filter)
+
+    def filter(self, text):
+        """Shows only the rows with text in any column (case-insensitive); "" shows them all."""
+        self._filter = text.strip().lower()
+        self.refilter()
+
+    def _matches(self, row):
+        return not self._filter or any(self._filter in str(value).lower() for value in row)
+
+    def refilter(self):
+        """Applies the filter again, e.g. after rows changed with refilter=False."""
+        if self._filter:
+            self.visible = [index for index, row in enumerate(self.rows) if self._matches(row)]
+        else:
+            self.visible = list(range(len(self.rows)))
+
+
+class VirtualTable:
+    """A Treeview of item slots showing a window of a RowModel's visible rows.
+
+    There are as many slots as rows fit in the widget, height at first and
+    recomputed from the row height whenever the widget is resized.
+    selected holds the row indexes (into model.rows) the user selected,
+    whether they are scrolled into view or not. Call refresh() after
+    changing the model.
+    """
+
+    def __init__(self, parent, model, height=15, widths=None, anchors=None):
+        self.model = model
+        self.height = height
+        self.top = 0
+        self.selected = set()
+        # Slots refresh() selected: its <<TreeviewSelect>> arrives later, as an event, and must be told apart
+        self._expected = set()
+        # True from a click until the events it caused are handled
+        self._clicked = False
+        # (y of the first row, row height) in pixels once measured, and the height of the widget
+        self._row_geometry = None
+        self._tree_height = None
+
+        self.frame = tk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=model.columns, show="headings", height=height,
+                                 selectmode="extended")
+        for name in model.columns:
+            self.tree.heading(name, text=name)
+            self.tree.column(name, width=(widths or {}).get(name, 100), anchor=(anchors or {}).get(name, "w"))
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar_y = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar_y.grid(row=0, column=1, sticky="ns")
+        self.scrollbar_x = ttk.Scrollbar(self.frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.scrollbar_x.set)
+        self.scrollbar_x.grid(row=1, column=0, sticky="ew")
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+
+        self._slots = [self.tree.insert("", "end", iid=f"slot{i}", values=()) for i in range(height)]
+        self.tree.bind("<ButtonPress-1>", self._on_click)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.height))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.height))
+        self.tree.bind("<Control-a>", self._select_all)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.refresh()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def _row_at(self, slot_position):
+        position = self.top + slot_position
+        return self.model.visible[position] if position < len(self.model.visible) else None
+
+    def refresh(self):
+        """Fills the slots with the rows at the scroll position and restores their selection."""
+        self.top = max(0, min(self.top, len(self.model.visible) - self.height))
+        selection = []
+        for slot_position, slot in enumerate(self._slots):
+            index = self._row_at(slot_position)
+            if index is None:
+                self.tree.detach(slot)
+                continue
+            self.tree.move(slot, "", slot_position)
+            self.tree.item(slot, values=self.model.rows[index])
+            if index in self.selected:
+                selection.append(slot)
+        self._expected = set(selection)
+        self.tree.selection_set(selection)
+        total = len(self.model.visible)
+        if total:
+            self.scrollbar_y.set(self.top / total, min(1.0, (self.top + self.height) / total))
+        else:
+            self.scrollbar_y.set(0.0, 1.0)
+        if self._row_geometry is None and self._tree_height:
+            # The first rows just arrived: now the row height can be measured
+            self.tree.after_idle(self._fit)
+
+    def _on_configure(self, event):
+        self._tree_height = event.height
+        self._fit()
+
+    def _fit(self):
+        """Makes as many slots as rows fit in the widget."""
+        if self._row_geometry is None:
+            box = self.tree.bbox(self._slots[0]) if self.tree.exists(self._slots[0]) else ""
+            if not box or not box[3]:
+                # Nothing shown yet to measure; refresh() tries again
+                return
+            self._row_geometry = (box[1], box[3])
+        top, row_height = self._row_geometry
+        height = max(1, (self._tree_height - top) // row_height)
+        if height == self.height:
+            return
+        for i in range(len(self._slots), height):
+            self._slots.append(self.tree.insert("", "end", iid=f"slot{i}", values=()))
+        for slot in self._slots[height:]:
+            self.tree.delete(slot)
+        del self._slots[height:]
+        self.height = height
+        self.refresh()
+
+    def refresh_rows(self, indexes):
+        """Updates the values of the given rows if they are in view; cheaper than refresh()."""
+        indexes = set(indexes)
+        for slot_position, slot in enumerate(self._slots):
+            index = self._row_at(slot_position)
+            if index is not None and index in indexes:
+                self.tree.item(slot, values=self.model.rows[index])
+
+    def scroll(self, rows):
+        self.top += rows
+        self.refresh()
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")."""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.model.visible))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self.top += step
+        self.refresh()
+
+    def _on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_click(self, event):
+        # A plain click starts a new selection, dropping the rows scrolled out of view too
+        if not event.state & (_SHIFT | _CONTROL):
+            self.selected = set()
+        self._clicked = True
+        # Idle callbacks run once the queued <<TreeviewSelect>> of the click is handled
+        self.tree.after_idle(self._click_handled)
+
+    def _click_handled(self):
+        self._clicked = False
+
+    def _on_select(self, event):
+        # Only the user changes the selection; refresh() re-selecting slots leaves it as it set it
+        chosen = set(self.tree.selection())
+        if chosen == self._expected and not self._clicked:
+            return
+        self._expected = chosen
+        for slot_position, slot in enumerate(self._slots):
+            index = self._row_at(slot_position)
+            if index is None:
+                continue
+            if slot in chosen:
+                self.selected.add(index)
+            else:
+                self.selected.discard(index)
+
+    def _select_all(self, event):
+        self.selected = set(self.model.visible)
+        self.refresh()
+        return "break"
+
+    def clear_selection(self):
+        self.selected = set()
+        self.refresh()
@@ -0,0 +1,120 @@
+"""Stage timeouts: keeping a batch going past documents that hang the CAD application.
+
+A drawing with a broken reference can block OpenDoc6 or SaveAs3 forever.
+The timeouts setting maps stage names (see events.py) to the seconds a
+stage may take, e.g.
+
+    {"open": 300, "rebuild": 600, "save": 300, "document": 1800}
+
+where "save" covers the save_pdf, save_dwg and save_step stages that have
+no timeout of their own. StageDeadlines follows the stages as an events
+listener. A blocked COM call cannot be interrupted from Python, so an
+expired stage is ended by killing the application: the pool kills the
+stuck worker process and its application and starts a new worker, a serial
+run kills the application from a Watchdog thread, which makes the blocked
+call fail, and starts a new one. The document is reported as timed out and
+not retried, and the rest of the queue carries on.
+"""
+import threading
+import time
+
+from . import events
+
+
+def stage_timeout(timeouts, stage):
+    """Seconds stage may take, or None."""
+    if not timeouts:
+        return None
+    limit = timeouts.get(stage)
+    if limit is None and stage.startswith("save_"):
+        limit = timeouts.get("save")
+    return limit or None
+
+
+def timeouts_enabled(timeouts):
+    return bool(timeouts) and any(timeouts.values())
+
+
+def mark_timed_out(result, stage, limit):
+    """Turns result into the result of a document whose stage timed out."""
+    result.update(ok=False, timed_out=stage, failure="timeout", error=f"timed out in {stage} after {limit:g} s")
+    return result
+
+
+class StageDeadlines:
+    """Event listener tracking the deadlines of the timed stages in progress.
+
+    on_change, if given, is called with current() whenever a timed stage
+    starts or ends.
+    """
+
+    def __init__(self, timeouts, on_change=None):
+        self.timeouts = timeouts or {}
+        self.on_change = on_change
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        if record["event"] == "stage_start":
+            limit = stage_timeout(self.timeouts, record["stage"])
+            entry = (record["stage"], limit, time.monotonic() + limit if limit else None)
+            with self._lock:
+                self._stack.append(entry)
+        elif record["event"] == "stage_end":
+            with self._lock:
+                entry = self._stack.pop() if self._stack else None
+        else:
+            return
+        if entry and entry[1] and self.on_change:
+            self.on_change(self.current())
+
+    def current(self):
+        """(stage, limit, deadline) of the timed stage in progress that expires first, or None."""
+        with self._lock:
+            timed = [entry for entry in self._stack if entry[1]]
+        return min(timed, key=lambda entry: entry[2]) if timed else None
+
+    def reset(self):
+        with self._lock:
+            self._stack = []
+
+
+class Watchdog:
+    """Thread calling on_timeout(stage, limit) once a timed stage of this process runs past its deadline.
+
+    It fires once per document: take_expired() returns the (stage, limit)
+    that expired, if any, and re-arms it.
+    """
+
+    def __init__(self, timeouts, on_timeout):
+        self.deadlines = StageDeadlines(timeouts)
+        self.on_timeout = on_timeout
+        self.expired = None
+        self._interval = min([0.5] + [limit / 4 for limit in timeouts.values() if limit])
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="solidworks-watchdog", daemon=True)
+
+    def start(self):
+        events.add_listener(self.deadlines)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        events.remove_listener(self.deadlines)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            current = self.deadlines.current()
+            if self.expired is None and current and time.monotonic() > current[2]:
+                self.expired = current[:2]
+                print(f"{current[0]} did not finish within {current[1]:g} s, killing the application")
+                try:
+                    self.on_timeout(*self.expired)
+                except Exception as e:
+                    print(f"Could not kill the application: {e}")
+
+    def take_expired(self):
+        expired, self.expired = self.expired, None
+        self.deadlines.reset()
+        return expired
@@ -0,0 +1,491 @@
+"""Tk front-end: collects the export settings and runs the engine in the background.
+
+Nothing happens at import time; call main() (or run solidworks_exporter_UI.py)
+to open the window.
+"""
+import os
+import time
+import tkinter as tk
+from tkinter import filedialog, messagebox, simpledialog, ttk
+
+from .discovery import default_index_path, scan_documents
+from .export import REBUILD_POLICIES
+from .merge import batch_policy
+from .report import summary_line
+from .runner import BackgroundExport
+from .schedule import CostModel, RemainingTime, SheetProgress, default_costs_path, format_duration
+from .settings import DEFAULT_SETTINGS, drawing_option_sets, load_settings_file, save_settings_file
+from .table import RowModel, VirtualTable
+
+# How often the window checks the background export for progress (ms)
+POLL_INTERVAL_MS = 100
+
+# How often the table, progress bar and status bar are repainted during an export (ms), however
+# many events arrive in between
+REFRESH_INTERVAL_MS = 250
+
+# Resolution of the progress bar
+PROGRESS_STEPS = 1000
+
+# Columns of the drawing table; only the first three are saved in the settings
+DRAWING_COLUMNS = ("File Name", "File Path", "Priority", "Status", "Time")
+
+# Status shown in a drawing's row when one of its stages starts (see events.py)
+_STAGE_STATUS = {
+    "document": "opening",
+    "open": "opening",
+    "rebuild": "rebuilding",
+    "activate_sheet": "exporting",
+    "save_pdf": "exporting PDF",
+    "save_dwg": "exporting DWG",
+    "close": "closing",
+    "verify": "verifying",
+}
+
+
+class ExporterApp:
+    def __init__(self, root):
+        self.root = root
+        root.title("SolidWorks Drawing Exporter")
+
+        # The running BackgroundExport, if any, its estimated time left and progress in sheets
+        self.current_export = None
+        self.remaining_time = None
+        self.sheet_progress = None
+        # During an export: row index of every drawing path, start time of the rows in progress,
+        # rows changed since the last repaint, the status bar text and the time of the last repaint
+        self.row_of = {}
+        self.running = {}
+        self._dirty = set()
+        self._status_text = ""
+        self._painted = 0.0
+
+        # Folder selection
+        self.dwg_folder_var = tk.StringVar()
+        self.pdf_folder_var = tk.StringVar()
+
+        # Checkboxes for individual sheet export
+        self.dwg_var = tk.BooleanVar()
+        self.pdf_var = tk.BooleanVar()
+
+        self.flag_export_dwg = tk.BooleanVar(value=True)
+        self.flag_export_pdf = tk.BooleanVar(value=True)
+
+        # Number of SolidWorks instances exporting in parallel
+        self.workers_var = tk.IntVar(value=1)
+
+        # Incremental export: skip drawings whose outputs are up to date, unless forced
+        self.incremental_var = tk.BooleanVar(value=False)
+        self.force_var = tk.BooleanVar(value=False)
+
+        # When drawings are rebuilt before exporting (see export.REBUILD_POLICIES)
+        self.rebuild_var = tk.StringVar(value="always")
+
+        # Application recycle policy, stage timeouts, retry policy and PDF merge policy (see recycle.py,
+        # timeouts.py, failures.py and merge.py); edited in the settings file, kept through load and save
+        self.recycle = {}
+        self.timeouts = {}
+        self.retry = {}
+        self.merge = {}
+        # The loaded project: what the window does not edit (parts, STEP, verification, source folders, ...)
+        # is saved back unchanged
+        self.project = {}
+
+        # Export drawings sharing models together (see locality.py)
+        self.locality_var = tk.BooleanVar(value=False)
+
+        # The drawings to export, as [file name, file path, priority] rows, and the filter of their table
+        self.drawings = RowModel(DRAWING_COLUMNS)
+        # Options of single drawings from the project file (formats, sheets), kept for the next save
+        self.drawing_options = {}
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.apply_filter())
+
+        self._build_widgets()
+
+    def _build_widgets(self):
+        root = self.root
+
+        tk.Label(root, text="DWG Export Folder:").grid(row=0, column=0, sticky="w")
+        tk.Entry(root, textvariable=self.dwg_folder_var, width=50).grid(row=0, column=1)
+        tk.Button(root, text="Browse", command=self.select_dwg_folder).grid(row=0, column=2)
+
+        tk.Label(root, text="PDF Export Folder:").grid(row=1, column=0, sticky="w")
+        tk.Entry(root, textvariable=self.pdf_folder_var, width=50).grid(row=1, column=1)
+        tk.Button(root, text="Browse", command=self.select_pdf_folder).grid(row=1, column=2)
+
+        # Checkboxes
+        tk.Checkbutton(root, text="Export DWG", variable=self.flag_export_dwg).grid(row=2, column=0, columnspan=1, sticky="w")
+        tk.Checkbutton(root, text="Export individual DWG sheets", variable=self.dwg_var).grid(row=2, column=1, columnspan=2, sticky="w")
+
+        tk.Checkbutton(root, text="Export PDF", variable=self.flag_export_pdf).grid(row=3, column=0, columnspan=1, sticky="w")
+        tk.Checkbutton(root, text="Export individual PDF sheets", variable=self.pdf_var).grid(row=3, column=1, columnspan=2, sticky="w")
+
+        # File selection
+        selection_frame = tk.Frame(root)
+        selection_frame.grid(row=4, column=0, columnspan=3, pady=5)
+        tk.Button(selection_frame, text="Select Drawings", command=self.select_drawings).pack(side="left", padx=5)
+        tk.Button(selection_frame, text="Add Folder", command=self.add_folder).pack(side="left", padx=5)
+        tk.Label(selection_frame, text="Filter:").pack(side="left", padx=(15, 0))
+        tk.Entry(selection_frame, textvariable=self.filter_var, width=30).pack(side="left")
+
+        # Table with the drawings and their export priority; only the rows in view exist as Treeview items
+        self.drawings_list = VirtualTable(root, self.drawings,
+                                          widths={"File Name": 150, "File Path": 300, "Priority": 60,
+                                                  "Status": 120, "Time": 60},
+                                          anchors={"Priority": "e", "Time": "e"})
+        self.drawings_list.grid(row=5, column=0, columnspan=4, rowspan=2, padx=5, pady=5, sticky="nsew")
+
+        # Delete and priority buttons
+        edit_frame = tk.Frame(root)
+        edit_frame.grid(row=7, column=0, columnspan=3, pady=5)
+        tk.Button(edit_frame, text="Delete Selected", command=self.delete_selected).pack(side="left", padx=5)
+        tk.Button(edit_frame, text="Set Priority", command=self.set_priority).pack(side="left", padx=5)
+
+        # Parallel workers
+        tk.Label(root, text="SolidWorks instances:").grid(row=8, column=0, sticky="w")
+        tk.Spinbox(root, from_=1, to=os.cpu_count() or 1, textvariable=self.workers_var, width=5).grid(row=8, column=1, sticky="w")
+        tk.Checkbutton(root, text="Skip up-to-date drawings", variable=self.incremental_var).grid(row=8, column=1, sticky="e")
+        tk.Checkbutton(root, text="Force re-export", variable=self.force_var).grid(row=8, column=2, sticky="w")
+        tk.Checkbutton(root, text="Group by model", variable=self.locality_var).grid(row=8, column=2, sticky="e")
+
+        # Export and Cancel buttons
+        self.export_button = tk.Button(root, text="Export", command=self.export_drawings)
+        self.export_button.grid(row=9, column=0, columnspan=2, pady=10)
+        self.cancel_button = tk.Button(root, text="Cancel", command=self.cancel_export, state=tk.DISABLED)
+        self.cancel_button.grid(row=9, column=2, pady=10)
+
+        # Progress bar
+        self.progress_bar = ttk.Progressbar(root, orient="horizontal", length=300, mode="determinate")
+        self.progress_bar.grid(row=10, column=0, columnspan=3, pady=5)
+        self.progress_bar.grid_remove()
+
+        # Save and Load buttons
+        tk.Button(root, text="Save Settings", command=self.save_settings).grid(row=11, column=0, pady=5)
+        tk.Button(root, text="Load Settings", command=self.load_settings).grid(row=11, column=1, pady=5)
+
+        # Rebuild policy
+        rebuild_frame = tk.Frame(root)
+        rebuild_frame.grid(row=11, column=2, pady=5)
+        tk.Label(rebuild_frame, text="Rebuild:").pack(side="left")
+        ttk.Combobox(rebuild_frame, textvariable=self.rebuild_var, values=REBUILD_POLICIES, state="readonly",
+                     width=12).pack(side="left")
+
+        # Status Bar
+        self.status_bar = tk.Label(root, text="Ready", bd=1, relief=tk.SUNKEN, anchor="w")
+        self.status_bar.grid(row=12, column=0, columnspan=3, sticky="we")
+
+    def select_dwg_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.dwg_folder_var.set(folder)
+            self.status_bar.config(text="DWG folder selected")
+
+    def select_pdf_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.pdf_folder_var.set(folder)
+            self.status_bar.config(text="PDF folder selected")
+
+    def select_drawings(self):
+        files = filedialog.askopenfilenames(filetypes=[("SolidWorks Drawings", "*.SLDDRW")])
+        self.drawings.extend((os.path.basename(file), file, 0, "", "") for file in files)
+        self.drawings_list.refresh()
+        self.status_bar.config(text="Drawings selected")
+
+    def add_folder(self):
+        """Adds every drawing under a folder and its subfolders that is not listed yet."""
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        self.status_bar.config(text=f"Scanning {folder}...")
+        self.root.update_idletasks()
+        found = scan_documents(folder, index_path=default_index_path(folder))["drawings"]
+        added = self.drawings.extend((os.path.basename(path), path, 0, "", "") for path in found)
+        self.drawings_list.refresh()
+        self.status_bar.config(text=f"{added} drawings added from {folder}")
+
+    def delete_selected(self):
+        if self.export_running():
+            messagebox.showwarning("Delete", "Drawings cannot be removed while an export is running.")
+            return
+        self.drawings.delete(self.drawings_list.selected)
+        self.drawings_list.clear_selection()
+        self.status_bar.config(text="Selected drawings deleted")
+
+    def apply_filter(self):
+        """Shows only the drawings whose name, path or other columns contain the filter text."""
+        self.drawings.filter(self.filter_var.get())
+        self.drawings_list.top = 0
+        self.drawings_list.refresh()
+
+    def set_priority(self):
+        """Sets the priority of the selected drawings; higher priorities are exported first."""
+        selected_items = self.drawings_list.selected
+        if not selected_items:
+            messagebox.showwarning("Priority", "Select the drawings to prioritise first.")
+            return
+        priority = simpledialog.askinteger("Priority", "Priority (higher is exported first):",
+                                           initialvalue=0, parent=self.root)
+        if priority is None:
+            return
+        self.drawings.set(selected_items, "Priority", priority)
+        self.drawings_list.refresh()
+        self.status_bar.config(text=f"Priority {priority} set for {len(selected_items)} drawing(s)")
+
+    def current_settings(self):
+        """The settings shown in the window over those of the loaded project, as saved in a project file."""
+        return {
+            **self.project,
+            "dwg_folder": self.dwg_folder_var.get(),
+            "pdf_folder": self.pdf_folder_var.get(),
+            "export_dwg": self.dwg_var.get(),
+            "export_pdf": self.pdf_var.get(),
+            "flag_export_dwg": self.flag_export_dwg.get(),
+            "flag_export_pdf": self.flag_export_pdf.get(),
+            "workers": self.workers_var.get(),
+            "incremental": self.incremental_var.get(),
+            "rebuild": self.rebuild_var.get(),
+            "recycle": self.recycle,
+            "timeouts": self.timeouts,
+            "retry": self.retry,
+            "merge": self.merge,
+            "locality": self.locality_var.get(),
+            "drawings": [row[:3] + ([self.drawing_options[row[1]]] if row[1] in self.drawing_options else [])
+                         for row in self.drawings.rows]
+        }
+
+    def save_settings(self):
+        settings = self.current_settings()
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if file_path:
+            save_settings_file(file_path, settings)
+
+    def load_settings(self):
+        if self.export_running():
+            messagebox.showwarning("Load Settings", "Settings cannot be loaded while an export is running.")
+            return
+        file_path = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")])
+        if file_path:
+            try:
+                settings = load_settings_file(file_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Load Settings", f"Cannot read {file_path}:\n{e}")
+                return
+            self.project = settings
+            self.dwg_folder_var.set(settings["dwg_folder"])
+            self.pdf_folder_var.set(settings["pdf_folder"])
+            self.dwg_var.set(settings["export_dwg"])
+            self.pdf_var.set(settings["export_pdf"])
+            self.flag_export_dwg.set(settings["flag_export_dwg"])
+            self.flag_export_pdf.set(settings["flag_export_pdf"])
+            self.workers_var.set(settings["workers"])
+            self.incremental_var.set(settings["incremental"])
+            self.rebuild_var.set(settings["rebuild"])
+            self.recycle = settings["recycle"]
+            self.timeouts = settings["timeouts"]
+            self.retry = settings["retry"]
+            self.merge = settings["merge"]
+            self.locality_var.set(settings["locality"])
+            self.drawings.clear()
+            # Rows of older settings files have no priority
+            self.drawings.extend((list(drawing) + [0])[:3] + ["", ""] for drawing in settings["drawings"])
+            self.drawing_options = {drawing[1]: drawing[3] for drawing in settings["drawings"] if len(drawing) > 3}
+            self.drawings_list.clear_selection()
+
+    def export_drawings(self):
+        export_folder_dwg = self.dwg_folder_var.get()
+        export_folder_pdf = self.pdf_folder_var.get()
+        export_individual_sheets_dwg = self.dwg_var.get()
+        export_individual_sheets_pdf = self.pdf_var.get()
+        flag_export_dwg = self.flag_export_dwg.get()
+        flag_export_pdf = self.flag_export_pdf.get()
+        workers = self.workers_var.get()
+        incremental = self.incremental_var.get()
+        force = self.force_var.get()
+        rebuild = self.rebuild_var.get()
+        locality = self.locality_var.get()
+        verify = self.project.get("verify", DEFAULT_SETTINGS["verify"])
+        drawings = self.drawings.rows
+
+        if not drawings:
+            messagebox.showwarning("Export Warning", "No drawings selected for export.")
+            return
+
+        self.progress_bar.grid()
+        self.progress_bar['maximum'] = PROGRESS_STEPS
+        self.status_bar.config(text="Exporting drawings...")
+
+        print("Exporting with options:")
+        print(f"DWG Folder: {export_folder_dwg}")
+        print(f"PDF Folder: {export_folder_pdf}")
+        print(f"Export DWG: {flag_export_dwg}")
+        print(f"Export PDF: {flag_export_pdf}")
+        print(f"Export individual DWG: {export_individual_sheets_dwg}")
+        print(f"Export individual PDF: {export_individual_sheets_pdf}")
+        print(f"Worker instances: {workers}")
+        print(f"Skip up-to-date drawings: {incremental}")
+        print(f"Force re-export: {force}")
+        print(f"Rebuild: {rebuild}")
+        print(f"Group by model: {locality}")
+        print(f"Verify outputs: {verify}")
+        print("")
+
+        paths = [d[1] for d in drawings]
+        priorities = {d[1]: int(d[2]) for d in drawings if len(d) > 2 and str(d[2]).lstrip("-").isdigit()}
+        costs = CostModel(default_costs_path())
+        self.remaining_time = RemainingTime(costs, paths, workers)
+        self.sheet_progress = SheetProgress(costs, paths)
+        self.row_of = {path: index for index, path in enumerate(self.drawings.keys())}
+        self.running = {}
+        self.drawings.set(range(len(self.drawings)), "Status", "queued", refilter=False)
+        self.drawings.set(range(len(self.drawings)), "Time", "")
+        self.drawings_list.refresh()
+        self._dirty = set()
+        self._status_text = "Exporting drawings..."
+        # One batch per set of drawing options, as the command line runs them
+        batches = [((batch, export_folder_dwg, export_folder_pdf, options["flag_export_dwg"],
+                     options["flag_export_pdf"], options["export_pdf"], options["export_dwg"]),
+                    {"merge": batch_policy(self.merge, number)})
+                   for number, (options, batch) in enumerate(drawing_option_sets(self.current_settings(), paths), 1)]
+        if len(batches) > 1:
+            print(f"{len(batches)} batches of drawings with their own export options")
+        (first_args, first_kwargs), batches = batches[0], batches[1:]
+        self.current_export = BackgroundExport(*first_args, workers=workers, incremental=incremental, force=force,
+                                               rebuild=rebuild, recycle=self.recycle,
+                                               timeouts=self.timeouts, retry=self.retry,
+                                               priorities=priorities, locality=locality, verify=verify,
+                                               batches=batches,
+                                               **first_kwargs).start()
+        self.export_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.root.after(POLL_INTERVAL_MS, self.poll_export, len(drawings))
+
+    def poll_export(self, num_drawings, done=0):
+        """Applies the progress events of the background export, then reschedules itself.
+
+        Events only update the row model; the table, progress bar and status
+        bar are repainted every REFRESH_INTERVAL_MS, so several busy workers
+        cost Tk no more than one.
+        """
+        for event, payload in self.current_export.poll():
+            if event == "stage":
+                # Live view of what the export is doing right now
+                self._stage_started(payload)
+                detail = f" {payload['sheet']}" if payload.get("sheet") else ""
+                self._status_text = (f"[{done}/{num_drawings}] {os.path.basename(payload.get('path') or '')}: "
+                                     f"{payload['stage']}{detail}")
+            elif event == "sheets":
+                self.sheet_progress.opened(payload["path"], payload["count"])
+            elif event == "drawing_done":
+                done += 1
+                self._drawing_done(payload)
+                if payload.get("skipped"):
+                    state = "Skipped (up to date)"
+                else:
+                    state = "Exported" if payload["ok"] else "Failed"
+                self._status_text = f"{state} {done}/{num_drawings}: {os.path.basename(payload['drawing'])}"
+            elif event == "finished":
+                self._paint()
+                self.export_finished(payload)
+                return
+            elif event == "error":
+                self._paint()
+                self.export_finished(None, payload)
+                return
+        if time.monotonic() - self._painted >= REFRESH_INTERVAL_MS / 1000:
+            self._paint()
+        self.root.after(POLL_INTERVAL_MS, self.poll_export, num_drawings, done)
+
+    def _stage_started(self, record):
+        index = self.row_of.get(record.get("path"))
+        if index is None:
+            # e.g. a model opened for locality batching
+            return
+        if record["stage"] == "document":
+            self.running[index] = record["time"]
+        elif record["stage"] == "activate_sheet":
+            self.sheet_progress.sheet_started(record["path"])
+        status = _STAGE_STATUS.get(record["stage"])
+        if status:
+            if record.get("sheet"):
+                status += f" ({record['sheet']})"
+            self.drawings.set([index], "Status", status, refilter=False)
+            self._dirty.add(index)
+
+    def _drawing_done(self, result):
+        path = result["drawing"]
+        self.remaining_time.done(path, None if result.get("skipped") else result.get("elapsed"))
+        self.sheet_progress.finished(path)
+        index = self.row_of.get(path)
+        if index is None:
+            return
+        self.running.pop(index, None)
+        if result.get("skipped"):
+            status = "skipped"
+        elif result["ok"]:
+            status = "done"
+        else:
+            status = f"failed ({result.get('failure') or 'unknown'})"
+        self.drawings.set([index], "Status", status, refilter=False)
+        elapsed = result.get("elapsed")
+        self.drawings.set([index], "Time", f"{elapsed:.1f} s" if elapsed and not result.get("skipped") else "",
+                          refilter=False)
+        self._dirty.add(index)
+
+    def _paint(self):
+        """Shows the row, progress and status changes of the events applied since the last repaint."""
+        now = time.time()
+        for index, start in self.running.items():
+            self.drawings.rows[index][self.drawings.column("Time")] = f"{now - start:.0f} s"
+        if self.drawings.filtering():
+            # Statuses may have moved rows in or out of the filter
+            self.drawings.refilter()
+            self.drawings_list.refresh()
+        else:
+            self.drawings_list.refresh_rows(self._dirty | set(self.running))
+        self._dirty = set()
+        total = self.sheet_progress.total()
+        self.progress_bar['value'] = PROGRESS_STEPS * self.sheet_progress.done() / total if total else 0
+        self.status_bar.config(text=self._status_text + self._time_left())
+        self._painted = time.monotonic()
+
+    def _time_left(self):
+        """' - about 12 min left' while drawings remain, from the cost model of schedule.py."""
+        if not self.remaining_time or not self.remaining_time.estimates:
+            return ""
+        return f" - about {format_duration(self.remaining_time.seconds())} left"
+
+    def export_finished(self, report, error=None):
+        self.progress_bar.grid_remove()
+        self.progress_bar['value'] = 0
+        self.export_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        if error:
+            self.status_bar.config(text="Export failed")
+            messagebox.showerror("Export Failed", f"The export stopped with an error: {error}")
+            return
+        summary = summary_line(report)
+        if report["cancelled"]:
+            self.status_bar.config(text=f"Export cancelled: {summary}, {report['cancelled']} not started")
+        elif report["failed"]:
+            self.status_bar.config(text=f"Export finished: {summary}")
+            messagebox.showwarning("Export Completed", f"{report['failed']} drawing(s) failed to export.")
+        else:
+            self.status_bar.config(text=f"Export completed successfully: {summary}")
+            messagebox.showinfo("Export Completed", f"Drawing export process has finished.\n{summary}")
+
+    def export_running(self):
+        return self.current_export is not None and self.current_export.is_running()
+
+    def cancel_export(self):
+        if self.export_running():
+            self.current_export.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_bar.config(text="Cancelling after the current drawing...")
+
+
+def main():
+    root = tk.Tk()
+    ExporterApp(root)
+    root.mainloop()
@@ -0,0 +1,168 @@
+"""Output verification: checking that every file an export reports as written is a usable file.
+
+SaveAs3 and Extension.SaveAs can report success for a file that ends up
+empty or cut short (a full disk, a network share dropping out, the
+application dying mid-write). Every output is checked as soon as it is
+saved, on a background thread, while the export goes on with the next
+sheet or document:
+
+    PDF   starts with %PDF- and has a %%EOF trailer; pages are counted when
+          the page objects are not compressed
+    DWG   starts with an AutoCAD version magic (AC1015 = 2000 ... AC1032 = 2018)
+    STEP  starts with ISO-10303-21; and ends with END-ISO-10303-21;
+
+Once the document is done its outputs that fail are moved to its failed
+list with the failure class "corrupt" (see failures.py), which the retry
+policy retries by default.
+"""
+import concurrent.futures
+import os
+import re
+import threading
+
+# Threads checking outputs in each process; the checks only read files
+VERIFY_THREADS = 2
+
+# How far from the end of a file its trailer may be (PDF allows trailing whitespace and comments)
+_TAIL_BYTES = 1024
+
+# Page counting reads the whole PDF, so only up to this size, a chunk at a time
+_MAX_COUNT_BYTES = 50 * 2 ** 20
+_CHUNK_BYTES = 2 ** 20
+
+_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+# Longer than any page marker (with the byte after it), so one split by a chunk boundary is found whole
+_PAGE_OVERLAP = 64
+
+DWG_VERSIONS = {
+    b"AC1015": "2000",
+    b"AC1018": "2004",
+    b"AC1021": "2007",
+    b"AC1024": "2010",
+    b"AC1027": "2013",
+    b"AC1032": "2018",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(VERIFY_THREADS, thread_name_prefix="verify")
+        return _executor
+
+
+def _head_and_tail(file, size):
+    head = file.read(min(size, _TAIL_BYTES))
+    file.seek(max(0, size - _TAIL_BYTES))
+    return head, file.read()
+
+
+def _count_pages(file):
+    """Counts the page objects of a PDF, reading it in chunks.
+
+    The end of each chunk is carried over to the next, and matches that
+    start in it are counted there.
+    """
+    pages = 0
+    carry = b""
+    while True:
+        chunk = file.read(_CHUNK_BYTES)
+        data = carry + chunk
+        limit = len(data) - _PAGE_OVERLAP if chunk else len(data)
+        pages += sum(1 for match in _PAGE.finditer(data) if match.start() < limit)
+        if not chunk:
+            return pages
+        carry = data[max(limit, 0):]
+
+
+def _check_pdf(file, size, info):
+    head, tail = _head_and_tail(file, size)
+    if not head.startswith(b"%PDF-"):
+        return "no %PDF header"
+    if b"%%EOF" not in tail:
+        return "no %%EOF trailer (truncated?)"
+    if size <= _MAX_COUNT_BYTES:
+        file.seek(0)
+        pages = _count_pages(file)
+        if pages:
+            info["pages"] = pages
+    return None
+
+
+def _check_dwg(file, size, info):
+    magic = file.read(6)
+    if not magic.startswith(b"AC10"):
+        return "no AutoCAD version header"
+    info["version"] = DWG_VERSIONS.get(magic, magic.decode("ascii", "replace"))
+    return None
+
+
+def _check_step(file, size, info):
+    head, tail = _head_and_tail(file, size)
+    if not head.startswith(b"ISO-10303-21;"):
+        return "no ISO-10303-21 header"
+    if b"END-ISO-10303-21;" not in tail:
+        return "no END-ISO-10303-21 trailer (truncated?)"
+    return None
+
+
+_CHECKS = {
+    ".pdf": _check_pdf,
+    ".dwg": _check_dwg,
+    ".step": _check_step,
+    ".stp": _check_step,
+}
+
+
+def verify_output(path):
+    """Checks one output file; returns {"ok", "size", "error"} plus "pages" (PDF) or "version" (DWG) when known."""
+    info = {"ok": False, "size": 0, "error": None}
+    try:
+        info["size"] = size = os.path.getsize(path)
+        if not size:
+            info["error"] = "empty file"
+            return info
+        check = _CHECKS.get(os.path.splitext(path)[1].lower())
+        if check:
+            with open(path, "rb") as file:
+                info["error"] = check(file, size, info)
+    except OSError as e:
+        info["error"] = f"cannot read: {e.strerror or e}"
+    info["ok"] = info["error"] is None
+    return info
+
+
+class OutputVerifier:
+    """Checks the outputs of one document in the background as they are saved.
+
+    submit() each output as soon as it is written, then apply() to the
+    document's result once its export is done.
+    """
+
+    def __init__(self):
+        self.checks = {}
+
+    def submit(self, path):
+        self.checks[path] = _pool().submit(verify_output, path)
+
+    def apply(self, result, failures):
+        """Waits for the checks and moves the outputs that failed them to result["failed"].
+
+        The result gets the check of every output under "verified";
+        failures receives "corrupt" once per bad output. Returns the number
+        of bad outputs.
+        """
+        verified = {path: check.result() for path, check in self.checks.items()}
+        self.checks = {}
+        bad = [path for path, info in verified.items() if not info["ok"]]
+        result["verified"] = verified
+        for path in bad:
+            print(f"Output check failed, {verified[path]['error']}: {path}")
+            result["outputs"].remove(path)
+            result["failed"].append(path)
+            failures.append("corrupt")
+        return len(bad)
@@ -0,0 +1,164 @@
+"""Watch mode: notices saved drawings and models and hands them to the exporter.
+
+Two ways to learn about changes:
+
+- PollingWatcher lists the source folders every interval seconds and
+  compares size and mtime of the documents. It works everywhere and only
+  keeps one (size, mtime) pair per document.
+- NativeWatcher uses the watchdog package (inotify, ReadDirectoryChangesW,
+  FSEvents) when it is installed; it costs nothing between saves.
+
+Either way changes go through a Debouncer: a document is released only once
+it has not changed for debounce seconds, so a burst of saves (or a large
+file still being written) produces one export.
+"""
+import os
+import threading
+import time
+
+from .discovery import DOCUMENT_KINDS, compile_globs, iter_documents, match_globs
+
+
+class PollingWatcher:
+    def __init__(self, folders, include=None, exclude=None):
+        self.folders = list(folders)
+        self.include = include
+        self.exclude = exclude
+        self._known = None
+
+    def _snapshot(self):
+        snapshot = {}
+        for folder in self.folders:
+            for path, size, mtime in iter_documents(folder, self.include, self.exclude):
+                snapshot[path] = (size, mtime)
+        return snapshot
+
+    def changes(self):
+        """Returns the documents added or modified since the last call (nothing on the first call)."""
+        snapshot = self._snapshot()
+        if self._known is None:
+            changed = []
+        else:
+            changed = [path for path, stat in snapshot.items() if self._known.get(path) != stat]
+        self._known = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class NativeWatcher:
+    """Filesystem notifications through watchdog; raises ImportError if it is not installed."""
+
+    def __init__(self, folders, include=None, exclude=None):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        watcher = self
+        self._lock = threading.Lock()
+        self._changed = set()
+        self._roots = [os.path.abspath(folder) for folder in folders]
+        self._include = compile_globs(include)
+        self._exclude = compile_globs(exclude)
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Opening a document for reading (e.g. by the exporter itself) must not count as a change
+                if event.is_directory or event.event_type not in ("created", "modified", "moved"):
+                    return
+                # Moves (save to a temp file, then rename) report the final name as dest_path
+                watcher._add(getattr(event, "dest_path", "") or event.src_path)
+
+        self._observer = Observer()
+        for root in self._roots:
+            self._observer.schedule(Handler(), root, recursive=True)
+        self._observer.start()
+
+    def _add(self, path):
+        name = os.path.basename(path)
+        if os.path.splitext(name)[1].lower() not in DOCUMENT_KINDS or name.startswith("~$"):
+            return
+        for root in self._roots:
+            if os.path.normcase(path).startswith(os.path.normcase(root + os.sep)):
+                relative_path = os.path.relpath(path, root).replace(os.sep, "/")
+                break
+        else:
+            return
+        if self._include and not match_globs(relative_path, name, self._include):
+            return
+        # Excluded folders: any of the parent folders may match
+        parts = relative_path.split("/")
+        for depth in range(1, len(parts) + 1):
+            if match_globs("/".join(parts[:depth]), parts[depth - 1], self._exclude):
+                return
+        with self._lock:
+            self._changed.add(path)
+
+    def changes(self):
+        with self._lock:
+            changed, self._changed = list(self._changed), set()
+        return changed
+
+    def close(self):
+        self._observer.stop()
+        self._observer.join()
+
+
+def make_watcher(folders, include=None, exclude=None, native=True):
+    """NativeWatcher if native and watchdog is available, else PollingWatcher."""
+    if native:
+        try:
+            return NativeWatcher(folders, include, exclude)
+        except ImportError:
+            print("watchdog is not installed, polling the folders instead")
+    return PollingWatcher(folders, include, exclude)
+
+
+class Debouncer:
+    """Holds changed paths until they have been quiet for debounce seconds."""
+
+    def __init__(self, debounce):
+        self.debounce = debounce
+        self._pending = {}
+
+    def add(self, paths, now=None):
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            self._pending[path] = now
+
+    def ready(self, now=None):
+        """Removes and returns the paths whose last change is older than debounce."""
+        now = time.monotonic() if now is None else now
+        ready = [path for path, changed_at in self._pending.items() if now - changed_at >= self.debounce]
+        for path in ready:
+            del self._pending[path]
+        return sorted(ready)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def watch(folders, on_changes, include=None, exclude=None, interval=2.0, debounce=5.0, native=True,
+          stop_event=None):
+    """Calls on_changes(paths) with every batch of settled, changed documents until stop_event is set.
+
+    on_changes runs in the calling thread; changes made while it runs are
+    picked up by the next poll.
+    """
+    watcher = make_watcher(folders, include, exclude, native)
+    debouncer = Debouncer(debounce)
+    print(f"Watching {', '.join(folders)} ({type(watcher).__name__}, debounce {debounce:g} s)")
+    try:
+        watcher.changes()  # establishes the baseline for polling
+        while stop_event is None or not stop_event.is_set():
+            if stop_event is not None:
+                stop_event.wait(interval)
+            else:
+                time.sleep(interval)
+            debouncer.add(watcher.changes())
+            # Saved and deleted again while debouncing: nothing to export
+            ready = [path for path in debouncer.ready() if os.path.exists(path)]
+            if ready:
+                on_changes(ready)
+    finally:
+        watcher.close()
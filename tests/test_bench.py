@@ -0,0 +1,35 @@
+import copy
+
+from solidworks_exporter.bench import compare, parse_range, percentile, run_benchmark
+
+
+def test_small_benchmark():
+    result = run_benchmark(drawings=3, sheets=2, parts=1, configurations=2, time_scale=0)
+    assert (result["documents"], result["failed"]) == (4, 0)
+    assert result["params"]["sheets"] == 2
+    # Two sheets per drawing, each saved as PDF and DWG, and one STEP file per configuration of the part
+    assert result["stages"]["activate_sheet"]["count"] == 6
+    assert (result["stages"]["save_pdf"]["count"], result["stages"]["save_step"]["count"]) == (6, 2)
+    assert compare(result, copy.deepcopy(result)) == []
+
+
+def test_compare():
+    baseline = {"params": {"drawings": 10}, "throughput": 10.0,
+                "stages": {"open": {"p50": 0.100, "p95": 0.200}, "close_doc": {"p50": 0.0001, "p95": 0.0002}}}
+    result = copy.deepcopy(baseline)
+    result["throughput"] = 8.0
+    result["stages"]["open"]["p95"] = 0.300
+    # Three times slower, but below min_delta: jitter
+    result["stages"]["close_doc"]["p50"] = 0.0003
+    assert compare(result, baseline) == ["throughput 8.00/s vs 10.00/s", "open p95 300.0 ms vs 200.0 ms"]
+    assert compare(result, baseline, tolerance=0.6) == []
+    result["params"]["drawings"] = 20
+    assert len(compare(result, baseline)) == 1
+    assert "parameters differ" in compare(result, baseline)[0]
+
+
+def test_helpers():
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+    assert percentile([5, 1, 3, 2, 4], 0.95) == 5
+    assert parse_range("4") == 4
+    assert parse_range("1-6") == (1, 6)
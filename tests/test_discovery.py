@@ -0,0 +1,64 @@
+import os
+
+from solidworks_exporter import discovery
+from solidworks_exporter.discovery import iter_documents, scan_documents
+
+OLD = 1_000_000_000
+
+
+def make_tree(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    # Old enough for the index to trust the directory mtimes
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (OLD, OLD))
+
+
+def names(paths, root):
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in paths]
+
+
+def test_scan_sorts_documents_by_kind(tmp_path):
+    make_tree(tmp_path, ["b/B.SLDDRW", "a/A.slddrw", "a/~$A.SLDDRW", "P.SLDPRT", "asm/X.SLDASM", "notes.txt"])
+    found = scan_documents(str(tmp_path))
+    assert names(found["drawings"], tmp_path) == ["a/A.slddrw", "b/B.SLDDRW"]
+    assert names(found["parts"], tmp_path) == ["P.SLDPRT"]
+    assert names(found["assemblies"], tmp_path) == ["asm/X.SLDASM"]
+
+
+def test_include_and_exclude(tmp_path):
+    make_tree(tmp_path, ["rel/A.SLDDRW", "rel/old/B.SLDDRW", "wip/C.SLDDRW", "rel/D_draft.SLDDRW"])
+    found = scan_documents(str(tmp_path), include=["rel/*"], exclude=["old", "*_draft.*"])
+    assert names(found["drawings"], tmp_path) == ["rel/A.SLDDRW"]
+    # iter_documents filters the same way, without an index
+    listed = iter_documents(str(tmp_path), include=["rel/*"], exclude=["old", "*_draft.*"])
+    assert names((path for path, _, _ in listed), tmp_path) == ["rel/A.SLDDRW"]
+
+
+def test_index_lists_only_changed_directories(tmp_path, monkeypatch):
+    root = tmp_path / "vault"
+    index_path = str(tmp_path / "index.json")
+    make_tree(root, ["a/A.SLDDRW", "b/B.SLDDRW", "b/c/C.SLDDRW"])
+    assert len(scan_documents(str(root), index_path=index_path)["drawings"]) == 3
+
+    listed = []
+    list_directory = discovery._list_directory
+    monkeypatch.setattr(discovery, "_list_directory", lambda path: listed.append(path) or list_directory(path))
+    assert len(scan_documents(str(root), index_path=index_path)["drawings"]) == 3
+    assert listed == []
+
+    (root / "b" / "D.SLDDRW").write_bytes(b"")
+    (root / "a" / "A.SLDDRW").unlink()
+    found = scan_documents(str(root), index_path=index_path)
+    assert sorted(names(found["drawings"], root)) == ["b/B.SLDDRW", "b/D.SLDDRW", "b/c/C.SLDDRW"]
+    assert sorted(listed) == [str(root / "a"), str(root / "b")]
+
+
+def test_unreadable_index_is_rebuilt(tmp_path):
+    make_tree(tmp_path / "vault", ["A.SLDDRW"])
+    index_path = tmp_path / "index.json"
+    index_path.write_text("{not json")
+    assert len(scan_documents(str(tmp_path / "vault"), index_path=str(index_path))["drawings"]) == 1
+    assert '"version": 1' in index_path.read_text()
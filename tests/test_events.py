@@ -0,0 +1,79 @@
+import functools
+import json
+
+import pytest
+
+from solidworks_exporter import events
+from solidworks_exporter.backends import BackendError, SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks
+from solidworks_exporter.schedule import CostModel
+
+
+@pytest.fixture
+def records():
+    records = []
+    events.add_listener(records.append)
+    yield records
+    events.remove_listener(records.append)
+
+
+def ended(records, stage):
+    return [record for record in records if record["event"] == "stage_end" and record["stage"] == stage]
+
+
+def test_no_listener_no_stage():
+    assert not events.has_listeners()
+    assert events.stage("open") is events.stage("save_pdf")
+
+
+def test_export_stages(tmp_path, records):
+    path = str(tmp_path / "drawing.SLDDRW")
+    backend = functools.partial(SimulatedBackend, sheets=2, failure_rate={"save_as": 1.0})
+    export_DRW_Solidworks([path], str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, True, False,
+                          backend_factory=backend, costs=CostModel())
+    starts = [record["stage"] for record in records if record["event"] == "stage_start"]
+    assert starts.count("save_pdf") == 2
+    assert len(starts) == len([record for record in records if record["event"] == "stage_end"])
+    # Inner stages take the path of the document stage and the sheet of the one they run for
+    assert [(record["path"], record["sheet"], record["ok"]) for record in ended(records, "save_pdf")] == [
+        (path, "Sheet1", True), (path, "Sheet2", True)]
+    # A save returning False fails its stage with the backend's error code
+    save_dwg = ended(records, "save_dwg")[0]
+    assert (save_dwg["ok"], save_dwg["errors"], save_dwg["error"]) == (False, 1, None)
+    assert ended(records, "document")[0]["ok"] is False
+    assert [record["count"] for record in records if record["event"] == "sheets"] == [2]
+
+
+def test_exceptions_are_recorded_and_propagate(records):
+    with pytest.raises(BackendError):
+        with events.stage("document", path="a.SLDDRW"):
+            with events.stage("open"):
+                raise BackendError("cannot open", errors=2, hresult=-1)
+    inner = ended(records, "open")[0]
+    assert (inner["path"], inner["ok"], inner["errors"], inner["hresult"], inner["error"]) == (
+        "a.SLDDRW", False, 2, -1, "cannot open")
+    assert ended(records, "document")[0]["ok"] is False
+
+
+def test_failing_listener_does_not_stop_the_others(records):
+    def broken(record):
+        raise RuntimeError("broken")
+    events.add_listener(broken)
+    try:
+        events.emit("sheets", path="a.SLDDRW", count=3)
+    finally:
+        events.remove_listener(broken)
+    assert [record["count"] for record in records] == [3]
+
+
+def test_json_lines_listener(tmp_path):
+    listener = events.add_listener(events.JsonLinesListener(str(tmp_path / "events.jsonl")))
+    try:
+        with events.stage("open", path="a.SLDDRW"):
+            pass
+    finally:
+        events.remove_listener(listener)
+        listener.close()
+    lines = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert [(line["event"], line["stage"], line["path"]) for line in lines] == [
+        ("stage_start", "open", "a.SLDDRW"), ("stage_end", "open", "a.SLDDRW")]
@@ -0,0 +1,128 @@
+import functools
+
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks, export_STEP_Solidworks, open_and_rebuild_drawing
+from solidworks_exporter.failures import SW_APPLICATION_BUSY, SW_FILE_NOT_FOUND_ERROR
+from solidworks_exporter.schedule import CostModel
+
+
+def drawings(tmp_path, count=3):
+    """Drawings that exist on disk, so the manifest can tell they did not change."""
+    paths = []
+    for i in range(count):
+        path = tmp_path / "src" / f"drawing{i}.SLDDRW"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"drawing %d" % i)
+        paths.append(str(path))
+    return paths
+
+
+def export(tmp_path, paths, backend=SimulatedBackend, **kwargs):
+    return export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False, False,
+                                 backend_factory=backend, costs=CostModel(), **kwargs)
+
+
+def test_incremental_skips_up_to_date_drawings(tmp_path):
+    paths = drawings(tmp_path)
+    assert export(tmp_path, paths, incremental=True)["exported"] == 3
+    report = export(tmp_path, paths, incremental=True)
+    assert (report["exported"], report["skipped"]) == (0, 3)
+    assert all(result["outputs"] for result in report["results"])
+
+
+def test_changed_drawing_is_exported_again(tmp_path):
+    paths = drawings(tmp_path)
+    export(tmp_path, paths, incremental=True)
+    with open(paths[1], "ab") as file:
+        file.write(b" changed")
+    report = export(tmp_path, paths, incremental=True)
+    assert [result["drawing"] for result in report["results"] if not result.get("skipped")] == [paths[1]]
+
+
+def test_failed_drawing_is_exported_again(tmp_path):
+    paths = drawings(tmp_path)
+    backend = functools.partial(SimulatedBackend, failure_rate={"open_doc": 1.0})
+    assert export(tmp_path, paths[:1], backend, incremental=True)["failed"] == 1
+    report = export(tmp_path, paths, incremental=True)
+    assert (report["exported"], report["skipped"]) == (3, 0)
+
+
+def test_force(tmp_path):
+    paths = drawings(tmp_path)
+    export(tmp_path, paths, incremental=True)
+    assert export(tmp_path, paths, incremental=True, force=True)["exported"] == 3
+
+
+def test_force_paths(tmp_path):
+    paths = drawings(tmp_path)
+    export(tmp_path, paths, incremental=True)
+    report = export(tmp_path, paths, incremental=True, force_paths=[paths[2]])
+    assert [result["drawing"] for result in report["results"] if not result.get("skipped")] == [paths[2]]
+
+
+def test_stage_timeout_serial(tmp_path):
+    paths = drawings(tmp_path)
+    backend = functools.partial(SimulatedBackend, hangs={paths[1]: "open_doc"})
+    report = export(tmp_path, paths, backend, timeouts={"open": 0.5})
+    assert report["exported"] == 2
+    assert report["results"][1]["timed_out"] == "open"
+    assert report["failures"] == {"timeout": 1}
+
+
+def test_transient_failures_are_retried(tmp_path):
+    backend = functools.partial(SimulatedBackend, failure_rate={"open_doc": 1.0}, failure_errors=SW_APPLICATION_BUSY)
+    report = export(tmp_path, drawings(tmp_path, 1), backend, retry={"max_retries": 2, "backoff": 0})
+    result = report["results"][0]
+    assert (result["failure"], result["attempts"], result["retried"]) == ("busy", 3, ["busy", "busy"])
+    assert report["retries"] == {"busy": 2}
+
+
+def test_lasting_failures_are_not_retried(tmp_path):
+    backend = functools.partial(SimulatedBackend, failure_rate={"open_doc": 1.0},
+                                failure_errors=SW_FILE_NOT_FOUND_ERROR)
+    report = export(tmp_path, drawings(tmp_path, 1), backend, retry={"max_retries": 2, "backoff": 0})
+    assert (report["results"][0]["failure"], report["results"][0]["attempts"]) == ("missing", 1)
+    assert report["failures"] == {"missing": 1}
+
+
+def test_step_configurations(tmp_path):
+    backend = functools.partial(SimulatedBackend, configurations=("A", "B"))
+    report = export_STEP_Solidworks([str(tmp_path / "part.SLDPRT")], str(tmp_path / "step"),
+                                    backend_factory=backend, costs=CostModel())
+    assert sorted(report["results"][0]["configurations"]) == ["A", "B"]
+    assert report["verified"] == 2
+
+
+def test_step_incremental(tmp_path):
+    part = tmp_path / "part.SLDPRT"
+    part.write_bytes(b"part")
+    export_STEP_Solidworks([str(part)], str(tmp_path / "step"), backend_factory=SimulatedBackend, costs=CostModel(),
+                           incremental=True)
+    report = export_STEP_Solidworks([str(part)], str(tmp_path / "step"), backend_factory=SimulatedBackend,
+                                    costs=CostModel(), incremental=True)
+    assert (report["exported"], report["skipped"]) == (0, 1)
+
+
+def test_truncated_output_is_retried_as_corrupt(tmp_path):
+    paths = drawings(tmp_path, 1)
+    pdf = str(tmp_path / "pdf" / "drawing0.pdf")
+    backend = functools.partial(SimulatedBackend, truncate={pdf: 1})
+    report = export(tmp_path, paths, backend, retry={"backoff": 0})
+    assert report["exported"] == 1
+    assert report["retries"] == {"corrupt": 1}
+
+
+def test_failed_rebuild_closes_the_drawing(tmp_path):
+    backend = SimulatedBackend(failure_rate={"force_rebuild": 1.0}, write_files=False)
+    assert open_and_rebuild_drawing(backend, str(tmp_path / "drawing.SLDDRW")) is None
+    assert backend.open_documents == {}
+
+
+def test_attempts_count_every_requeue(tmp_path):
+    # Every attempt is slow and fails: the application is restarted and the drawing exported again each time
+    backend = functools.partial(SimulatedBackend, latency={"open_doc": 0.05}, failure_rate={"open_doc": 1.0},
+                                failure_errors=SW_APPLICATION_BUSY)
+    report = export(tmp_path, drawings(tmp_path, 1), backend, recycle={"slow_seconds": 0.01},
+                    retry={"max_retries": 1, "backoff": 0})
+    result = report["results"][0]
+    assert (result["attempts"], result["retried"]) == (4, ["busy"])
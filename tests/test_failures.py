@@ -0,0 +1,71 @@
+from solidworks_exporter.backends import RPC_S_SERVER_UNAVAILABLE, BackendError, SimulatedBackend
+from solidworks_exporter.failures import (
+    SW_APPLICATION_BUSY,
+    SW_FILE_LOCK_ERROR,
+    SW_FILE_NOT_FOUND_ERROR,
+    SW_READ_ONLY_SAVE_ERROR,
+    classify_call,
+    classify_codes,
+    classify_exception,
+    document_failure,
+    retry_delay,
+    retry_policy,
+    should_retry,
+)
+
+
+def test_load_codes():
+    assert classify_codes(SW_APPLICATION_BUSY) == "busy"
+    assert classify_codes(SW_FILE_NOT_FOUND_ERROR) == "missing"
+    assert classify_codes(1) == "model"
+    assert classify_codes(0, RPC_S_SERVER_UNAVAILABLE) == "disconnected"
+
+
+def test_exceptions():
+    assert classify_exception(BackendError("gone", hresult=RPC_S_SERVER_UNAVAILABLE)) == "disconnected"
+    assert classify_exception(BackendError("busy", errors=SW_APPLICATION_BUSY)) == "busy"
+    assert classify_exception(FileNotFoundError()) == "missing"
+    assert classify_exception(RuntimeError()) == "unknown"
+
+
+def test_save_codes_are_not_read_as_load_codes():
+    backend = SimulatedBackend(failure_rate={"extension_save_as": 1.0}, write_files=False,
+                               failure_save_errors=SW_READ_ONLY_SAVE_ERROR)
+    doc = backend.open_doc("a.SLDDRW", 3)
+    assert not backend.extension_save_as(doc, "a.pdf", None)
+    assert classify_call(backend) == "model"
+    backend.failure_save_errors = SW_FILE_LOCK_ERROR
+    backend.extension_save_as(doc, "a.pdf", None)
+    assert classify_call(backend) == "busy"
+
+
+def test_codes_are_reset_by_the_next_call():
+    backend = SimulatedBackend(failure_rate={"extension_save_as": 1.0}, write_files=False,
+                               failure_save_errors=SW_FILE_LOCK_ERROR)
+    doc = backend.open_doc("a.SLDDRW", 3)
+    backend.extension_save_as(doc, "a.pdf", None)
+    backend.get_sheet_names(doc)
+    assert backend.last_errors == 0
+
+
+def test_document_failure():
+    assert document_failure([]) == "unknown"
+    assert document_failure(["busy", "corrupt"]) == "busy"
+    assert document_failure(["busy", "model"]) == "model"
+    assert document_failure(["missing", "model"]) == "missing"
+
+
+def test_retry_policy():
+    policy = retry_policy({"max_retries": 2})
+    failed = {"ok": False, "failure": "busy"}
+    assert should_retry(failed, 1, policy)
+    assert should_retry(failed, 2, policy)
+    assert not should_retry(failed, 3, policy)
+    assert not should_retry({"ok": False, "failure": "model"}, 1, policy)
+    assert not should_retry({"ok": True, "failure": None}, 1, policy)
+    assert retry_policy(None, max_retries=4)["max_retries"] == 4
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    policy = retry_policy({"backoff": 1.0, "max_backoff": 5.0})
+    assert [retry_delay(policy, retry) for retry in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 5.0]
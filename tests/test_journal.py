@@ -0,0 +1,60 @@
+import functools
+import threading
+
+import pytest
+
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks
+from solidworks_exporter.journal import Journal
+from solidworks_exporter.schedule import CostModel
+
+
+def journaled_export(tmp_path, journal, paths, backend=SimulatedBackend, resumes=None, stop_after=None):
+    run = journal.start_run(paths, resumes=resumes)
+    cancel = threading.Event()
+    finished = []
+
+    def document_done(result):
+        run.document_done(result)
+        finished.append(result)
+        if len(finished) == stop_after:
+            cancel.set()
+
+    report = export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False, False,
+                                   backend_factory=backend, costs=CostModel(), progress_callback=document_done,
+                                   cancel_event=cancel)
+    run.finish([report])
+    return run.run_id
+
+
+def test_resumed_runs_finish_the_original(tmp_path):
+    journal = Journal(str(tmp_path / "job.journal.jsonl"))
+    paths = [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(3)]
+    first = journaled_export(tmp_path, journal, paths, stop_after=1)
+    assert journal.unfinished(first) == paths[1:]
+
+    failing = functools.partial(SimulatedBackend, failure_rate={"open_doc": 1.0})
+    second = journaled_export(tmp_path, journal, journal.unfinished(first), failing, resumes=first)
+    assert journal.unfinished(first) == paths[1:]
+    assert journal.documents(second)[paths[1]]["status"] == "failed"
+
+    # A resume of the resume also counts for the first run
+    third = journaled_export(tmp_path, journal, journal.unfinished(second), resumes=second)
+    assert journal.unfinished(first) == []
+    assert journal.unfinished(third) == []
+    assert journal.last_run_id() == third
+    summaries = [(run["resumes"], run["done"], run["failed"], run["unfinished"]) for run in journal.runs()]
+    assert summaries == [(None, 1, 0, 2), (first, 0, 2, 0), (second, 2, 0, 0)]
+    assert all(run["ended"] for run in journal.runs())
+
+
+def test_crash_leaves_a_readable_journal(tmp_path):
+    journal = Journal(str(tmp_path / "job.journal.jsonl"))
+    run = journal.start_run(["a.SLDDRW", "b.SLDDRW"])
+    run.document_done({"drawing": "a.SLDDRW", "ok": True, "outputs": ["a.pdf"], "failed": [], "error": None})
+    with open(journal.path, "a") as file:
+        file.write('{"type": "document", "run_id": "')
+    assert journal.unfinished(run.run_id) == ["b.SLDDRW"]
+    assert journal.runs()[0]["ended"] is None
+    with pytest.raises(KeyError):
+        journal.unfinished("no-such-run")
@@ -0,0 +1,66 @@
+from solidworks_exporter.backends import DOC_ASSEMBLY, SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks
+from solidworks_exporter.locality import MAX_GROUP_DRAWINGS, ResidentModels, group_by_models
+from solidworks_exporter.schedule import CostModel
+
+
+def test_groups_keep_the_export_order():
+    drawings = ["d1", "d2", "d3", "d4", "d5"]
+    references = {"d1": ["A.SLDASM"], "d2": ["P.SLDPRT"], "d3": ["A.SLDASM", "P.SLDPRT"],
+                  "d4": ["notes.pdf"], "d5": ["A.SLDASM"]}
+    # d3 joins the groups of d1 and d2; a reference that is not a model groups nothing
+    assert group_by_models(drawings, references) == [
+        (["d1", "d2", "d3", "d5"], ["A.SLDASM", "P.SLDPRT"]), (["d4"], [])]
+    assert group_by_models(drawings, references, priorities={"d5": 1}) == [
+        (["d1", "d2", "d3"], ["A.SLDASM", "P.SLDPRT"]), (["d4"], []), (["d5"], ["A.SLDASM"])]
+
+
+def test_large_groups_are_split():
+    drawings = [f"d{i}" for i in range(MAX_GROUP_DRAWINGS + 5)]
+    groups = group_by_models(drawings, {drawing: ["A.SLDASM"] for drawing in drawings})
+    assert [len(group) for group, _ in groups] == [MAX_GROUP_DRAWINGS, 5]
+    assert all(models == ["A.SLDASM"] for _, models in groups)
+
+
+def test_resident_models_are_loaded_once():
+    backend = SimulatedBackend(dependencies={"d1.SLDDRW": ["A.SLDASM"], "d2.SLDDRW": ["A.SLDASM"]},
+                               write_files=False)
+    user_document = backend.open_doc("B.SLDASM", DOC_ASSEMBLY)
+    resident = ResidentModels()
+    for drawing in ("d1.SLDDRW", "d2.SLDDRW"):
+        resident.keep(backend, ["A.SLDASM", "B.SLDASM"])
+        backend.close_doc(backend.open_doc(drawing, 3))
+    assert backend.model_loads == 1
+    resident.release(backend)
+    # Ours is closed, the one the user had open is not
+    assert not backend.is_open("A.SLDASM")
+    assert list(backend.open_documents.values()) == [user_document]
+
+
+def test_new_application_opens_the_models_again():
+    first, second = SimulatedBackend(write_files=False), SimulatedBackend(write_files=False)
+    resident = ResidentModels()
+    resident.keep(first, ["A.SLDASM"])
+    resident.keep(second, ["A.SLDASM"])
+    assert second.is_open("A.SLDASM")
+    resident.release(second)
+    assert not second.is_open("A.SLDASM")
+    # Restarted again after the last drawing: nothing to close in the new one
+    resident.keep(first, ["A.SLDASM"])
+    resident.release(second)
+    assert first.is_open("A.SLDASM")
+
+
+def test_locality_saves_model_loads(tmp_path):
+    paths = [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(6)]
+    models = [str(tmp_path / "A.SLDASM"), str(tmp_path / "B.SLDASM")]
+    # Alternating models: without locality every drawing loads its model again
+    dependencies = {path: [models[i % 2]] for i, path in enumerate(paths)}
+    loads = {}
+    for locality in (False, True):
+        backend = SimulatedBackend(dependencies=dependencies)
+        report = export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False,
+                                       False, backend_factory=lambda: backend, costs=CostModel(), locality=locality)
+        assert report["exported"] == 6
+        loads[locality] = backend.model_loads
+    assert loads == {False: 6, True: 2}
@@ -0,0 +1,50 @@
+import functools
+
+import pytest
+
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks
+from solidworks_exporter.merge import batch_policy, merging_enabled
+from solidworks_exporter.schedule import CostModel
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def export(tmp_path, count, merge, backend=None):
+    paths = [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(count)]
+    backend = backend or functools.partial(SimulatedBackend, sheets={path: i + 1 for i, path in enumerate(paths)})
+    return export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), False, True, True, False,
+                                 backend_factory=backend, costs=CostModel(), merge=merge)
+
+
+def test_policy():
+    assert not merging_enabled({})
+    assert merging_enabled({"release": "REL.pdf", "drawings": False})
+    assert batch_policy({"release": "REL.pdf"}, 1) == {"release": "REL.pdf"}
+    assert batch_policy({"release": "REL.pdf"}, 3) == {"release": "REL_3.pdf"}
+
+
+def test_drawings_and_release(tmp_path):
+    report = export(tmp_path, 3, {"release": "REL.pdf"})
+    merged = report["merge"]
+    assert (merged["merged"], merged["pages"], merged["release_pages"], merged["errors"]) == (3, 6, 6, [])
+    release = pypdf.PdfReader(merged["release"])
+    assert len(release.pages) == 6
+    assert [item.title for item in release.outline if not isinstance(item, list)] == [
+        "drawing0", "drawing1", "drawing2"]
+    assert len(pypdf.PdfReader(str(tmp_path / "pdf" / "merged" / "drawing2.pdf")).pages) == 3
+
+
+def test_failed_drawings_are_left_out(tmp_path):
+    backend = functools.partial(SimulatedBackend, sheets=2, failure_rate={"open_doc": 1.0})
+    report = export(tmp_path, 3, {"release": "REL.pdf"}, backend)
+    assert report["failed"] == 3
+    assert (report["merge"]["merged"], report["merge"]["release_pages"]) == (0, 0)
+    assert not (tmp_path / "pdf" / "merged" / "drawing0.pdf").exists()
+
+
+def test_unwritable_release_still_reports(tmp_path):
+    merged = export(tmp_path, 2, {"release": "no/such/folder/REL.pdf"})["merge"]
+    assert merged["merged"] == 2
+    assert merged["release"] is None
+    assert len(merged["errors"]) == 1
@@ -0,0 +1,13 @@
+import subprocess
+import sys
+
+
+def imported_modules(statement):
+    code = f"import sys\n{statement}\nprint(' '.join(sorted(sys.modules)))"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+
+def test_engine_does_not_import_the_window_or_pywin32():
+    modules = imported_modules("import solidworks_exporter, solidworks_exporter.cli, solidworks_exporter.pool")
+    assert "solidworks_exporter.export" in modules
+    assert not {"tkinter", "win32com", "pythoncom", "solidworks_exporter.ui"} & set(modules)
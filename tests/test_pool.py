@@ -0,0 +1,79 @@
+import functools
+import os
+import threading
+
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks, export_STEP_Solidworks
+from solidworks_exporter.schedule import CostModel
+
+
+def dying_backend(marker, **kwargs):
+    """Exits the first worker process that starts, without a word; the next ones work."""
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        return SimulatedBackend(**kwargs)
+    os._exit(3)
+
+
+def export(tmp_path, paths, backend, workers=2, **kwargs):
+    return export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False, False,
+                                 workers=workers, backend_factory=backend, costs=CostModel(), **kwargs)
+
+
+def drawing_paths(tmp_path, count):
+    return [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(count)]
+
+
+def test_pool_exports_everything(tmp_path):
+    report = export(tmp_path, drawing_paths(tmp_path, 6), SimulatedBackend)
+    assert report["exported"] == 6
+    assert {result["worker"] for result in report["results"]} <= {0, 1}
+
+
+def test_no_worker_can_start(tmp_path):
+    backend = functools.partial(SimulatedBackend, no_such_setting=True)
+    report = export(tmp_path, drawing_paths(tmp_path, 3), backend)
+    assert report["failed"] == 3
+    assert {result["error"] for result in report["results"]} == {"no worker available"}
+
+
+def test_worker_lost_before_starting_its_group(tmp_path):
+    backend = functools.partial(dying_backend, str(tmp_path / "died"), latency=0.05)
+    report = export(tmp_path, drawing_paths(tmp_path, 6), backend)
+    assert report["exported"] == 6
+    assert all(result["attempts"] == 1 for result in report["results"])
+
+
+def test_stage_timeout_pool(tmp_path):
+    paths = drawing_paths(tmp_path, 6)
+    backend = functools.partial(SimulatedBackend, hangs={paths[1]: "open_doc", paths[3]: "save_as"})
+    report = export(tmp_path, paths, backend, timeouts={"open": 0.5, "save": 0.5})
+    timed_out = {result["drawing"]: result["timed_out"] for result in report["results"] if not result["ok"]}
+    assert timed_out == {paths[1]: "open", paths[3]: "save_pdf"}
+    assert report["exported"] == 4
+
+
+def test_step_pool(tmp_path):
+    parts = [str(tmp_path / f"part{i}.SLDPRT") for i in range(4)]
+    report = export_STEP_Solidworks(parts, str(tmp_path / "step"), workers=2, backend_factory=SimulatedBackend,
+                                    costs=CostModel())
+    assert report["exported"] == 4
+
+
+def test_attempts_count_requeues(tmp_path):
+    backend = functools.partial(SimulatedBackend, latency={"open_doc": 0.05}, failure_rate={"open_doc": 1.0})
+    report = export(tmp_path, drawing_paths(tmp_path, 2), backend, recycle={"slow_seconds": 0.01},
+                    retry={"max_retries": 0})
+    assert [result["attempts"] for result in report["results"]] == [2, 2]
+
+
+def test_cancel_stops_inside_a_locality_group(tmp_path):
+    paths = drawing_paths(tmp_path, 12)
+    model = str(tmp_path / "model.SLDASM")
+    backend = functools.partial(SimulatedBackend, latency={"open_doc": 0.05})
+    cancel = threading.Event()
+    report = export(tmp_path, paths, backend, locality=True, references={path: [model] for path in paths},
+                    cancel_event=cancel, progress_callback=lambda result: cancel.set())
+    assert report["exported"] + report["cancelled"] == 12
+    assert report["exported"] <= 2
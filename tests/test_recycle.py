@@ -0,0 +1,74 @@
+import functools
+
+from solidworks_exporter.backends import DOC_DRAWING, SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks
+from solidworks_exporter.recycle import RecyclingApplication, recycling_enabled
+from solidworks_exporter.schedule import CostModel
+
+
+def exporter(document, **results):
+    """export(backend) opening and closing document, with results overriding fields of its result."""
+    def export(backend):
+        doc = backend.open_doc(document, DOC_DRAWING)
+        backend.close_doc(doc)
+        return {"drawing": document, "ok": True, **results}
+    return export
+
+
+def test_policy():
+    assert not recycling_enabled(None)
+    assert not recycling_enabled({"documents": 0})
+    assert recycling_enabled({"slow_seconds": 60})
+
+
+def test_restart_by_document_count(tmp_path):
+    application = RecyclingApplication(SimulatedBackend, {"documents": 2})
+    backends = []
+    for i in range(5):
+        document = str(tmp_path / f"drawing{i}.SLDDRW")
+        assert application.run(document, exporter(document))["ok"]
+        backends.append(application.backend)
+    assert [event["reason"] for event in application.recycles] == ["documents", "documents"]
+    assert len(set(map(id, backends))) == 3
+    # Each application opened its share of the documents before it was closed
+    assert [backend.calls["open_doc"] for backend in (backends[0], backends[2], backends[4])] == [2, 2, 1]
+    assert backends[0].opened == 0
+
+
+def test_restart_by_memory(tmp_path):
+    application = RecyclingApplication(functools.partial(SimulatedBackend, memory_growth=100), {"memory_mb": 650})
+    for i in range(6):
+        document = str(tmp_path / f"drawing{i}.SLDDRW")
+        result = application.run(document, exporter(document))
+        assert result["memory_mb"] <= 700
+    # 400 MB at start and 100 more per document: over 650 after the third
+    assert [(event["reason"], event["documents"]) for event in application.recycles] == [("memory", 3)]
+
+
+def test_slow_failed_document_is_exported_again(tmp_path):
+    application = RecyclingApplication(SimulatedBackend, {"slow_seconds": 30})
+    document = str(tmp_path / "drawing.SLDDRW")
+    result = application.run(document, exporter(document, elapsed=60.0, ok=False))
+    assert result["requeued"]
+    # The second try was as slow: restarted again, but not exported a third time
+    assert [event["reason"] for event in application.recycles] == ["slow", "slow"]
+    result = application.run(document, exporter(document, elapsed=60.0))
+    assert "requeued" not in result
+    assert len(application.recycles) == 3
+
+
+def test_restart_after_timeout_or_disconnection(tmp_path):
+    application = RecyclingApplication(SimulatedBackend)
+    document = str(tmp_path / "drawing.SLDDRW")
+    application.run(document, exporter(document, ok=False, timed_out="open"))
+    application.run(document, exporter(document, ok=False, failure="disconnected"))
+    assert [event["reason"] for event in application.recycles] == ["timeout", "disconnected"]
+    assert application.documents == 0
+
+
+def test_export_reports_the_restarts(tmp_path):
+    paths = [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(5)]
+    report = export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False, False,
+                                   backend_factory=SimulatedBackend, costs=CostModel(), recycle={"documents": 2})
+    assert report["exported"] == 5
+    assert [event["documents"] for event in report["recycles"]] == [2, 2]
@@ -0,0 +1,66 @@
+import os
+
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.refgraph import ReferenceGraph
+
+
+def make_documents(tmp_path):
+    paths = {name: str(tmp_path / name) for name in ("D1.SLDDRW", "D2.SLDDRW", "D3.SLDDRW", "A.SLDASM",
+                                                     "P1.SLDPRT", "P2.SLDPRT")}
+    for path in paths.values():
+        with open(path, "wb") as file:
+            file.write(os.path.basename(path).encode())
+    dependencies = {
+        paths["D1.SLDDRW"]: [paths["A.SLDASM"]],
+        paths["A.SLDASM"]: [paths["P1.SLDPRT"], paths["P2.SLDPRT"]],
+        paths["D2.SLDDRW"]: [paths["P2.SLDPRT"]],
+    }
+    return paths, SimulatedBackend(dependencies=dependencies, write_files=False)
+
+
+def exported(paths):
+    return [{"results": [{"drawing": path, "ok": True} for path in paths]}]
+
+
+def test_changed_models_affect_their_dependents(tmp_path):
+    paths, backend = make_documents(tmp_path)
+    targets = [paths["D1.SLDDRW"], paths["D2.SLDDRW"], paths["D3.SLDDRW"], paths["P1.SLDPRT"]]
+    graph = ReferenceGraph(str(tmp_path / "job.refgraph.json"))
+    assert len(graph.update(backend, targets)) == 6
+    assert graph.references(paths["A.SLDASM"]) == [paths["P1.SLDPRT"], paths["P2.SLDPRT"]]
+    graph.record_run(targets, exported(targets))
+    graph.save()
+
+    graph = ReferenceGraph(str(tmp_path / "job.refgraph.json"))
+    assert graph.update(backend, targets) == []
+    with open(paths["P2.SLDPRT"], "ab") as file:
+        file.write(b" changed")
+    changed = graph.update(backend, targets)
+    assert changed == [paths["P2.SLDPRT"]]
+    # P2 is in A, so D1 shows it too; the STEP export of P1 does not
+    assert graph.affected(changed, targets) == [paths["D1.SLDDRW"], paths["D2.SLDDRW"]]
+
+
+def test_touched_file_is_not_changed(tmp_path):
+    paths, backend = make_documents(tmp_path)
+    targets = [paths["D1.SLDDRW"]]
+    graph = ReferenceGraph()
+    graph.update(backend, targets)
+    graph.record_run(targets, exported(targets))
+    stat = os.stat(paths["P1.SLDPRT"])
+    os.utime(paths["P1.SLDPRT"], (stat.st_atime, stat.st_mtime + 10))
+    assert graph.update(backend, targets) == []
+    assert backend.calls.get("document_dependencies", 0) == 4
+
+
+def test_failed_and_missing_targets_stay_affected(tmp_path):
+    paths, backend = make_documents(tmp_path)
+    targets = [paths["D1.SLDDRW"], paths["D2.SLDDRW"], paths["D3.SLDDRW"]]
+    graph = ReferenceGraph()
+    graph.update(backend, targets)
+    # D2 failed and D3 got no result (cancelled)
+    graph.record_run(targets, [{"results": [{"drawing": paths["D1.SLDDRW"], "ok": True},
+                                            {"drawing": paths["D2.SLDDRW"], "ok": False}]}])
+    changed = graph.update(backend, targets)
+    assert sorted(changed) == [paths["D2.SLDDRW"], paths["D3.SLDDRW"]]
+    assert graph.affected(changed, targets) == [paths["D2.SLDDRW"], paths["D3.SLDDRW"]]
@@ -0,0 +1,47 @@
+import functools
+import time
+
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.runner import BackgroundExport
+from solidworks_exporter.schedule import CostModel
+
+
+def background_export(tmp_path, count, backend, batches=None):
+    paths = [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(count)]
+    return BackgroundExport(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False, False,
+                            backend_factory=backend, costs=CostModel(), batches=batches)
+
+
+def wait(run, on_event=None, timeout=30):
+    """Drains the events of run until it finishes; returns them all."""
+    posted = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for event in run.poll():
+            posted.append(event)
+            if on_event:
+                on_event(event)
+            if event[0] in ("finished", "error"):
+                return posted
+        time.sleep(0.01)
+    raise AssertionError("the export did not finish")
+
+
+def test_events_are_posted_from_the_thread(tmp_path):
+    posted = wait(background_export(tmp_path, 3, SimulatedBackend).start())
+    kinds = [kind for kind, _ in posted]
+    assert kinds.count("drawing_done") == 3
+    assert "stage" in kinds and "sheets" in kinds
+    assert kinds[-1] == "finished"
+    assert posted[-1][1]["exported"] == 3
+
+
+def test_cancel_stops_after_the_current_drawing(tmp_path):
+    backend = functools.partial(SimulatedBackend, latency={"open_doc": 0.2})
+    more = [str(tmp_path / "later.SLDDRW")]
+    run = background_export(tmp_path, 4, backend, batches=[((more, str(tmp_path / "dwg"), str(tmp_path / "pdf"),
+                                                              True, True, False, False), {})])
+    posted = wait(run.start(), lambda event: event[0] == "drawing_done" and run.cancel())
+    # Cancelled while the second drawing was open: it is finished, the rest and the next batch are not started
+    report = posted[-1][1]
+    assert (report["exported"], report["cancelled"]) == (2, 3)
@@ -0,0 +1,83 @@
+from solidworks_exporter.backends import SimulatedBackend
+from solidworks_exporter.export import export_DRW_Solidworks
+from solidworks_exporter.schedule import (
+    DEFAULT_COST,
+    CostModel,
+    RemainingTime,
+    SheetProgress,
+    format_duration,
+    schedule,
+)
+
+
+def test_estimates(tmp_path):
+    costs = CostModel(str(tmp_path / "costs.json"))
+    small, large, new = (tmp_path / name for name in ("small.SLDDRW", "large.SLDDRW", "new.SLDDRW"))
+    small.write_bytes(b"x" * 2 ** 20)
+    large.write_bytes(b"x" * 4 * 2 ** 20)
+    new.write_bytes(b"x" * 3 * 2 ** 20)
+    assert costs.estimate(str(small)) == DEFAULT_COST
+    costs.record(str(small), 1.0, sheets=3)
+    costs.record(str(large), 16.0)
+    costs.record(str(large), 8.0)
+    # Smoothed towards the newest timing
+    assert costs.estimate(str(large)) == 12.0
+    # Unknown documents at the median seconds per MB of the known ones, here the upper of 1 and 3 s/MB
+    assert costs.estimate(str(new)) == 9.0
+    costs.save()
+    assert CostModel(str(tmp_path / "costs.json")).sheets(str(small)) == 3
+
+
+def test_order():
+    costs = CostModel()
+    for path, seconds in (("a", 1.0), ("b", 3.0), ("c", 2.0), ("d", 5.0)):
+        costs.record(path, seconds)
+    assert schedule(["a", "b", "c", "d"], costs) == ["a", "c", "b", "d"]
+    assert schedule(["a", "b", "c", "d"], costs, workers=2) == ["d", "b", "c", "a"]
+    assert schedule(["a", "b", "c", "d"], costs, priorities={"a": 1, "c": 1}, workers=2) == ["c", "a", "d", "b"]
+
+
+def test_export_follows_priorities(tmp_path):
+    paths = [str(tmp_path / f"drawing{i}.SLDDRW") for i in range(4)]
+    costs = CostModel()
+    report = export_DRW_Solidworks(paths, str(tmp_path / "dwg"), str(tmp_path / "pdf"), True, True, False, False,
+                                   backend_factory=SimulatedBackend, costs=costs, priorities={paths[2]: 5})
+    assert report["results"][0]["drawing"] == paths[2]
+    # The run teaches the cost model its timings and sheet counts
+    assert all(costs.sheets(path) for path in paths)
+
+
+def test_remaining_time():
+    costs = CostModel()
+    for path in "abcd":
+        costs.record(path, 10.0)
+    remaining = RemainingTime(costs, list("abcd"), workers=2)
+    assert remaining.seconds() == 20.0
+    # The finished documents took twice their estimate: so will the rest
+    remaining.done("a", 20.0)
+    assert remaining.seconds() == 30.0
+    remaining.done("b", 20.0)
+    remaining.done("c", 20.0)
+    assert remaining.seconds() == 20.0
+    remaining.done("d", 20.0)
+    assert remaining.seconds() == 0.0
+
+
+def test_sheet_progress():
+    costs = CostModel()
+    costs.record("a", 1.0, sheets=10)
+    progress = SheetProgress(costs, ["a", "b", "c"])
+    # Drawings never exported count as the mean of the known ones
+    assert progress.total() == 30
+    progress.opened("b", 2)
+    assert progress.total() == 18
+    progress.sheet_started("a")
+    progress.sheet_started("a")
+    progress.sheet_started("a")
+    assert progress.done() == 2
+    progress.finished("a")
+    assert (progress.done(), progress.total()) == (10, 18)
+
+
+def test_format_duration():
+    assert [format_duration(seconds) for seconds in (45, 720, 7500)] == ["45 s", "12 min", "2 h 05 min"]
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from solidworks_exporter.settings import (
+    PROJECT_FORMAT,
+    PROJECT_VERSION,
+    drawing_option_sets,
+    load_settings_file,
+    save_settings_file,
+)
+
+V1 = {
+    "dwg_folder": "C:/out/dwg",
+    "pdf_folder": "C:/out/pdf",
+    "export_pdf": True,
+    "workers": 2,
+    "drawings": [["A.SLDDRW", "C:/src/A.SLDDRW"], ["B.SLDDRW", "C:/src/B.SLDDRW", 3]],
+    "parts": [["P.SLDPRT", "C:/src/P.SLDPRT", ["Default"]]],
+}
+
+
+def write_lines(path, lines):
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    return str(path)
+
+
+def test_version_1_is_migrated(tmp_path):
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps(V1, indent=4))
+    settings = load_settings_file(str(path))
+    assert settings["workers"] == 2
+    assert settings["incremental"] is False
+    assert [row[1] for row in settings["drawings"]] == ["C:/src/A.SLDDRW", "C:/src/B.SLDDRW"]
+    assert settings["drawings"][1][2] == 3
+    assert settings["parts"][0][2] == ["Default"]
+
+    save_settings_file(str(path), settings)
+    with open(path) as file:
+        header = json.loads(file.readline())
+    assert (header["format"], header["version"]) == (PROJECT_FORMAT, PROJECT_VERSION)
+    assert load_settings_file(str(path)) == settings
+
+
+def test_version_1_errors(tmp_path):
+    path = tmp_path / "job.json"
+    path.write_text(json.dumps({**V1, "drawings": [["A.SLDDRW", "C:/src/A.SLDDRW", "high"]]}))
+    with pytest.raises(ValueError, match=r"drawings\[0\] has an invalid priority"):
+        load_settings_file(str(path))
+    path.write_text(json.dumps({**V1, "workers": "two"}))
+    with pytest.raises(ValueError, match="workers must be int, not str"):
+        load_settings_file(str(path))
+
+
+def test_errors_name_the_line(tmp_path):
+    header = {"format": PROJECT_FORMAT, "version": PROJECT_VERSION, "settings": {}}
+    drawing = {"type": "drawing", "name": "A.SLDDRW", "path": "C:/src/A.SLDDRW"}
+    path = write_lines(tmp_path / "job.json", [header, drawing, {"type": "drawing", "name": "B.SLDDRW"}])
+    with pytest.raises(ValueError, match=r"job\.json:3: path is missing"):
+        load_settings_file(path)
+    path = write_lines(tmp_path / "job.json", [header, drawing, {**drawing, "formats": ["png"]}])
+    with pytest.raises(ValueError, match=r"job\.json:3: unknown format 'png'"):
+        load_settings_file(path)
+    path = write_lines(tmp_path / "job.json", [{**header, "settings": {"verify": "yes"}}])
+    with pytest.raises(ValueError, match=r"job\.json:1: verify must be bool"):
+        load_settings_file(path)
+
+
+def test_newer_version_is_refused(tmp_path):
+    path = write_lines(tmp_path / "job.json", [{"format": PROJECT_FORMAT, "version": PROJECT_VERSION + 1}])
+    with pytest.raises(ValueError, match="version"):
+        load_settings_file(path)
+
+
+def test_item_options_round_trip(tmp_path):
+    settings = load_settings_file(write_lines(tmp_path / "job.json", [
+        {"format": PROJECT_FORMAT, "version": PROJECT_VERSION, "settings": {"export_pdf": True}},
+        {"type": "drawing", "name": "A.SLDDRW", "path": "A.SLDDRW", "formats": ["pdf"]},
+        {"type": "drawing", "name": "B.SLDDRW", "path": "B.SLDDRW", "sheets": {"pdf": "combined"}},
+        {"type": "drawing", "name": "C.SLDDRW", "path": "C.SLDDRW"},
+    ]))
+    save_settings_file(str(tmp_path / "copy.json"), settings)
+    assert load_settings_file(str(tmp_path / "copy.json")) == settings
+
+    sets = drawing_option_sets(settings, ["A.SLDDRW", "B.SLDDRW", "C.SLDDRW", "D.SLDDRW"])
+    assert len(sets) == 3
+    by_drawing = {path: options for options, paths in sets for path in paths}
+    assert by_drawing["A.SLDDRW"]["flag_export_dwg"] is False
+    assert by_drawing["B.SLDDRW"]["export_pdf"] is False
+    assert by_drawing["C.SLDDRW"] == by_drawing["D.SLDDRW"]
@@ -0,0 +1,52 @@
+from solidworks_exporter.table import RowModel
+
+COLUMNS = ("name", "path", "status")
+
+
+def rows(count, status="Pending"):
+    return [[f"D{i}.SLDDRW", f"C:/src/D{i}.SLDDRW", status] for i in range(count)]
+
+
+def test_extend_keeps_rows_unique():
+    model = RowModel(COLUMNS)
+    assert model.extend(rows(3)) == 3
+    assert model.extend(rows(5)) == 2
+    assert len(model) == 5
+    assert model.index_of("C:/src/D4.SLDDRW") == 4
+    assert model.index_of("C:/src/D9.SLDDRW") is None
+
+
+def test_delete():
+    model = RowModel(COLUMNS)
+    model.extend(rows(5))
+    model.delete([0, 3])
+    assert model.keys() == ["C:/src/D1.SLDDRW", "C:/src/D2.SLDDRW", "C:/src/D4.SLDDRW"]
+    assert model.index_of("C:/src/D4.SLDDRW") == 2
+    assert model.visible == [0, 1, 2]
+    # A deleted row can be added again
+    assert model.extend(rows(1)) == 1
+    model.clear()
+    assert (len(model), model.visible) == (0, [])
+
+
+def test_filter():
+    model = RowModel(COLUMNS)
+    model.extend(rows(12))
+    model.filter(" d1 ")
+    assert model.filtering()
+    assert model.visible == [1, 10, 11]
+    # New rows and changed values are filtered too
+    model.extend([["X.SLDDRW", "C:/src/X.SLDDRW", "d1 failed"]])
+    assert model.visible == [1, 10, 11, 12]
+    model.set([10], "status", "Done")
+    assert model.visible == [1, 10, 11, 12]
+    model.filter("done")
+    model.set([11], "status", "Done", refilter=False)
+    assert model.visible == [10]
+    model.refilter()
+    assert model.visible == [10, 11]
+    model.delete([10])
+    assert model.visible == [10]
+    model.filter("")
+    assert not model.filtering()
+    assert model.visible == list(range(12))
@@ -0,0 +1,58 @@
+from solidworks_exporter import ui
+from solidworks_exporter.settings import load_settings_file, save_settings_file
+from solidworks_exporter.table import RowModel
+
+
+class Var:
+    """Stands in for a Tk variable, which needs a display."""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class Table:
+    def clear_selection(self):
+        pass
+
+
+def window():
+    """An ExporterApp without widgets: enough for loading and saving projects."""
+    app = ui.ExporterApp.__new__(ui.ExporterApp)
+    app.current_export = None
+    for name in ("dwg_folder_var", "pdf_folder_var", "dwg_var", "pdf_var", "flag_export_dwg", "flag_export_pdf",
+                 "workers_var", "incremental_var", "rebuild_var", "locality_var"):
+        setattr(app, name, Var())
+    app.recycle, app.timeouts, app.retry, app.merge, app.project = {}, {}, {}, {}, {}
+    app.drawings = RowModel(ui.DRAWING_COLUMNS)
+    app.drawing_options = {}
+    app.drawings_list = Table()
+    return app
+
+
+def test_load_and_save_keep_what_the_window_does_not_edit(tmp_path, monkeypatch):
+    project = {
+        "dwg_folder": "out/dwg", "pdf_folder": "out/pdf", "step_folder": "out/step", "workers": 3,
+        "verify": False, "heavy_assemblies": {"size_mb": 200}, "source_folders": ["src"],
+        "include": ["*.SLDDRW"], "exclude": ["old/*"], "merge": {"release": "REL.pdf"},
+        "drawings": [["A.SLDDRW", "src/A.SLDDRW", 2, {"formats": ["pdf"]}], ["B.SLDDRW", "src/B.SLDDRW", 0]],
+        "parts": [["P.SLDPRT", "src/P.SLDPRT", ["Default"]], ["Q.SLDASM", "src/Q.SLDASM"]],
+    }
+    loaded_path, saved_path = str(tmp_path / "loaded.json"), str(tmp_path / "saved.json")
+    save_settings_file(loaded_path, project)
+    monkeypatch.setattr(ui.filedialog, "askopenfilename", lambda **kwargs: loaded_path)
+    monkeypatch.setattr(ui.filedialog, "asksaveasfilename", lambda **kwargs: saved_path)
+
+    app = window()
+    app.load_settings()
+    app.workers_var.set(4)
+    app.save_settings()
+
+    saved = load_settings_file(saved_path)
+    assert saved == {**load_settings_file(loaded_path), "workers": 4}
+    assert [part[1] for part in saved["parts"]] == ["src/P.SLDPRT", "src/Q.SLDASM"]
@@ -0,0 +1,29 @@
+import io
+
+from solidworks_exporter import verify
+from solidworks_exporter.verify import verify_output
+
+PAGES = b"".join(b"%d 0 obj << /Type /Page%s >> endobj\n" % (i, b" " * i) for i in range(40))
+PDF = b"%PDF-1.7\n" + PAGES + b"<< /Type /Pages /Count 40 >>\n%%EOF\n"
+
+
+def test_pages_are_counted_across_chunks(monkeypatch):
+    for chunk in (1, 7, 64, 100, 2 ** 20):
+        monkeypatch.setattr(verify, "_CHUNK_BYTES", chunk)
+        assert verify._count_pages(io.BytesIO(PDF)) == 40
+
+
+def test_outputs(tmp_path):
+    good = tmp_path / "good.pdf"
+    good.write_bytes(PDF)
+    assert verify_output(str(good)) == {"ok": True, "size": len(PDF), "error": None, "pages": 40}
+    truncated = tmp_path / "truncated.pdf"
+    truncated.write_bytes(PDF[:200])
+    assert "truncated" in verify_output(str(truncated))["error"]
+    empty = tmp_path / "empty.step"
+    empty.write_bytes(b"")
+    assert verify_output(str(empty))["error"] == "empty file"
+    dwg = tmp_path / "drawing.dwg"
+    dwg.write_bytes(b"AC1027 ...")
+    assert verify_output(str(dwg))["version"] == "2013"
+    assert not verify_output(str(tmp_path / "missing.pdf"))["ok"]
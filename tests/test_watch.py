@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+from solidworks_exporter.watch import Debouncer, PollingWatcher, watch
+
+
+def test_debouncer_waits_for_quiet():
+    debouncer = Debouncer(5.0)
+    debouncer.add(["a", "b"], now=0.0)
+    debouncer.add(["a"], now=3.0)
+    assert debouncer.ready(now=4.0) == []
+    assert debouncer.ready(now=5.0) == ["b"]
+    assert len(debouncer) == 1
+    # Saved again while waiting: the wait starts over
+    debouncer.add(["a"], now=7.0)
+    assert debouncer.ready(now=11.0) == []
+    assert debouncer.ready(now=12.0) == ["a"]
+    assert len(debouncer) == 0
+
+
+def test_polling_watcher(tmp_path):
+    (tmp_path / "old").mkdir()
+    drawing = tmp_path / "A.SLDDRW"
+    drawing.write_bytes(b"v1")
+    watcher = PollingWatcher([str(tmp_path)], exclude=["old"])
+    assert watcher.changes() == []
+    (tmp_path / "B.SLDPRT").write_bytes(b"")
+    (tmp_path / "old" / "C.SLDDRW").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+    drawing.write_bytes(b"version 2")
+    assert sorted(watcher.changes()) == [str(drawing), str(tmp_path / "B.SLDPRT")]
+    assert watcher.changes() == []
+
+
+def test_watch_hands_over_settled_documents(tmp_path):
+    stop = threading.Event()
+    batches = []
+
+    def on_changes(paths):
+        batches.append(paths)
+        stop.set()
+
+    thread = threading.Thread(target=watch, args=([str(tmp_path)], on_changes),
+                              kwargs={"interval": 0.05, "debounce": 0.3, "native": False, "stop_event": stop})
+    thread.start()
+    try:
+        # Saved and removed again before it settled: never reported
+        (tmp_path / "temp.SLDDRW").write_bytes(b"")
+        time.sleep(0.1)
+        os.remove(tmp_path / "temp.SLDDRW")
+        (tmp_path / "A.SLDDRW").write_bytes(b"")
+        thread.join(10)
+    finally:
+        stop.set()
+    assert batches == [[str(tmp_path / "A.SLDDRW")]]